@@ -0,0 +1,276 @@
+"""Servicio HTTP de cotización sobre el mismo motor de la app.
+
+Servidor asyncio de la librería estándar (HTTP/1.1 con keep-alive), sin
+dependencias nuevas. Las cotizaciones se calculan en el bucle de eventos (son
+de microsegundos, las repetidas salen de ``cache_cotizaciones`` y el lote es
+vectorizado), salvo con el nivel en disco de la caché activo: esa consulta va a
+un hilo para no bloquear el bucle con E/S. El renderizado de PDF, que es lo
+costoso, se envía a un pool de procesos.
+
+Los errores del cliente (campos faltantes, consumo, tarifa o HSP que no son
+positivos, ``aplica_ley_1715`` que no es booleano, versión de costos
+desconocida, nombres que el PDF no puede imprimir) responden 400 con un mensaje.
+
+Rutas:
+    GET  /salud              estado del servicio
+    POST /cotizacion         un cliente (JSON)
+    POST /cotizaciones       {"leads": [...]} en una sola pasada vectorizada
+    POST /propuesta.pdf      PDF de la propuesta de un cliente
+    GET  /metricas           latencias p50/p99 por ruta y aciertos de la caché
+
+Uso:
+    python api.py --puerto 8080 --procesos 4
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cache_cotizaciones import cache_cotizaciones, cotizar
+from curvas_costo import curvas, version_vigente
+from motor import calcular_lote, hsp_data
+from pdf_propuesta import datos_propuesta, generar_pdf
+
+TAMAÑO_MAXIMO_CUERPO = 50 * 1024 * 1024
+MUESTRAS_LATENCIA = 10_000
+AUTOCONSUMO_DEFECTO = 95
+MOTIVOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErrorSolicitud(Exception):
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _json(valor):
+    """Serializa a JSON convirtiendo NaN/inf (filas inválidas) en null."""
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    if isinstance(valor, dict):
+        return {k: _json(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_json(v) for v in valor]
+    return valor
+
+
+def _positivo(campo, valor):
+    valor = float(valor)
+    if not (math.isfinite(valor) and valor > 0):
+        raise ErrorSolicitud(f"El campo {campo} debe ser mayor que cero")
+    return valor
+
+
+def _entradas(lead):
+    if not isinstance(lead, dict):
+        raise ErrorSolicitud("Cada cliente debe ser un objeto JSON")
+    try:
+        ciudad = lead.get("ciudad", "Seleccionar")
+        hsp = lead.get("hsp")
+        if hsp is None and hsp_data.get(ciudad, 0) <= 0:
+            raise ErrorSolicitud(f"Ciudad sin HSP conocida: {ciudad}")
+        # bool("false") es True: solo se aceptan booleanos de JSON
+        aplica_ley_1715 = lead.get("aplica_ley_1715", False)
+        if not isinstance(aplica_ley_1715, bool):
+            raise ErrorSolicitud("El campo aplica_ley_1715 debe ser true o false")
+        return {
+            "ciudad": ciudad,
+            "consumo_mes": _positivo("consumo_mes", lead["consumo_mes"]),
+            "tarifa_kwh": _positivo("tarifa_kwh", lead["tarifa_kwh"]),
+            "autoconsumo_directo": float(lead.get("autoconsumo_directo", AUTOCONSUMO_DEFECTO)),
+            "aplica_ley_1715": aplica_ley_1715,
+            "hsp": None if hsp is None else _positivo("hsp", hsp),
+        }
+    except KeyError as e:
+        raise ErrorSolicitud(f"Falta el campo {e.args[0]}") from None
+    except (TypeError, ValueError) as e:
+        raise ErrorSolicitud(f"Valor inválido: {e}") from None
+
+
+def _version(cuerpo):
+    version = cuerpo.get("version_costos")
+    if version is None:
+        return None
+    if not isinstance(version, str) or version not in curvas().curvas:
+        raise ErrorSolicitud(f"Versión de curva de costos desconocida: {version}. "
+                             f"Disponibles: {', '.join(curvas().curvas)}")
+    return version
+
+
+def _texto_pdf(campo, valor):
+    """Texto que el PDF puede imprimir (sus fuentes solo cubren latin-1)."""
+    if not isinstance(valor, str):
+        raise ErrorSolicitud(f"El campo {campo} debe ser texto")
+    try:
+        valor.encode("latin-1")
+    except UnicodeEncodeError:
+        raise ErrorSolicitud(f"El campo {campo} tiene caracteres que el PDF no puede imprimir") from None
+    return valor
+
+
+def _renderizar_pdf(datos):
+    return generar_pdf(datos)
+
+
+class ServidorCotizaciones:
+    def __init__(self, procesos=None):
+        self.pool = ProcessPoolExecutor(max_workers=procesos)
+        self.latencias = {}
+        self.peticiones = {}
+        self.rutas = {
+            ("GET", "/salud"): self.salud,
+            ("POST", "/cotizacion"): self.cotizacion,
+            ("POST", "/cotizaciones"): self.cotizaciones,
+            ("POST", "/propuesta.pdf"): self.propuesta_pdf,
+            ("GET", "/metricas"): self.metricas,
+        }
+
+    # --- RUTAS ---
+    async def salud(self, cuerpo):
+        return 200, "application/json", {"estado": "ok", "version_costos": version_vigente()}
+
+    async def cotizacion(self, cuerpo):
+        e = _entradas(cuerpo)
+        version = _version(cuerpo)
+        argumentos = (e["ciudad"], e["consumo_mes"], e["tarifa_kwh"], e["autoconsumo_directo"], e["aplica_ley_1715"])
+        if cache_cotizaciones().disco is None:
+            resultado = cotizar(*argumentos, hsp=e["hsp"], version_costos=version)
+        else:
+            resultado = await asyncio.to_thread(cotizar, *argumentos, hsp=e["hsp"], version_costos=version)
+        return 200, "application/json", {**resultado, "version_costos": version or version_vigente()}
+
+    async def cotizaciones(self, cuerpo):
+        leads = cuerpo.get("leads")
+        if not isinstance(leads, list):
+            raise ErrorSolicitud('Se esperaba {"leads": [...]}')
+        entradas = [_entradas(lead) for lead in leads]
+        hsp = [e["hsp"] if e["hsp"] is not None else hsp_data[e["ciudad"]] for e in entradas]
+        version = _version(cuerpo)
+        columnas = calcular_lote(
+            None, [e["consumo_mes"] for e in entradas], [e["tarifa_kwh"] for e in entradas],
+            [e["autoconsumo_directo"] for e in entradas], [e["aplica_ley_1715"] for e in entradas],
+            hsp=np.array(hsp, dtype=float), version_costos=version)
+        columnas = {c: v.tolist() for c, v in columnas.items()}
+        propuestas = [dict(zip(columnas, fila)) for fila in zip(*columnas.values())]
+        return 200, "application/json", {"version_costos": version or version_vigente(), "propuestas": propuestas}
+
+    async def propuesta_pdf(self, cuerpo):
+        nombre = cuerpo.get("nombre")
+        if not nombre:
+            raise ErrorSolicitud("Falta el campo nombre")
+        nombre = _texto_pdf("nombre", nombre)
+        ciudad = _texto_pdf("ciudad", cuerpo.get("ciudad", ""))
+        _, _, p = await self.cotizacion(cuerpo)
+        datos = datos_propuesta(nombre, ciudad, p["kwp_instalado"], p["inversion_total"],
+                                p["payback"], payback_simple=True)
+        contenido = await asyncio.get_running_loop().run_in_executor(self.pool, _renderizar_pdf, datos)
+        return 200, "application/pdf", contenido
+
+    async def metricas(self, cuerpo):
+        return 200, "application/json", {"rutas": self.resumen_latencias(),
+                                         "cache_cotizaciones": cache_cotizaciones().metricas()}
+
+    # --- MÉTRICAS ---
+    def registrar(self, ruta, segundos):
+        self.peticiones[ruta] = self.peticiones.get(ruta, 0) + 1
+        self.latencias.setdefault(ruta, deque(maxlen=MUESTRAS_LATENCIA)).append(segundos)
+
+    def resumen_latencias(self):
+        resumen = {}
+        for ruta, muestras in self.latencias.items():
+            p50, p99 = np.percentile(np.fromiter(muestras, float), [50, 99]) * 1000
+            resumen[ruta] = {"peticiones": self.peticiones[ruta], "p50_ms": round(p50, 3), "p99_ms": round(p99, 3)}
+        return resumen
+
+    # --- HTTP ---
+    async def despachar(self, metodo, ruta, cuerpo):
+        ruta = ruta.split("?", 1)[0]
+        manejador = self.rutas.get((metodo, ruta))
+        if manejador is None:
+            existe = any(r == ruta for _, r in self.rutas)
+            raise ErrorSolicitud(f"{metodo} {ruta} no disponible", 405 if existe else 404)
+        datos = {}
+        if cuerpo:
+            try:
+                datos = json.loads(cuerpo)
+            except ValueError:
+                raise ErrorSolicitud("El cuerpo no es JSON válido") from None
+            if not isinstance(datos, dict):
+                raise ErrorSolicitud("El cuerpo debe ser un objeto JSON")
+        return await manejador(datos)
+
+    async def atender(self, reader, writer):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                metodo, ruta, _ = linea.decode("latin-1").split(" ", 2)
+                cabeceras = {}
+                while True:
+                    cabecera = await reader.readline()
+                    if cabecera in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = cabecera.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                largo = int(cabeceras.get("content-length", 0))
+                inicio = time.perf_counter()
+                try:
+                    if largo > TAMAÑO_MAXIMO_CUERPO:
+                        raise ErrorSolicitud("Cuerpo demasiado grande", 413)
+                    cuerpo = await reader.readexactly(largo) if largo else b""
+                    estado, tipo, contenido = await self.despachar(metodo, ruta, cuerpo)
+                except ErrorSolicitud as e:
+                    estado, tipo, contenido = e.estado, "application/json", {"error": str(e)}
+                except Exception as e:  # el servicio no debe caerse por una petición
+                    estado, tipo, contenido = 500, "application/json", {"error": repr(e)}
+                if tipo == "application/json":
+                    contenido = json.dumps(_json(contenido), ensure_ascii=False).encode("utf-8")
+                cerrar = cabeceras.get("connection", "").lower() == "close" or estado == 413
+                writer.write(
+                    f"HTTP/1.1 {estado} {MOTIVOS[estado]}\r\nContent-Type: {tipo}\r\n"
+                    f"Content-Length: {len(contenido)}\r\nConnection: {'close' if cerrar else 'keep-alive'}\r\n\r\n"
+                    .encode("latin-1") + contenido)
+                await writer.drain()
+                self.registrar(ruta.split("?", 1)[0], time.perf_counter() - inicio)
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def servir(self, host, puerto):
+        servidor = await asyncio.start_server(self.atender, host, puerto, backlog=1024)
+        print(f"SolarCol API en http://{host}:{puerto}", file=sys.stderr)
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP de cotización SolarCol Pro.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="procesos para renderizar PDF")
+    args = parser.parse_args(argv)
+
+    servicio = ServidorCotizaciones(args.procesos)
+    try:
+        asyncio.run(servicio.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.pool.shutdown(cancel_futures=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
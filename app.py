@@ -1,210 +1,469 @@
+from instrumentacion import ACTIVA as INSTRUMENTACION_ACTIVA, Rerun, medir, percentiles, prometheus
+
+rerun = Rerun()  # no hace nada si SOLARCOL_INSTRUMENTACION no está definida
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-import re
-import math
-from fpdf import FPDF
-import base64
-
-# Configuración de página
-st.set_page_config(page_title="SolarCol Pro", layout="wide", page_icon="☀️")
-
-# --- BASE DE DATOS HSP ---
-hsp_data = {
-    "Seleccionar": 0, "Leticia": 4.2, "Medellín": 4.2, "Arauca": 5.0, "Barranquilla": 5.5,
-    "Bogotá": 4.1, "Bucaramanga": 4.5, "Cali": 4.8, "Cartagena": 5.4, "Florencia": 3.8,
-    "Inírida": 4.5, "Mocoa": 3.5, "Neiva": 4.9, "Montería": 5.1, "Pasto": 4.2,
-    "Pereira": 4.0, "Popayán": 4.1, "Puerto Carreño": 5.8, "Quibdó": 3.2, "Riohacha": 6.1,
-    "San Andrés": 5.7, "San José del Guaviare": 4.2, "Santa Marta": 5.6, "Sincelejo": 5.0,
-    "Mitú": 4.0, "Ibagué": 4.6, "Tunja": 4.3, "Villavicencio": 4.1, "Yopal": 4.8,
-    "Valledupar": 5.6, "Manizales": 3.9, "Cúcuta": 5.2, "Puerto Inírida": 4.5
-}
-
-# --- FUNCIONES DE APOYO ---
-def es_correo_valido(email):
-    patron = r'^[\w\.-]+@[\w\.-]+\.\w+$'
-    return re.match(patron, email)
-
-def generar_pdf(datos):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(200, 10, txt="Propuesta Técnica-Económica SolarCol Pro", ln=True, align='C')
-    pdf.ln(10)
-    pdf.set_font("Arial", size=12)
-    for clave, valor in datos.items():
-        pdf.cell(200, 10, txt=f"{clave}: {valor}", ln=True)
-    return pdf.output(dest='S').encode('latin-1')
-
-if 'registro_exitoso' not in st.session_state:
-    st.session_state.registro_exitoso = False
-
-st.title("☀️ SolarCol Pro by Josejaime Padilla")
-st.markdown("---")
-
-tab1, tab2, tab3 = st.tabs(["📋 Datos del Proyecto", "🛠️ Diseño Técnico", "📊 Análisis Financiero"])
-
-with tab1:
-    st.header("👤 Información de Contacto")
-    c_nom, c_mail, c_tel = st.columns([2, 2, 1.5])
-    with c_nom:
-        nombre_cliente = st.text_input("Nombre del Cotizante", placeholder="Ej: Juan Pérez")
-    with c_mail:
-        correo_cliente = st.text_input("Correo Electrónico", placeholder="ejemplo@correo.com")
-        if correo_cliente and not es_correo_valido(correo_cliente):
-            st.caption("⚠️ Formato de correo inválido")
-    with c_tel:
-        col_prefijo, col_num = st.columns([1, 2.5])
-        with col_prefijo: st.text_input("País", value="+57", disabled=True)
-        with col_num:
-            telefono_cliente = st.text_input("Celular (10 dígitos)", placeholder="3001234567", max_chars=10)
+import numpy as np
 
-    st.divider()
-    st.header("📍 Ubicación y Consumo")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        ciudad = st.selectbox("Ubicación del Proyecto (Capital)", options=list(hsp_data.keys()))
-        hsp = hsp_data[ciudad]
-        if ciudad != "Seleccionar":
-            st.info(f"☀️ Horas Solares Pico (HSP) para **{ciudad}**: **{hsp} h/día**")
-        else:
-            st.warning("Selecciona una ciudad para ver la radiación.")
-
-    with col2:
-        consumo_mes = st.number_input("Consumo Mensual Promedio (kWh)", value=300)
-        tarifa_kwh = st.number_input("Costo del kWh factura ($ COP)", value=950)
+from baterias import ZONAS_NO_INTERCONECTADAS, dimensionar_cliente as dimensionar_bateria_cliente
+from cache_cotizaciones import cache_cotizaciones, cotizar
+from catalogo import MODULO_DEFECTO, catalogo, configuracion_strings
+from curvas_costo import version_vigente
+from escenarios import (COLUMNA_AUTOCONSUMO, COLUMNA_LEY, COLUMNA_NOMBRE, COLUMNA_PANELES, COLUMNA_TARIFA,
+                        entradas_escenario, evaluador_escenario, fila_escenario)
+from finanzas import SUPUESTOS, evaluar
+from geolocalizacion import hsp_en, municipio_cercano
+from graficos import (figura_area, figura_escenarios, figura_flujo, figura_histograma, figura_mapa_calor,
+                      figura_techo, figura_tornado, metricas_cache as metricas_graficos)
+from irradiancia import almacen
+from montecarlo import simular_cacheado as simular_riesgo
+from motor import dimensionar, hsp_data
+from optimizador import optimizar_cliente
+from pdf_propuesta import datos_propuesta, generar_pdf_cacheado, metricas_cache as metricas_pdf, texto_payback
+from registro import registro
+from sensibilidad import RANGO as RANGO_SENSIBILIDAD, malla_hsp_costo, malla_tarifa_consumo, tornado
+from simulacion import FORMAS_CARGA, simular_cliente
+from techo import RETIRO, distribuir_cacheado, leer_vertices, rectangulo
+from validacion import es_correo_valido, es_registro_valido
 
-    st.divider()
-    st.header("⚖️ Configuración Adicional")
-    c_a, c_b = st.columns(2)
-    with c_a:
-        st.write("**¿Declara Renta? (Ley 1715)**")
-        seleccion_renta = st.radio(
-            "Seleccione:",
-            ["Sí, soy declarante", "No declaro renta"],
-            index=1,
-            horizontal=True,
-            label_visibility="collapsed"
-        )
-        aplica_ley_1715 = True if seleccion_renta == "Sí, soy declarante" else False
-        if aplica_ley_1715:
-            st.caption("✨ *Incluye incentivos fiscales en el ahorro.*")
-        else:
-            st.caption("ℹ️ *Análisis basado únicamente en ahorro energético.*")
-
-    with c_b:
-        # Dejado en 95% como estándar inicial solicitado
-        autoconsumo_directo = st.slider("% Autoconsumo (Ahorro 1 a 1)", 0, 100, 95)
+rerun.marcar("importaciones")
+
+# Todo el rerun va en try/finally: st.rerun() y los errores también cierran el cronómetro
+try:
+    # Configuración de página
+    st.set_page_config(page_title="SolarCol Pro", layout="wide", page_icon="☀️")
+
+    if 'registro_exitoso' not in st.session_state:
+        st.session_state.registro_exitoso = False
+
+    st.title("☀️ SolarCol Pro by Josejaime Padilla")
+    st.markdown("---")
+
+    tab1, tab2, tab3, tab4 = st.tabs(["📋 Datos del Proyecto", "🛠️ Diseño Técnico", "📊 Análisis Financiero",
+                                      "⚖️ Comparar Escenarios"])
+
+    with tab1:
+        st.header("👤 Información de Contacto")
+        c_nom, c_mail, c_tel = st.columns([2, 2, 1.5])
+        with c_nom:
+            nombre_cliente = st.text_input("Nombre del Cotizante", placeholder="Ej: Juan Pérez")
+        with c_mail:
+            correo_cliente = st.text_input("Correo Electrónico", placeholder="ejemplo@correo.com")
+            if correo_cliente and not es_correo_valido(correo_cliente):
+                st.caption("⚠️ Formato de correo inválido")
+        with c_tel:
+            col_prefijo, col_num = st.columns([1, 2.5])
+            with col_prefijo: st.text_input("País", value="+57", disabled=True)
+            with col_num:
+                telefono_cliente = st.text_input("Celular (10 dígitos)", placeholder="3001234567", max_chars=10)
 
-    st.divider()
-    if st.button("💾 Guardar y Registrar Proyecto", use_container_width=True, type="primary"):
-        if not nombre_cliente or not es_correo_valido(correo_cliente) or len(telefono_cliente) < 10 or ciudad == "Seleccionar":
-            st.error("❌ Por favor completa todos los campos correctamente.")
-            st.session_state.registro_exitoso = False
-        else:
-            st.session_state.registro_exitoso = True
-            st.balloons()
-            st.success("✅ Registro exitoso. Resultados desbloqueados.")
-
-# --- LÓGICA DE CÁLCULO ---
-if st.session_state.registro_exitoso:
-    eficiencia = 0.80
-    kwp_teorico = (consumo_mes / 30) / (hsp * eficiencia)
-    
-    potencia_panel = 550
-    num_paneles = math.ceil((kwp_teorico * 1000) / potencia_panel)
-    kwp_instalado = (num_paneles * potencia_panel) / 1000
-    
-    # Estructura de costos protegida
-    if kwp_instalado <= 3.5:
-        inversion_total = 12000000 + (kwp_instalado * 3200000)
-    elif 3.5 < kwp_instalado <= 10:
-        inversion_total = kwp_instalado * 6400000
-    elif 10 < kwp_instalado <= 50:
-        inversion_total = kwp_instalado * 4900000
-    else:
-        inversion_total = kwp_instalado * 3900000
-
-    area_neta_paneles = num_paneles * 2.6
-    area_mantenimiento = area_neta_paneles * 0.15
-    area_total_estimada = area_neta_paneles + area_mantenimiento
-    
-    peso_nominal = num_paneles * 28
-    peso_diseno_seguridad = peso_nominal * 1.2
-    carga_distribuida = peso_diseno_seguridad / area_neta_paneles
-    
-    # Finanzas (Considerando esquema de medición neta casi 1 a 1)
-    gen_anual = kwp_instalado * hsp * eficiencia * 365
-    
-    # El slider ahora actúa como un factor de ajuste de eficiencia económica
-    # 95-100% es ahorro pleno. Valores menores castigan el excedente.
-    factor_remuneracion_excedente = 0.75 # Ajustado un poco más alto para Colombia
-    ahorro_energia_anual = (gen_anual * (autoconsumo_directo/100) * tarifa_kwh) + \
-                           (gen_anual * (1 - autoconsumo_directo/100) * tarifa_kwh * factor_remuneracion_excedente)
-    
-    beneficio_anual_renta = (inversion_total * 0.5 * 0.35) / 5 if aplica_ley_1715 else 0
-    ahorro_total_anual = ahorro_energia_anual + beneficio_anual_renta
-    payback = inversion_total / ahorro_total_anual
-
-    co2_evitado_anual = gen_anual * 0.126 
-    arboles_equivalentes = co2_evitado_anual / 20
-
-    with tab2:
-        st.header(f"🛠️ Propuesta Técnica para {nombre_cliente}")
-        t1, t2, t3 = st.columns(3)
-        t1.metric("Capacidad Instalada", f"{kwp_instalado:.2f} kWp")
-        t2.metric("Paneles Necesarios", f"{num_paneles} Und", f"{potencia_panel}Wp")
-        t3.metric("Espacio Requerido", f"{area_total_estimada:.1f} m²")
-        
-        st.divider()
-        st.subheader("📐 Distribución de Espacio Sugerida")
-        df_espacio = pd.DataFrame({
-            "Categoría": ["Paneles (Generación)", "Pasillos (Mantenimiento)"],
-            "Padre": ["Área Total", "Área Total"],
-            "Metros": [area_neta_paneles, area_mantenimiento]
-        })
-        fig_area = px.treemap(
-            df_espacio, path=["Padre", "Categoría"], values="Metros",
-            color="Categoría", color_discrete_map={"Paneles (Generación)": "#1f77b4", "Pasillos (Mantenimiento)": "#a6cee3"}
-        )
-        fig_area.update_traces(textinfo="label+value", texttemplate="%{label}<br>%{value:.1f} m²")
-        fig_area.update_layout(margin=dict(t=0, l=0, r=0, b=0), height=300)
-        st.plotly_chart(fig_area, use_container_width=True)
-
-    with tab3:
-        st.header(f"💰 Rentabilidad Económica: {nombre_cliente}")
-        f1, f2, f3 = st.columns(3)
-        f1.metric("Inversión Total", f"${inversion_total:,.0f} COP")
-        f2.metric("Ahorro Anual Estimado", f"${ahorro_total_anual:,.0f} COP")
-        f3.metric("Payback (Retorno)", f"{payback:.1f} Años")
-        
         st.divider()
-        st.subheader("📈 Flujo de Caja Acumulado (10 años)")
-        años = list(range(0, 11))
-        flujo = [-inversion_total]
-        for a in años[1:]: flujo.append(flujo[-1] + ahorro_total_anual)
-        fig_p = go.Figure(data=[go.Bar(x=años, y=flujo, marker_color=['#E74C3C' if v < 0 else '#2ECC71' for v in flujo])])
-        st.plotly_chart(fig_p, use_container_width=True)
-        
+        st.header("📍 Ubicación y Consumo")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            modo_ubicacion = st.radio("Ubicar por", ["Ciudad capital", "Coordenadas"], horizontal=True)
+            if modo_ubicacion == "Ciudad capital":
+                ciudad = st.selectbox("Ubicación del Proyecto (Capital)", options=list(hsp_data.keys()))
+                hsp = hsp_data[ciudad]
+                municipio_irradiancia = ciudad
+                if ciudad != "Seleccionar":
+                    st.info(f"☀️ Horas Solares Pico (HSP) para **{ciudad}**: **{hsp} h/día**")
+                else:
+                    st.warning("Selecciona una ciudad para ver la radiación.")
+            else:
+                c_lat, c_lon = st.columns(2)
+                latitud = c_lat.number_input("Latitud", value=4.7110, format="%.4f")
+                longitud = c_lon.number_input("Longitud", value=-74.0720, format="%.4f")
+                municipio_irradiancia = municipio_cercano(latitud, longitud)
+                if municipio_irradiancia is not None:
+                    hsp = hsp_en(latitud, longitud).item()
+                    ciudad = f"{latitud:.4f}, {longitud:.4f} (cerca de {municipio_irradiancia})"
+                    st.info(f"☀️ HSP interpolada en el punto: **{hsp:.2f} h/día** · Referencia: {municipio_irradiancia}")
+                else:
+                    hsp, ciudad = 0, "Seleccionar"
+                    st.warning("Las coordenadas están fuera de Colombia.")
+
+        with col2:
+            consumo_mes = st.number_input("Consumo Mensual Promedio (kWh)", value=300)
+            tarifa_kwh = st.number_input("Costo del kWh factura ($ COP)", value=950)
+
         st.divider()
-        st.subheader("🌿 Impacto Ambiental")
-        ia1, ia2, ia3 = st.columns(3)
-        ia1.metric("CO2 Evitado", f"{co2_evitado_anual:,.1f} kg/año")
-        ia2.metric("Árboles equiv.", f"{arboles_equivalentes:.0f} Und")
-        ia3.metric("Generación Anual", f"{gen_anual:,.0f} kWh")
+        st.header("⚖️ Configuración Adicional")
+        c_a, c_b, c_c = st.columns(3)
+        with c_a:
+            st.write("**¿Declara Renta? (Ley 1715)**")
+            seleccion_renta = st.radio(
+                "Seleccione:",
+                ["Sí, soy declarante", "No declaro renta"],
+                index=1,
+                horizontal=True,
+                label_visibility="collapsed"
+            )
+            aplica_ley_1715 = True if seleccion_renta == "Sí, soy declarante" else False
+            if aplica_ley_1715:
+                st.caption("✨ *Incluye incentivos fiscales en el ahorro.*")
+            else:
+                st.caption("ℹ️ *Análisis basado únicamente en ahorro energético.*")
+
+        with c_b:
+            # El % de autoconsumo sale de la simulación horaria del perfil elegido
+            perfil_consumo = st.selectbox("Perfil de Consumo", options=list(FORMAS_CARGA) + ["Manual"])
+            if perfil_consumo == "Manual":
+                autoconsumo_directo = st.slider("% Autoconsumo (Ahorro 1 a 1)", 0, 100, 95)
+            else:
+                st.caption("⏱️ *El autoconsumo se calcula hora a hora (8760 h) con la radiación de la ciudad.*")
+
+        with c_c:
+            skus_modulos = list(catalogo().modulos.sku)
+            sku_modulo = st.selectbox("Módulo Fotovoltaico", options=skus_modulos,
+                                      index=skus_modulos.index(MODULO_DEFECTO),
+                                      format_func=lambda sku: catalogo().modulo(sku)["descripcion"])
+            modulo = catalogo().modulo(sku_modulo)
 
         st.divider()
-        pdf_bytes = generar_pdf({
-            "Cliente": nombre_cliente,
-            "Ciudad": ciudad,
-            "Capacidad": f"{kwp_instalado:.2f} kWp",
-            "Inversión": f"${inversion_total:,.0f} COP",
-            "Payback": f"{payback:.1f} años"
-        })
-        st.download_button(label="📄 Descargar Propuesta en PDF", data=pdf_bytes, file_name=f"Propuesta_{nombre_cliente}.pdf", mime="application/pdf", use_container_width=True)
-
-else:
-    with tab2: st.warning("🔒 Registra los datos del proyecto para ver el diseño técnico.")
-    with tab3: st.warning("🔒 Registra los datos del proyecto para ver el análisis financiero.")
+        if st.button("💾 Guardar y Registrar Proyecto", use_container_width=True, type="primary"):
+            if not es_registro_valido(nombre_cliente, correo_cliente, telefono_cliente, ciudad):
+                st.error("❌ Por favor completa todos los campos correctamente.")
+                st.session_state.registro_exitoso = False
+            else:
+                st.session_state.registro_exitoso = True
+                st.session_state.guardar_proyecto = True
+                st.balloons()
+                st.success("✅ Registro exitoso. Resultados desbloqueados.")
+    rerun.marcar("formulario")
+
+    # --- LÓGICA DE CÁLCULO ---
+    if st.session_state.registro_exitoso:
+        equipo = {"potencia_panel": modulo["potencia_w"], "area_panel": modulo["area_m2"], "peso_panel": modulo["peso_kg"]}
+        if perfil_consumo != "Manual":
+            kwp_dimensionado = dimensionar(hsp, consumo_mes, **equipo)["kwp_instalado"].item()
+            simulacion = simular_cliente(municipio_irradiancia, kwp_dimensionado, consumo_mes, perfil_consumo, hsp=hsp)
+            autoconsumo_directo = simulacion["porcentaje_autoconsumo"]
+        propuesta = cotizar(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, hsp=hsp, **equipo)
+        potencia_panel = modulo["potencia_w"]
+        num_paneles = propuesta["num_paneles"]
+        kwp_instalado = propuesta["kwp_instalado"]
+        inversion_total = propuesta["inversion_total"]
+        area_total_estimada = propuesta["area_total_estimada"]
+        gen_anual = propuesta["gen_anual"]
+        ahorro_total_anual = propuesta["ahorro_total_anual"]
+        co2_evitado_anual = propuesta["co2_evitado_anual"]
+        arboles_equivalentes = propuesta["arboles_equivalentes"]
+
+        # El registro se encola y lo escribe un hilo aparte; no frena el rerun
+        if st.session_state.pop("guardar_proyecto", False):
+            registro().guardar({
+                "nombre": nombre_cliente, "correo": correo_cliente, "telefono": telefono_cliente, "ciudad": ciudad,
+                "hsp": hsp, "consumo_mes": consumo_mes, "tarifa_kwh": tarifa_kwh,
+                "autoconsumo_directo": autoconsumo_directo, "aplica_ley_1715": aplica_ley_1715, "modulo": sku_modulo,
+                **{c: propuesta[c] for c in ("num_paneles", "kwp_instalado", "inversion_total", "gen_anual",
+                                             "ahorro_total_anual", "payback")},
+                "version_costos": version_vigente(),
+            })
+        rerun.marcar("calculo")
+
+        with tab2:
+            st.header(f"🛠️ Propuesta Técnica para {nombre_cliente}")
+            t1, t2, t3 = st.columns(3)
+            t1.metric("Capacidad Instalada", f"{kwp_instalado:.2f} kWp")
+            t2.metric("Paneles Necesarios", f"{num_paneles} Und", f"{potencia_panel:.0f}Wp")
+            t3.metric("Espacio Requerido", f"{area_total_estimada:.1f} m²")
+
+            st.divider()
+            st.subheader("📐 Distribución de Espacio Sugerida")
+            fig_area = medir("figuras", figura_area, num_paneles, modulo["area_m2"])
+            st.plotly_chart(fig_area, use_container_width=True)
+
+            with st.expander("🏠 Distribución en el Techo Real"):
+                st.caption("Dibuja la planta del techo (metros; x hacia el este, y hacia el norte) y sus obstáculos. "
+                           "Los módulos se acomodan en filas con el espacio entre filas que evita sombras.")
+                g1, g2 = st.columns(2)
+                texto_techo = g1.text_area("Vértices del techo (x, y por línea)", "0, 0\n12, 0\n12, 8\n0, 8", height=150)
+                obstaculos_techo = g2.data_editor(
+                    {"x": [5.0], "y": [3.0], "Ancho (m)": [1.2], "Largo (m)": [1.2]}, num_rows="dynamic",
+                    key="obstaculos_techo", use_container_width=True)
+                g3, g4, g5, g6 = st.columns(4)
+                inclinacion_techo = g3.slider("Inclinación (°)", 0, 30, 10)
+                orientacion_techo = g4.radio("Orientación", ["auto", "vertical", "horizontal"], horizontal=True)
+                azimut_techo = g5.slider("Giro de las filas (°)", -90, 90, 0, 5)
+                retiro_techo = g6.number_input("Retiro al borde (m)", 0.0, 3.0, RETIRO, 0.1)
+                try:
+                    poligono_techo = leer_vertices(texto_techo)
+                except ValueError as e:
+                    st.warning(f"⚠️ {e}")
+                else:
+                    obstaculos = tuple(
+                        rectangulo(*(float(v) for v in fila))
+                        for fila in zip(*(obstaculos_techo[c] for c in ("x", "y", "Ancho (m)", "Largo (m)")))
+                        if all(v is not None and v == v for v in fila)
+                    )
+                    latitud_techo = latitud if modo_ubicacion == "Coordenadas" else \
+                        float(almacen().coordenadas[almacen().fila(municipio_irradiancia)][0])
+                    techo = medir("techo", distribuir_cacheado, poligono_techo, obstaculos, modulo["area_m2"],
+                                  orientacion_techo, inclinacion_techo, round(latitud_techo, 2), azimut_techo,
+                                  retiro_techo)
+                    d1, d2, d3 = st.columns(3)
+                    d1.metric("Módulos que Caben", f"{techo['num_paneles']} Und",
+                              f"{techo['num_paneles'] - num_paneles:+d} vs diseño", delta_color="off")
+                    d2.metric("Capacidad Máxima", f"{techo['num_paneles'] * potencia_panel / 1000:.2f} kWp",
+                              f"{techo['orientacion']}, {techo['filas']} filas", delta_color="off")
+                    d3.metric("Paso entre Filas", f"{techo['paso_filas']:.2f} m",
+                              f"{techo['ocupacion']:.0%} del techo con módulos", delta_color="off")
+                    if techo["num_paneles"] < num_paneles:
+                        st.warning(f"⚠️ En este techo caben {techo['num_paneles']} de los {num_paneles} módulos del "
+                                   "diseño.")
+                    st.plotly_chart(medir("figuras", figura_techo, poligono_techo, obstaculos,
+                                          tuple(techo["esquinas"].ravel().tolist())), use_container_width=True)
+
+            st.divider()
+            st.subheader("⚡ Inversor y Configuración de Strings")
+            inversor, cantidad_inversores, relacion_dc_ac = catalogo().seleccionar_inversores(kwp_instalado)
+            strings = configuracion_strings(modulo, inversor, num_paneles, cantidad_inversores)
+            i1, i2, i3 = st.columns(3)
+            i1.metric("Inversor Sugerido", f"{cantidad_inversores} × {inversor['sku']}", inversor["descripcion"],
+                      delta_color="off")
+            i2.metric("Relación DC/AC", f"{relacion_dc_ac:.2f}")
+            i3.metric("Strings por Inversor", f"{strings['strings_por_inversor']} × {strings['modulos_por_string']} módulos",
+                      f"{strings['tension_string_frio']:.0f} V Voc en frío", delta_color="off")
+            if not strings["valida"]:
+                st.warning(f"⚠️ {strings['mensaje']} Revise la selección de equipos.")
+
+            st.divider()
+            zona_no_interconectada = municipio_irradiancia in ZONAS_NO_INTERCONECTADAS
+            with st.expander("🔋 Almacenamiento con Baterías (Sistema Híbrido)", expanded=zona_no_interconectada):
+                if zona_no_interconectada:
+                    st.info(f"📡 {municipio_irradiancia} es Zona No Interconectada: se recomienda un sistema híbrido.")
+                if st.toggle("Dimensionar banco de baterías", value=zona_no_interconectada):
+                    bat1, bat2 = st.columns(2)
+                    objetivo_autosuficiencia = bat1.slider("Autosuficiencia objetivo (%)", 50, 100, 90)
+                    factor_fv = bat2.slider("Sobredimensionamiento FV", 1.0, 2.0, 1.3, 0.1)
+                    bateria = dimensionar_bateria_cliente(
+                        municipio_irradiancia, round(kwp_instalado * factor_fv, 3), consumo_mes,
+                        perfil_consumo if perfil_consumo != "Manual" else "Residencial", hsp, objetivo_autosuficiencia)
+                    if bateria is None:
+                        st.warning("⚠️ Ningún banco del catálogo alcanza el objetivo; aumente el sobredimensionamiento FV.")
+                    else:
+                        m1, m2, m3, m4 = st.columns(4)
+                        m1.metric("Banco Sugerido", f"{bateria['unidades']} × {bateria['sku']}")
+                        m2.metric("Capacidad Útil", f"{bateria['capacidad_util_kwh']:.1f} kWh")
+                        m3.metric("Costo Baterías", f"${bateria['precio_cop']:,.0f} COP")
+                        m4.metric("Autosuficiencia", f"{bateria['autosuficiencia']:.1f} %",
+                                  f"{bateria['horas_sin_servicio']:.0f} h/año sin cubrir", delta_color="off")
+
+            st.divider()
+            st.subheader("🔎 Tamaño Óptimo del Sistema")
+            st.caption("Se evalúan todos los módulos del catálogo y todos los tamaños hasta el doble del diseño base, "
+                       "con autoconsumo y excedentes de cada uno.")
+            potencias_modulos = tuple(np.unique(catalogo().modulos.potencia))
+            if perfil_consumo != "Manual":
+                optimos = optimizar_cliente(municipio_irradiancia, hsp, consumo_mes, tarifa_kwh, aplica_ley_1715,
+                                            perfil_consumo, autoconsumo_directo, potencias_modulos)
+            else:
+                optimos = optimizar_cliente(None, hsp, consumo_mes, tarifa_kwh, aplica_ley_1715, "Residencial",
+                                            autoconsumo_directo, potencias_modulos)
+            etiquetas = {"vpn": "Máximo VPN", "payback": "Menor Payback", "lcoe": "Menor LCOE"}
+            st.dataframe([
+                {
+                    "Criterio": etiquetas[criterio],
+                    "Paneles": f"{diseno['num_paneles']} × {diseno['potencia_panel']:.0f} Wp",
+                    "Capacidad (kWp)": round(diseno["kwp_instalado"], 2),
+                    "Inversión (COP)": f"${diseno['inversion_total']:,.0f}",
+                    "Autoconsumo": f"{diseno['autoconsumo']:.0f} %",
+                    "VPN (COP)": f"${diseno['vpn']:,.0f}",
+                    "Payback (años)": texto_payback(diseno["payback"], None),
+                    "LCOE (COP/kWh)": round(diseno["lcoe"]),
+                }
+                if diseno is not None
+                else {"Criterio": etiquetas[criterio], "Paneles": "ningún tamaño recupera la inversión"}
+                for criterio, diseno in optimos.items()
+            ], hide_index=True, use_container_width=True)
+        rerun.marcar("diseno_tecnico")
+
+        with tab3:
+            st.header(f"💰 Rentabilidad Económica: {nombre_cliente}")
+            indicadores = evaluar(inversion_total, gen_anual, tarifa_kwh, autoconsumo_directo,
+                                  propuesta["beneficio_anual_renta"])
+            f1, f2, f3 = st.columns(3)
+            f1.metric("Inversión Total", f"${inversion_total:,.0f} COP", f"Curva de costos {version_vigente()}",
+                      delta_color="off")
+            f2.metric("Ahorro Anual Estimado", f"${ahorro_total_anual:,.0f} COP")
+            # El mismo payback del flujo de caja de abajo, no el simple inversión / ahorro del primer año
+            f3.metric("Payback (Retorno)", texto_payback(indicadores["payback"], "Años"))
+            if perfil_consumo != "Manual":
+                b1, b2, b3 = st.columns(3)
+                b1.metric("Autoconsumo Simulado", f"{autoconsumo_directo:.0f} %")
+                b2.metric("Excedentes a la Red", f"{simulacion['exportado_kwh']:,.0f} kWh/año")
+                b3.metric("Energía Comprada a la Red", f"{simulacion['importado_kwh']:,.0f} kWh/año")
+
+            st.divider()
+            st.subheader(f"📈 Flujo de Caja Acumulado ({SUPUESTOS['años']} años)")
+            v1, v2, v3, v4 = st.columns(4)
+            v1.metric("VPN", f"${indicadores['vpn']:,.0f} COP", f"Tasa {SUPUESTOS['tasa_descuento']:.0%}")
+            v2.metric("TIR", f"{indicadores['tir']:.1%}" if np.isfinite(indicadores["tir"]) else "—")
+            v3.metric("LCOE", f"${indicadores['lcoe']:,.0f} /kWh")
+            v4.metric("Payback Descontado", texto_payback(indicadores["payback_descontado"], "Años"))
+            st.caption(f"Supuestos: degradación {SUPUESTOS['degradacion']:.1%}/año, alza de tarifa "
+                       f"{SUPUESTOS['incremento_tarifa']:.0%}/año, O&M {SUPUESTOS['om_anual']:.0%} de la inversión "
+                       f"y cambio de inversor en el año {SUPUESTOS['año_reemplazo_inversor']}.")
+            fig_p = medir("figuras", figura_flujo, tuple(indicadores["acumulado"].tolist()),
+                          tuple(indicadores["acumulado_descontado"].tolist()))
+            st.plotly_chart(fig_p, use_container_width=True)
+
+            with st.expander("🗺️ Sensibilidad (Mapas de Calor)"):
+                st.caption("Payback y VPN en una malla de 200 × 200 combinaciones alrededor del proyecto (la X). "
+                           "La malla se calcula una vez; cambiar la ventana o el indicador no la recalcula.")
+                if st.toggle("Mostrar mapas de sensibilidad"):
+                    s1, s2, s3 = st.columns(3)
+                    ejes = s1.radio("Variables", ["Tarifa × Consumo", "HSP × Costo por kWp"], horizontal=True)
+                    indicador = s2.radio("Indicador", ["Payback", "VPN"], horizontal=True)
+                    ventana = s3.slider("Ventana (± %)", 5, round(RANGO_SENSIBILIDAD * 100),
+                                        round(RANGO_SENSIBILIDAD * 100), 5) / 100
+                    if ejes == "Tarifa × Consumo":
+                        malla = medir("sensibilidad", malla_tarifa_consumo, hsp, tarifa_kwh, consumo_mes,
+                                      autoconsumo_directo, aplica_ley_1715, equipo["potencia_panel"])
+                        punto, titulos = (tarifa_kwh, consumo_mes), ("Tarifa (COP/kWh)", "Consumo (kWh/mes)")
+                    else:
+                        costo_kwp = inversion_total / kwp_instalado
+                        malla = medir("sensibilidad", malla_hsp_costo, kwp_instalado, hsp, costo_kwp, tarifa_kwh,
+                                      autoconsumo_directo, aplica_ley_1715)
+                        punto, titulos = (costo_kwp, hsp), ("Costo (COP/kWp)", "HSP (h/día)")
+                    z, titulo_z, escala = ((malla["payback"], "Payback (años)", "RdYlGn_r") if indicador == "Payback"
+                                           else (malla["vpn"], "VPN (COP)", "RdYlGn"))
+                    st.plotly_chart(medir("figuras", figura_mapa_calor, malla["x"], malla["y"], z, *titulos, titulo_z,
+                                          punto, (punto[0] * (1 - ventana), punto[0] * (1 + ventana)),
+                                          (punto[1] * (1 - ventana), punto[1] * (1 + ventana)), escala),
+                                    use_container_width=True)
+                    if indicador == "Payback":
+                        st.caption(f"{SUPUESTOS['años']} años = no se recupera la inversión en el horizonte.")
+
+            with st.expander("🌪️ Parámetros que más Pesan (Tornado)"):
+                st.caption("Cada constante del modelo que influye en los indicadores se mueve hacia abajo y hacia "
+                           "arriba (los años de la Ley 1715, en años enteros); todas las variaciones se evalúan en "
+                           "una sola llamada.")
+                tor1, tor2 = st.columns(2)
+                variacion = tor1.slider("Variación de cada parámetro (± %)", 5, 50, 10, 5) / 100
+                indicadores_tornado = {
+                    "Payback (años)": "payback", "VPN (COP)": "vpn", "CO2 evitado (kg/año)": "co2_evitado_anual",
+                }
+                titulo_tornado = tor2.radio("Indicador", list(indicadores_tornado), horizontal=True)
+                sensibilidades = medir("sensibilidad", tornado, hsp, consumo_mes, tarifa_kwh, autoconsumo_directo,
+                                       aplica_ley_1715, variacion, equipo["potencia_panel"])
+                impacto = sensibilidades[indicadores_tornado[titulo_tornado]]
+                st.plotly_chart(medir("figuras", figura_tornado, sensibilidades["parametros"], impacto["base"],
+                                      impacto["bajo"], impacto["alto"], titulo_tornado), use_container_width=True)
+
+            with st.expander("🎲 Análisis de Riesgo (Monte Carlo)"):
+                st.caption("Varía HSP, alza de tarifa, autoconsumo y costo de inversión en 100.000 escenarios.")
+                if st.toggle("Ejecutar análisis de riesgo"):
+                    riesgo = simular_riesgo(kwp_instalado, hsp, inversion_total, tarifa_kwh,
+                                            autoconsumo_directo, aplica_ley_1715)
+                    r1, r2, r3 = st.columns(3)
+                    # Las muestras que no recuperan son payback infinito: el percentil se muestra como "> 25"
+                    r1.metric("Payback P10 / P50 / P90",
+                              " / ".join(texto_payback(riesgo[f"payback_p{p}"], None) for p in (10, 50, 90)) + " años")
+                    r2.metric("VPN P50", f"${riesgo['vpn_p50']:,.0f} COP",
+                              f"P10 ${riesgo['vpn_p10']:,.0f}", delta_color="off")
+                    r3.metric("Sin recuperar la inversión", f"{riesgo['prob_sin_recuperar']:.1%}")
+                    h1, h2 = st.columns(2)
+                    if riesgo["histograma_payback"] is not None:
+                        conteos, bordes = riesgo["histograma_payback"]
+                        h1.plotly_chart(medir("figuras", figura_histograma, tuple(bordes.tolist()),
+                                              tuple(conteos.tolist()), "Payback (años)"), use_container_width=True)
+                    conteos, bordes = riesgo["histograma_vpn"]
+                    h2.plotly_chart(medir("figuras", figura_histograma, tuple(bordes.tolist()),
+                                          tuple(conteos.tolist()), "VPN (COP)", "#2ECC71"), use_container_width=True)
+
+            st.divider()
+            st.subheader("🌿 Impacto Ambiental")
+            ia1, ia2, ia3 = st.columns(3)
+            ia1.metric("CO2 Evitado", f"{co2_evitado_anual:,.1f} kg/año")
+            ia2.metric("Árboles equiv.", f"{arboles_equivalentes:.0f} Und")
+            ia3.metric("Generación Anual", f"{gen_anual:,.0f} kWh")
+
+            st.divider()
+            # El PDF se genera solo al pulsar la descarga y se reutiliza entre reruns y sesiones.
+            datos_pdf = datos_propuesta(nombre_cliente, ciudad, kwp_instalado, inversion_total,
+                                        indicadores["payback"])
+            st.download_button(label="📄 Descargar Propuesta en PDF", data=lambda: medir("pdf", generar_pdf_cacheado, datos_pdf), file_name=f"Propuesta_{nombre_cliente}.pdf", mime="application/pdf", use_container_width=True)
+        rerun.marcar("analisis_financiero")
+
+        with tab4:
+            st.header("⚖️ Comparación de Escenarios")
+            st.caption("Fija el escenario actual y edita las variantes en la tabla (tarifa, autoconsumo, Ley 1715, "
+                       "paneles; vacío = valor del formulario, o dimensionado por consumo en paneles). "
+                       "Solo se recalcula lo que depende de lo que cambió.")
+            if "escenarios" not in st.session_state:
+                # "Actual" va con celdas vacías para seguir al formulario en cada rerun
+                st.session_state.escenarios = [fila_escenario("Actual")]
+                st.session_state.evaluadores = []
+            filas = st.data_editor(st.session_state.escenarios, num_rows="dynamic", key="editor_escenarios",
+                                   use_container_width=True, column_config={
+                                       COLUMNA_NOMBRE: st.column_config.TextColumn(COLUMNA_NOMBRE),
+                                       COLUMNA_TARIFA: st.column_config.NumberColumn(COLUMNA_TARIFA, min_value=1),
+                                       COLUMNA_AUTOCONSUMO: st.column_config.NumberColumn(COLUMNA_AUTOCONSUMO,
+                                                                                          min_value=0, max_value=100),
+                                       COLUMNA_LEY: st.column_config.CheckboxColumn(COLUMNA_LEY),
+                                       COLUMNA_PANELES: st.column_config.NumberColumn(COLUMNA_PANELES, min_value=1,
+                                                                                      step=1),
+                                   })
+            if st.button("📌 Fijar escenario actual"):
+                st.session_state.escenarios = list(filas) + [fila_escenario(
+                    f"Escenario {len(filas) + 1}", tarifa_kwh, autoconsumo_directo, aplica_ley_1715, num_paneles)]
+                st.session_state.pop("editor_escenarios", None)
+                st.rerun()
+
+            # Un evaluador por fila; cada uno guarda sus resultados entre reruns
+            evaluadores = st.session_state.evaluadores
+            del evaluadores[len(filas):]
+            comparacion, recalculados = [], []
+            for i, fila in enumerate(filas):
+                if i == len(evaluadores):
+                    evaluadores.append(evaluador_escenario())
+                nombre = fila.get(COLUMNA_NOMBRE) or f"Escenario {i + 1}"
+                valores = evaluadores[i].actualizar(
+                    ciudad=ciudad, hsp=hsp, consumo_mes=consumo_mes, equipo=tuple(equipo.items()),
+                    **entradas_escenario(fila, tarifa_kwh, autoconsumo_directo, aplica_ley_1715))
+                if evaluadores[i].recalculados:
+                    recalculados.append(f"{nombre} ({', '.join(evaluadores[i].recalculados)})")
+                comparacion.append((nombre, valores["propuesta"], valores["indicadores"]))
+
+            if comparacion:
+                st.dataframe([
+                    {
+                        "Escenario": nombre,
+                        "Paneles": p["num_paneles"],
+                        "Capacidad (kWp)": round(p["kwp_instalado"], 2),
+                        "Inversión (COP)": f"${p['inversion_total']:,.0f}",
+                        "Ahorro Anual (COP)": f"${p['ahorro_total_anual']:,.0f}",
+                        "Payback (años)": texto_payback(ind["payback"], None),
+                        "VPN (COP)": f"${ind['vpn']:,.0f}",
+                        "TIR": f"{ind['tir']:.1%}" if np.isfinite(ind["tir"]) else "—",
+                        "LCOE (COP/kWh)": round(ind["lcoe"]),
+                    }
+                    for nombre, p, ind in comparacion
+                ], hide_index=True, use_container_width=True)
+                st.plotly_chart(medir("figuras", figura_escenarios, tuple(n for n, _, _ in comparacion),
+                                      tuple(tuple(ind["acumulado"].tolist()) for _, _, ind in comparacion)),
+                                use_container_width=True)
+            st.caption("🔁 Recalculado en este rerun: " + ("; ".join(recalculados) or "nada, todo vino del rerun anterior"))
+        rerun.marcar("escenarios")
+
+    else:
+        with tab2: st.warning("🔒 Registra los datos del proyecto para ver el diseño técnico.")
+        with tab3: st.warning("🔒 Registra los datos del proyecto para ver el análisis financiero.")
+        with tab4: st.warning("🔒 Registra los datos del proyecto para comparar escenarios.")
+finally:
+    rerun.terminar()
+
+# --- PANEL DE ADMINISTRACIÓN (oculto: ?admin=1 con SOLARCOL_INSTRUMENTACION activa) ---
+if INSTRUMENTACION_ACTIVA and st.query_params.get("admin") == "1":
+    st.divider()
+    st.header("⏱️ Tiempos por Fase (todas las sesiones)")
+    st.dataframe([{"Fase": fase, **{k: round(v, 2) for k, v in datos.items()}}
+                  for fase, datos in percentiles().items()], hide_index=True, use_container_width=True)
+    st.subheader("Cachés")
+    caches = {"cotizaciones": cache_cotizaciones().metricas(), "pdf": metricas_pdf(), **metricas_graficos()}
+    st.dataframe([{"Caché": nombre, **metricas} for nombre, metricas in caches.items()],
+                 hide_index=True, use_container_width=True)
+    st.code(prometheus(), language="text")
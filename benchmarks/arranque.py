@@ -0,0 +1,120 @@
+"""Presupuesto de arranque en frío de la app.
+
+En procesos nuevos (como un contenedor recién levantado) mide:
+
+- el tiempo de importar los módulos propios que usa ``app.py`` (después de
+  Streamlit, que no depende de nosotros), tomado de sus ``import`` con ``ast``;
+- el primer render de la página sin registro con el arnés de Streamlit, y qué
+  dependencias pesadas quedaron cargadas.
+
+Sale con código 1 si la mediana supera ``--presupuesto-ms`` o si pandas,
+plotly.express o fpdf se importan antes de que haya resultados que mostrar.
+``benchmarks/correr.py`` la ejecuta al final de cada corrida completa y
+también sale con código 1 si falla.
+
+Uso:
+    python benchmarks/arranque.py
+    python benchmarks/arranque.py --presupuesto-ms 200 --repeticiones 7
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, "app.py")
+PRESUPUESTO_MS = 150
+PESADOS = ("pandas", "plotly.express", "fpdf", "pyarrow")
+
+_MEDIR_IMPORTACION = """
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+import streamlit
+inicio = time.perf_counter()
+for modulo in {modulos!r}:
+    __import__(modulo)
+print(json.dumps({{"ms": (time.perf_counter() - inicio) * 1000,
+                   "pesados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+_MEDIR_RENDER = """
+import json, os, sys, tempfile, time
+os.environ.setdefault("SOLARCOL_REGISTRO", os.path.join(tempfile.mkdtemp(), "proyectos.db"))
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=120)
+inicio = time.perf_counter()
+app.run()
+print(json.dumps({{"ms": (time.perf_counter() - inicio) * 1000, "errores": len(app.exception),
+                   "pesados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+
+def modulos_de_app():
+    """Módulos propios (archivos .py de la raíz) importados por ``app.py``."""
+    with open(APP, encoding="utf-8") as archivo:
+        arbol = ast.parse(archivo.read())
+    modulos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            nombres = [a.name for a in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+            nombres = [nodo.module]
+        else:
+            continue
+        modulos += [n for n in nombres if os.path.exists(os.path.join(RAIZ, f"{n}.py")) and n not in modulos]
+    return modulos
+
+
+def _correr(codigo):
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True)
+    if salida.returncode != 0:
+        raise RuntimeError(salida.stderr.strip().splitlines()[-1] if salida.stderr else "el proceso falló")
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def verificar(presupuesto_ms=PRESUPUESTO_MS, repeticiones=5):
+    """(informe, fallas): las mediciones y la lista de incumplimientos del presupuesto (vacía si pasa)."""
+    modulos = modulos_de_app()
+    importaciones = [_correr(_MEDIR_IMPORTACION.format(raiz=RAIZ, modulos=modulos, pesados=PESADOS))
+                     for _ in range(repeticiones)]
+    render = _correr(_MEDIR_RENDER.format(app=APP, pesados=PESADOS))
+
+    mediana = statistics.median(m["ms"] for m in importaciones)
+    pesados = sorted(set(importaciones[0]["pesados"]) | set(render["pesados"]))
+    informe = {
+        "modulos": modulos,
+        "importacion_ms": {"mediana": round(mediana, 1), "muestras": [round(m["ms"], 1) for m in importaciones]},
+        "primer_render_ms": round(render["ms"], 1),
+        "presupuesto_ms": presupuesto_ms,
+        "pesados_al_arrancar": pesados,
+    }
+
+    fallas = []
+    if mediana > presupuesto_ms:
+        fallas.append(f"la importación tarda {mediana:.0f} ms (presupuesto {presupuesto_ms:.0f} ms)")
+    if pesados:
+        fallas.append(f"se importan al arrancar: {', '.join(pesados)}")
+    if render["errores"]:
+        fallas.append("app.py lanzó excepciones en el primer render")
+    return informe, fallas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica el presupuesto de arranque en frío de la app.")
+    parser.add_argument("--presupuesto-ms", type=float, default=PRESUPUESTO_MS,
+                        help=f"mediana máxima de importación de los módulos de la app (por defecto {PRESUPUESTO_MS})")
+    parser.add_argument("--repeticiones", type=int, default=5, help="procesos nuevos a medir")
+    args = parser.parse_args(argv)
+
+    informe, fallas = verificar(args.presupuesto_ms, args.repeticiones)
+    print(json.dumps(informe, indent=2, ensure_ascii=False))
+    for falla in fallas:
+        print(f"FALLA: {falla}", file=sys.stderr)
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
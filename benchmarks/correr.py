@@ -0,0 +1,234 @@
+"""Benchmarks de SolarCol Pro con resultados en JSON.
+
+Mide la cotización de un cliente, el lote vectorizado (1k, 100k y 1M filas),
+la agregación de un portafolio de 1M sitios, una malla de sensibilidad de
+200 × 200, el tornado de parámetros, la distribución de módulos en un techo
+grande, la construcción de figuras, el renderizado del PDF y un rerun completo
+de ``app.py`` con el arnés de pruebas de Streamlit. Cada caso se repite hasta
+juntar ``--repeticiones`` muestras o ``--segundos`` de tiempo, lo que ocurra
+primero (con al menos 3 muestras), y reporta media, p50, p99 y mínimo en
+milisegundos; los casos por lote agregan filas por segundo con el p50.
+
+Al final verifica el presupuesto de arranque en frío (``arranque.py``): el
+informe va en el JSON y la corrida sale con código 1 si se incumple.
+
+Uso:
+    python benchmarks/correr.py                          # todos, JSON a stdout
+    python benchmarks/correr.py -o resultados.json
+    python benchmarks/correr.py --casos lote_1k,lote_100k --sin-arranque
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# El rerun de la app registra un proyecto; que no toque la base real
+os.environ.setdefault("SOLARCOL_REGISTRO", os.path.join(tempfile.mkdtemp(prefix="solarcol_bench_"), "proyectos.db"))
+
+import numpy as np  # noqa: E402
+
+from arranque import verificar as verificar_arranque  # noqa: E402
+from motor import calcular, calcular_lote, hsp_data  # noqa: E402
+
+CIUDADES = [c for c, hsp in hsp_data.items() if hsp > 0]
+
+
+def medir(funcion, repeticiones=50, segundos=2.0, filas=None):
+    """Estadísticas de tiempo de ``funcion()`` (tras una llamada de calentamiento)."""
+    funcion()
+    muestras = []
+    limite = time.perf_counter() + segundos
+    while len(muestras) < repeticiones and (len(muestras) < 3 or time.perf_counter() < limite):
+        inicio = time.perf_counter()
+        funcion()
+        muestras.append(time.perf_counter() - inicio)
+    ms = np.array(muestras) * 1000
+    resultado = {
+        "muestras": len(muestras),
+        "media_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "min_ms": round(float(ms.min()), 4),
+    }
+    if filas:
+        resultado["filas"] = filas
+        resultado["filas_por_segundo"] = round(filas / (resultado["p50_ms"] / 1000))
+    return resultado
+
+
+def leads_aleatorios(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return (
+        np.array(CIUDADES)[rng.integers(0, len(CIUDADES), n)],
+        rng.integers(50, 3000, n).astype(float),
+        rng.integers(500, 1200, n).astype(float),
+        rng.integers(50, 101, n).astype(float),
+        rng.random(n) < 0.3,
+    )
+
+
+def caso_cotizacion_unica(args):
+    return medir(lambda: calcular("Bogotá", 300, 950, 95, False), args.repeticiones * 20, args.segundos)
+
+
+def caso_lote(n):
+    def caso(args):
+        leads = leads_aleatorios(n)
+        return medir(lambda: calcular_lote(*leads), args.repeticiones, args.segundos, filas=n)
+    return caso
+
+
+def caso_portafolio_1M(args):
+    from portafolio import Portafolio
+
+    ciudad, consumo, tarifa, autoconsumo, ley = leads_aleatorios(1_000_000)
+    return medir(lambda: Portafolio().agregar(ciudad, consumo, tarifa, autoconsumo, ley), args.repeticiones,
+                 args.segundos, filas=1_000_000)
+
+
+def caso_malla_sensibilidad(args):
+    from sensibilidad import malla_tarifa_consumo
+
+    # Sin la memoización de la app: una malla de 200 × 200 completa por muestra
+    return medir(lambda: malla_tarifa_consumo.__wrapped__(4.1, 950, 300, 95, False), args.repeticiones,
+                 args.segundos, filas=200 * 200)
+
+
+def caso_tornado(args):
+    from sensibilidad import tornado
+
+    return medir(lambda: tornado.__wrapped__(4.1, 300, 950, 95, True), args.repeticiones * 20, args.segundos)
+
+
+def caso_distribucion_techo(args):
+    from techo import distribuir, rectangulo
+
+    # Nave industrial de 150 × 80 m con 200 obstáculos de 2 × 2 m (unos 3.000 módulos)
+    rng = np.random.default_rng(0)
+    obstaculos = [rectangulo(x, y, 2, 2) for x, y in rng.uniform(5, 140, (200, 2))]
+    techo = [(0, 0), (150, 0), (150, 80), (0, 80)]
+    return medir(lambda: distribuir(techo, obstaculos), args.repeticiones, args.segundos)
+
+
+def caso_figura_area(args):
+    from graficos import figura_area
+
+    # La figura se memoiza en la app; aquí se mide la construcción sin caché
+    return medir(lambda: figura_area.__wrapped__(12), args.repeticiones, args.segundos)
+
+
+def caso_figura_flujo(args):
+    from finanzas import evaluar
+    from graficos import figura_flujo
+
+    p = calcular("Bogotá", 300, 950, 95, False)
+    flujo = evaluar(p["inversion_total"], p["gen_anual"], 950, 95, p["beneficio_anual_renta"])
+    acumulado, descontado = tuple(flujo["acumulado"].tolist()), tuple(flujo["acumulado_descontado"].tolist())
+    return medir(lambda: figura_flujo.__wrapped__(acumulado, descontado), args.repeticiones, args.segundos)
+
+
+def caso_generar_pdf(args):
+    from pdf_propuesta import datos_propuesta, generar_pdf
+
+    p = calcular("Bogotá", 300, 950, 95, False)
+    datos = datos_propuesta("Juan Pérez", "Bogotá", p["kwp_instalado"], p["inversion_total"], p["payback"])
+    return medir(lambda: generar_pdf(datos), args.repeticiones, args.segundos)
+
+
+def caso_rerun_app(args):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+    app.run()
+    app.text_input[0].input("Juan Pérez")
+    app.text_input[1].input("juan@correo.com")
+    app.text_input[3].input("3001234567")
+    app.selectbox[0].select("Bogotá")
+    app.run()
+    app.button[0].click()
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"app.py falló: {app.exception[0].message}")
+    return medir(app.run, args.repeticiones, args.segundos)
+
+
+CASOS = {
+    "cotizacion_unica": caso_cotizacion_unica,
+    "lote_1k": caso_lote(1_000),
+    "lote_100k": caso_lote(100_000),
+    "lote_1M": caso_lote(1_000_000),
+    "portafolio_1M": caso_portafolio_1M,
+    "malla_sensibilidad": caso_malla_sensibilidad,
+    "tornado": caso_tornado,
+    "distribucion_techo": caso_distribucion_techo,
+    "figura_area": caso_figura_area,
+    "figura_flujo": caso_figura_flujo,
+    "generar_pdf": caso_generar_pdf,
+    "rerun_app": caso_rerun_app,
+}
+
+
+def entorno():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "maquina": platform.machine(),
+        "procesador": platform.processor() or None,
+        "cpus": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de SolarCol Pro (resultados en JSON).")
+    parser.add_argument("-o", "--salida", help="archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--casos", help=f"casos separados por coma (por defecto todos: {', '.join(CASOS)})")
+    parser.add_argument("--repeticiones", type=int, default=30, help="muestras máximas por caso")
+    parser.add_argument("--segundos", type=float, default=2.0, help="tiempo máximo por caso")
+    parser.add_argument("--sin-arranque", action="store_true", help="no verificar el presupuesto de arranque en frío")
+    args = parser.parse_args(argv)
+
+    nombres = args.casos.split(",") if args.casos else list(CASOS)
+    desconocidos = [n for n in nombres if n not in CASOS]
+    if desconocidos:
+        parser.error(f"casos desconocidos: {', '.join(desconocidos)}")
+
+    resultados = {}
+    for nombre in nombres:
+        print(f"{nombre}...", file=sys.stderr, flush=True)
+        resultados[nombre] = CASOS[nombre](args)
+        print(f"  p50 {resultados[nombre]['p50_ms']:.3f} ms", file=sys.stderr)
+
+    informe = {"entorno": entorno(), "resultados": resultados}
+    fallas = []
+    if not args.sin_arranque:
+        print("arranque...", file=sys.stderr, flush=True)
+        informe["arranque"], fallas = verificar_arranque()
+        for falla in fallas:
+            print(f"FALLA: {falla}", file=sys.stderr)
+
+    informe = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(informe + "\n")
+    else:
+        print(informe)
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
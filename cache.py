@@ -0,0 +1,106 @@
+"""Caché LRU acotada por proceso, compartida entre sesiones de Streamlit."""
+import functools
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Diccionario LRU seguro entre hilos con contadores de aciertos y fallos.
+
+    Se limita por número de entradas y, opcionalmente, por el tamaño total
+    calculado con ``peso`` (por ejemplo ``len`` para valores en bytes).
+    """
+
+    def __init__(self, max_entradas=128, max_peso=None, peso=None):
+        self.max_entradas = max_entradas
+        self.max_peso = max_peso
+        self.peso = peso
+        self.peso_total = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._candado = threading.Lock()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, llave):
+        return llave in self._datos
+
+    def obtener(self, llave, defecto=None):
+        with self._candado:
+            if llave in self._datos:
+                self._datos.move_to_end(llave)
+                self.aciertos += 1
+                return self._datos[llave]
+            self.fallos += 1
+            return defecto
+
+    def obtener_varias(self, llaves):
+        """dict llave -> valor con las llaves presentes, tomando el candado una sola vez."""
+        encontradas = {}
+        with self._candado:
+            for llave in llaves:
+                if llave in self._datos:
+                    self._datos.move_to_end(llave)
+                    encontradas[llave] = self._datos[llave]
+            self.aciertos += len(encontradas)
+            self.fallos += len(llaves) - len(encontradas)
+        return encontradas
+
+    def guardar(self, llave, valor):
+        self.guardar_varias([(llave, valor)])
+
+    def guardar_varias(self, pares):
+        with self._candado:
+            for llave, valor in pares:
+                if llave in self._datos:
+                    self._quitar(llave)
+                self._datos[llave] = valor
+                if self.peso is not None:
+                    self.peso_total += self.peso(valor)
+            while self._datos and (len(self._datos) > self.max_entradas or
+                                   (self.max_peso is not None and self.peso_total > self.max_peso)):
+                self._quitar(next(iter(self._datos)))
+
+    def _quitar(self, llave):
+        valor = self._datos.pop(llave)
+        if self.peso is not None:
+            self.peso_total -= self.peso(valor)
+
+    def limpiar(self):
+        with self._candado:
+            self._datos.clear()
+            self.peso_total = 0
+            self.aciertos = self.fallos = 0
+
+    def metricas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._datos),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+
+def memoizar(max_entradas=128):
+    """Decorador que memoiza por argumentos posicionales con una ``CacheLRU``.
+
+    La caché queda expuesta como ``funcion.cache``.
+    """
+    def decorador(funcion):
+        cache = CacheLRU(max_entradas)
+        faltante = object()
+
+        @functools.wraps(funcion)
+        def envoltura(*args):
+            valor = cache.obtener(args, faltante)
+            if valor is faltante:
+                valor = funcion(*args)
+                cache.guardar(args, valor)
+            return valor
+
+        envoltura.cache = cache
+        return envoltura
+    return decorador
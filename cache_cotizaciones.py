@@ -0,0 +1,213 @@
+"""Caché de cotizaciones repetidas.
+
+Muchos clientes de una misma ciudad envían casi los mismos datos (300 kWh y
+950 COP son los valores por defecto del formulario). La propuesta completa se
+guarda con la llave normalizada (ciudad, consumo, tarifa, autoconsumo, ley
+1715, versión de costos, más la HSP y los parámetros de equipo si se pasan) en
+una ``CacheLRU`` del proceso y, opcionalmente, en un segundo nivel en disco
+(SQLite) que comparten todas las sesiones, la API y la CLI.
+
+El nivel en disco se activa con ``SOLARCOL_CACHE_COTIZACIONES=<archivo.db>``.
+Su tabla lleva en el nombre una huella del modelo (``motor.PARAMETROS``,
+``hsp_data``, ``COLUMNAS`` y el archivo de curvas de costo): al cambiar
+cualquiera de ellos se empieza una tabla nueva en vez de servir propuestas
+calculadas con el modelo anterior.
+
+Las filas inválidas (resultados NaN o infinitos) se calculan pero no se
+guardan en ninguno de los dos niveles.
+"""
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from cache import CacheLRU
+from curvas_costo import RUTA_DEFECTO as RUTA_CURVAS, version_vigente
+from motor import COLUMNAS, PARAMETROS, calcular, calcular_lote, hsp_data
+
+RUTA_DISCO = os.environ.get("SOLARCOL_CACHE_COTIZACIONES")
+MAX_ENTRADAS_MEMORIA = 100_000
+MAX_ENTRADAS_DISCO = 5_000_000
+DECIMALES = 6   # consumo, tarifa y autoconsumo se redondean a este número de decimales
+_TIPOS = {"num_paneles": np.int64}
+
+
+def version_modelo():
+    """Huella corta de todo lo que, además de las entradas, determina una propuesta."""
+    huella = hashlib.sha256(json.dumps([PARAMETROS, hsp_data, COLUMNAS], sort_keys=True).encode("utf-8"))
+    with open(RUTA_CURVAS, "rb") as archivo:
+        huella.update(archivo.read())
+    return huella.hexdigest()[:12]
+
+
+def _valido(valor):
+    return all(math.isfinite(v) for v in valor)
+
+
+def _normalizar(valor):
+    return np.round(np.asarray(valor, dtype=float), DECIMALES)
+
+
+def llave_cotizacion(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715,
+                     version_costos=None, hsp=None, **parametros):
+    """Tupla normalizada que identifica una cotización."""
+    return (
+        str(ciudad).strip(),
+        _normalizar(consumo_mes).item(),
+        _normalizar(tarifa_kwh).item(),
+        _normalizar(autoconsumo_directo).item(),
+        bool(aplica_ley_1715),
+        version_costos or version_vigente(),
+        None if hsp is None else _normalizar(hsp).item(),
+        tuple(sorted(parametros.items())),
+    )
+
+
+class NivelDisco:
+    """Segundo nivel en SQLite; al superar el máximo se borran las entradas más antiguas."""
+
+    def __init__(self, ruta, max_entradas=MAX_ENTRADAS_DISCO):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.tabla = f"cotizaciones_{version_modelo()}"
+        self.aciertos = 0
+        self.fallos = 0
+        self.escrituras = 0
+        self.conexiones = threading.local()
+        with self._conexion() as conexion:
+            conexion.execute(f"CREATE TABLE IF NOT EXISTS {self.tabla} (llave TEXT PRIMARY KEY, valor TEXT)")
+
+    def _conexion(self):
+        if not hasattr(self.conexiones, "conexion"):
+            conexion = sqlite3.connect(self.ruta, timeout=30)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self.conexiones.conexion = conexion
+        return self.conexiones.conexion
+
+    def obtener_varias(self, llaves):
+        """dict llave -> propuesta con las llaves que estén en disco."""
+        textos = {json.dumps(llave): llave for llave in llaves}
+        encontradas = {}
+        lista = list(textos)
+        for i in range(0, len(lista), 500):
+            grupo = lista[i:i + 500]
+            filas = self._conexion().execute(
+                f"SELECT llave, valor FROM {self.tabla} WHERE llave IN ({', '.join('?' * len(grupo))})", grupo)
+            encontradas.update((textos[llave], tuple(json.loads(valor))) for llave, valor in filas)
+        self.aciertos += len(encontradas)
+        self.fallos += len(textos) - len(encontradas)
+        return encontradas
+
+    def guardar_varias(self, pares):
+        conexion = self._conexion()
+        with conexion:
+            conexion.executemany(f"INSERT OR REPLACE INTO {self.tabla} VALUES (?, ?)",
+                                 [(json.dumps(llave), json.dumps(valor)) for llave, valor in pares])
+        self.escrituras += len(pares)
+        if self.escrituras >= 10_000:
+            self.escrituras = 0
+            with conexion:
+                conexion.execute(
+                    f"DELETE FROM {self.tabla} WHERE rowid <= "
+                    f"(SELECT MAX(rowid) FROM {self.tabla}) - ?", (self.max_entradas,))
+
+
+class CacheCotizaciones:
+    def __init__(self, max_entradas=MAX_ENTRADAS_MEMORIA, ruta_disco=RUTA_DISCO):
+        self.memoria = CacheLRU(max_entradas)
+        self.disco = NivelDisco(ruta_disco) if ruta_disco else None
+
+    def _buscar(self, llaves):
+        encontradas = self.memoria.obtener_varias(llaves)
+        if self.disco is not None and len(encontradas) < len(llaves):
+            en_disco = self.disco.obtener_varias([ll for ll in llaves if ll not in encontradas])
+            self.memoria.guardar_varias(en_disco.items())
+            encontradas.update(en_disco)
+        return encontradas
+
+    def _guardar(self, pares):
+        pares = [(llave, valor) for llave, valor in pares if _valido(valor)]
+        self.memoria.guardar_varias(pares)
+        if self.disco is not None and pares:
+            self.disco.guardar_varias(pares)
+
+    def cotizar(self, ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, hsp=None,
+                version_costos=None, **parametros):
+        """Como ``motor.calcular``, pero servido desde la caché cuando ya se cotizó."""
+        llave = llave_cotizacion(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715,
+                                 version_costos, hsp, **parametros)
+        valor = self._buscar([llave]).get(llave)
+        if valor is None:
+            propuesta = calcular(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, hsp=hsp,
+                                 version_costos=llave[5], **parametros)
+            valor = tuple(propuesta[c] for c in COLUMNAS)
+            self._guardar([(llave, valor)])
+        return dict(zip(COLUMNAS, valor))
+
+    def cotizar_lote(self, ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715,
+                     version_costos=None):
+        """Como ``motor.calcular_lote`` por ciudad: deduplica las filas y solo calcula las que faltan."""
+        version_costos = version_costos or version_vigente()
+        ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715 = np.broadcast_arrays(
+            np.asarray(ciudad).astype(str), np.asarray(consumo_mes, dtype=float),
+            np.asarray(tarifa_kwh, dtype=float), np.asarray(autoconsumo_directo, dtype=float),
+            np.asarray(aplica_ley_1715, dtype=bool))
+        if ciudad.size == 0:
+            return calcular_lote(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715,
+                                 version_costos=version_costos)
+        nombres, codigo = np.unique(ciudad, return_inverse=True)
+        filas = np.column_stack([codigo.ravel(), _normalizar(consumo_mes.ravel()), _normalizar(tarifa_kwh.ravel()),
+                                 _normalizar(autoconsumo_directo.ravel()), aplica_ley_1715.ravel()])
+
+        # Filas únicas con lexsort (más rápido que np.unique(axis=0)); NaN queda como fila propia
+        orden = np.lexsort(filas.T[::-1])
+        ordenadas = filas[orden]
+        nueva = np.ones(len(filas), dtype=bool)
+        nueva[1:] = (ordenadas[1:] != ordenadas[:-1]).any(axis=1)
+        unicas = ordenadas[nueva]
+        inversa = np.empty(len(filas), dtype=np.intp)
+        inversa[orden] = np.cumsum(nueva) - 1
+
+        llaves = [(str(nombres[int(c)]), consumo, tarifa, autoconsumo, bool(ley), version_costos, None, ())
+                  for c, consumo, tarifa, autoconsumo, ley in unicas.tolist()]
+        encontradas = self._buscar(llaves)
+        faltantes = [i for i, llave in enumerate(llaves) if llave not in encontradas]
+        if faltantes:
+            f = unicas[faltantes]
+            nuevas = calcular_lote(nombres[f[:, 0].astype(int)], f[:, 1], f[:, 2], f[:, 3], f[:, 4].astype(bool),
+                                   version_costos=version_costos)
+            pares = list(zip([llaves[i] for i in faltantes],
+                             zip(*(nuevas[c].tolist() for c in COLUMNAS))))
+            self._guardar(pares)
+            encontradas.update(pares)
+        tabla = np.array([encontradas[llave] for llave in llaves], dtype=float)[inversa]
+        return {c: tabla[:, j].astype(_TIPOS.get(c, float)).reshape(ciudad.shape) for j, c in enumerate(COLUMNAS)}
+
+    def metricas(self):
+        metricas = self.memoria.metricas()
+        if self.disco is not None:
+            metricas["aciertos_disco"] = self.disco.aciertos
+            metricas["fallos_disco"] = self.disco.fallos
+        return metricas
+
+
+_cache = None
+_candado = threading.Lock()
+
+
+def cache_cotizaciones():
+    """Caché compartida del proceso."""
+    global _cache
+    with _candado:
+        if _cache is None:
+            _cache = CacheCotizaciones()
+    return _cache
+
+
+def cotizar(*args, **kwargs):
+    return cache_cotizaciones().cotizar(*args, **kwargs)
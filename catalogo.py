@@ -0,0 +1,145 @@
+"""Catálogo de equipos: módulos, inversores y baterías.
+
+El catálogo se lee una sola vez por proceso desde ``datos/catalogo_equipos.csv``
+(o la ruta en ``SOLARCOL_CATALOGO``) y cada tipo de equipo queda como columnas
+NumPy ordenadas por potencia, más un índice ordenado por precio. Ubicar la
+potencia mínima de un inversor o el precio máximo de una lista es una búsqueda
+binaria (``searchsorted``), O(log n) con miles de referencias.
+"""
+import csv
+import math
+import os
+import threading
+
+import numpy as np
+
+RUTA_DEFECTO = os.environ.get(
+    "SOLARCOL_CATALOGO",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "catalogo_equipos.csv"))
+
+MODULO_DEFECTO = "MOD-550-M"
+UMBRAL_TRIFASICO_KWP = 8          # por debajo se sugiere inversor monofásico
+RELACION_DC_AC_MAXIMA = 1.3
+TEMPERATURA_MINIMA = 5            # °C, para el Voc en frío
+TEMPERATURA_CELDA_MAXIMA = 70     # °C, para el Vmp en caliente
+
+_TEXTO = ("tipo", "sku", "descripcion")
+
+
+class TablaEquipos:
+    """Equipos de un tipo como columnas ordenadas por ``potencia_w``."""
+
+    def __init__(self, filas):
+        filas = sorted(filas, key=lambda f: float(f["potencia_w"]))
+        columnas = [c for c in filas[0] if c not in _TEXTO] if filas else []
+        self.sku = np.array([f["sku"] for f in filas], dtype=object)
+        self.descripcion = np.array([f["descripcion"] for f in filas], dtype=object)
+        self.columnas = {c: np.array([float(f[c]) if f[c] else np.nan for f in filas]) for c in columnas}
+        self.potencia = self.columnas["potencia_w"] if filas else np.array([])
+        self.orden_precio = np.argsort(self.columnas["precio_cop"], kind="stable") if filas else np.array([], int)
+        self.precio_ordenado = self.columnas["precio_cop"][self.orden_precio] if filas else np.array([])
+        self.posicion = {sku: i for i, sku in enumerate(self.sku)}
+
+    def __len__(self):
+        return len(self.sku)
+
+    def fila(self, i):
+        equipo = {"sku": self.sku[i], "descripcion": self.descripcion[i]}
+        equipo.update({c: v[i].item() for c, v in self.columnas.items() if not np.isnan(v[i])})
+        return equipo
+
+    def por_sku(self, sku):
+        return self.fila(self.posicion[sku])
+
+    def por_precio(self, maximo=np.inf):
+        """Equipos con precio <= ``maximo``, del más barato al más caro."""
+        hasta = np.searchsorted(self.precio_ordenado, maximo, side="right")
+        return [self.fila(i) for i in self.orden_precio[:hasta]]
+
+    def primero_desde(self, potencia_minima, filtro=None):
+        """El equipo de menor potencia >= ``potencia_minima`` que cumpla ``filtro``."""
+        for i in range(np.searchsorted(self.potencia, potencia_minima, side="left"), len(self)):
+            equipo = self.fila(i)
+            if filtro is None or filtro(equipo):
+                return equipo
+        return None
+
+
+class Catalogo:
+    def __init__(self, ruta=RUTA_DEFECTO):
+        with open(ruta, encoding="utf-8") as archivo:
+            filas = list(csv.DictReader(archivo))
+        self.modulos = TablaEquipos([f for f in filas if f["tipo"] == "modulo"])
+        self.inversores = {
+            fases: TablaEquipos([f for f in filas if f["tipo"] == "inversor" and f["fases"] == str(fases)])
+            for fases in (1, 3)
+        }
+        self.baterias = TablaEquipos([f for f in filas if f["tipo"] == "bateria"])
+
+    def modulo(self, sku=MODULO_DEFECTO):
+        return self.modulos.por_sku(sku)
+
+    def seleccionar_inversores(self, kwp_dc, relacion_maxima=RELACION_DC_AC_MAXIMA, fases=None):
+        """Inversor más pequeño (y cuántas unidades) para una potencia DC dada.
+
+        Devuelve (inversor, cantidad, relacion_dc_ac). Si ningún equipo alcanza
+        la potencia requerida se reparte entre varias unidades iguales.
+        """
+        if fases is None:
+            fases = 1 if kwp_dc < UMBRAL_TRIFASICO_KWP else 3
+        tabla = self.inversores[fases]
+        requerida = kwp_dc * 1000 / relacion_maxima
+        cantidad = max(1, math.ceil(requerida / tabla.potencia[-1]))
+        inversor = tabla.primero_desde(requerida / cantidad)
+        return inversor, cantidad, kwp_dc * 1000 / (inversor["potencia_w"] * cantidad)
+
+
+def configuracion_strings(modulo, inversor, num_paneles, cantidad_inversores=1,
+                          temperatura_minima=TEMPERATURA_MINIMA, temperatura_celda=TEMPERATURA_CELDA_MAXIMA):
+    """Módulos en serie y strings en paralelo por inversor.
+
+    Respeta la tensión máxima DC con el Voc en frío, la ventana MPPT con el
+    Vmp en frío y en caliente, y la corriente máxima por MPPT.
+    """
+    coef = modulo["coef_voc"]
+    voc_frio = modulo["voc_v"] * (1 + coef * (temperatura_minima - 25))
+    vmp_frio = modulo["vmp_v"] * (1 + coef * (temperatura_minima - 25))
+    vmp_caliente = modulo["vmp_v"] * (1 + coef * (temperatura_celda - 25))
+    max_serie = min(math.floor(inversor["vdc_max_v"] / voc_frio), math.floor(inversor["vmppt_max_v"] / vmp_frio))
+    min_serie = math.ceil(inversor["vmppt_min_v"] / vmp_caliente)
+
+    paneles = math.ceil(num_paneles / cantidad_inversores)
+    strings = math.ceil(paneles / max_serie)
+    serie = math.ceil(paneles / strings)
+    strings_por_mppt = math.ceil(strings / inversor["n_mppt"])
+    corriente_mppt = strings_por_mppt * modulo["imp_a"]
+
+    if serie < min_serie:
+        mensaje = f"Se necesitan al menos {min_serie} módulos en serie para la ventana MPPT."
+    elif corriente_mppt > inversor["imppt_max_a"]:
+        mensaje = f"{corriente_mppt:.1f} A por MPPT supera el máximo de {inversor['imppt_max_a']:.0f} A."
+    else:
+        mensaje = ""
+    return {
+        "modulos_por_string": serie,
+        "strings_por_inversor": strings,
+        "strings_por_mppt": strings_por_mppt,
+        "min_serie": min_serie,
+        "max_serie": max_serie,
+        "tension_string_frio": serie * voc_frio,
+        "valida": not mensaje,
+        "mensaje": mensaje,
+    }
+
+
+_catalogo = None
+_candado = threading.Lock()
+
+
+def catalogo():
+    """Catálogo compartido del proceso, leído en la primera consulta."""
+    global _catalogo
+    with _candado:
+        if _catalogo is None:
+            _catalogo = Catalogo()
+    return _catalogo
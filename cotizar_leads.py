@@ -0,0 +1,176 @@
+"""Cotización masiva de leads desde la línea de comandos.
+
+Lee un archivo CSV o Parquet por bloques, valida cada fila con las mismas
+reglas del formulario de la app, calcula la propuesta con ``motor`` y escribe
+los resultados bloque a bloque, por lo que la memoria usada no depende del
+tamaño del archivo.
+
+Uso:
+    python cotizar_leads.py leads.csv -o propuestas.csv
+    python cotizar_leads.py leads.parquet -o propuestas.parquet --bloque 200000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_cotizaciones import cache_cotizaciones
+from curvas_costo import version_vigente
+from motor import calcular_lote, hsp_data
+from validacion import motivos_rechazo
+
+# Nombres alternos aceptados en los archivos de leads
+ALIAS = {
+    "name": "nombre", "email": "correo", "phone": "telefono", "city": "ciudad",
+    "monthly_kwh": "consumo_mes", "kwh": "consumo_mes", "tariff": "tarifa_kwh",
+}
+COLUMNAS_ENTRADA = ("nombre", "correo", "telefono", "ciudad", "consumo_mes", "tarifa_kwh")
+COLUMNAS_SALIDA = (
+    "hsp", "num_paneles", "kwp_instalado", "inversion_total", "gen_anual",
+    "ahorro_total_anual", "payback", "co2_evitado_anual",
+)
+AUTOCONSUMO_DEFECTO = 95
+CIUDADES = frozenset(c for c, hsp in hsp_data.items() if hsp > 0)
+
+
+def leer_por_bloques(ruta, tamaño_bloque, parquet=None):
+    """Genera DataFrames de a lo sumo ``tamaño_bloque`` filas.
+
+    ``ruta`` también puede ser un archivo abierto (p. ej. uno subido a la app);
+    en ese caso ``parquet`` indica el formato.
+    """
+    if parquet is None:
+        parquet = ruta.endswith(".parquet")
+    if parquet:
+        import pyarrow.parquet as pq
+
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamaño_bloque):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(ruta, chunksize=tamaño_bloque, dtype={"telefono": str, "phone": str})
+
+
+def cotizar_bloque(df, version_costos=None, usar_cache=True):
+    """Valida y cotiza un bloque de leads; devuelve el bloque con los resultados."""
+    df = df.rename(columns=ALIAS)
+    faltantes = [c for c in COLUMNAS_ENTRADA if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+
+    consumo_mes = pd.to_numeric(df["consumo_mes"], errors="coerce").to_numpy(dtype=float)
+    tarifa_kwh = pd.to_numeric(df["tarifa_kwh"], errors="coerce").to_numpy(dtype=float)
+    if "autoconsumo_directo" in df.columns:
+        autoconsumo = pd.to_numeric(df["autoconsumo_directo"], errors="coerce").fillna(AUTOCONSUMO_DEFECTO)
+    else:
+        autoconsumo = np.full(len(df), AUTOCONSUMO_DEFECTO)
+    if "aplica_ley_1715" in df.columns:
+        ley_1715 = df["aplica_ley_1715"].astype(str).str.strip().str.lower().isin(("1", "true", "si", "sí"))
+    else:
+        ley_1715 = np.zeros(len(df), dtype=bool)
+
+    motivo = motivos_rechazo(df, CIUDADES)
+    motivo = np.where((motivo == "") & ~(consumo_mes > 0), "consumo inválido", motivo)
+    motivo = np.where((motivo == "") & ~(tarifa_kwh > 0), "tarifa inválida", motivo)
+    validos = motivo == ""
+
+    # Con caché, las filas repetidas del bloque se calculan una vez y las ya cotizadas no se recalculan
+    cotizar = cache_cotizaciones().cotizar_lote if usar_cache else calcular_lote
+    resultados = cotizar(np.where(validos, df["ciudad"].astype(str).str.strip(), "Seleccionar"),
+                         consumo_mes, tarifa_kwh, autoconsumo, ley_1715, version_costos=version_costos)
+    salida = df.loc[:, list(COLUMNAS_ENTRADA)].astype({"telefono": str})
+    for columna in COLUMNAS_SALIDA:
+        salida[columna] = resultados[columna]
+    salida["version_costos"] = version_costos or version_vigente()
+    salida["motivo_rechazo"] = motivo
+    return salida
+
+
+class EscritorCSV:
+    def __init__(self, ruta):
+        self.archivo = open(ruta, "w", encoding="utf-8", newline="")
+        self.encabezado = True
+
+    def escribir(self, df):
+        df.to_csv(self.archivo, index=False, header=self.encabezado)
+        self.encabezado = False
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+class EscritorParquet:
+    # Tipos fijos de la salida: inferirlos del primer bloque falla si una columna viene toda vacía en él
+    NUMERICAS = {"consumo_mes": "float64", "tarifa_kwh": "float64", "num_paneles": "int64"}
+
+    def __init__(self, ruta):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columnas = (*COLUMNAS_ENTRADA, *COLUMNAS_SALIDA, "version_costos", "motivo_rechazo")
+        self.esquema = pa.schema([
+            (c, pa.type_for_alias(self.NUMERICAS.get(c, "float64" if c in COLUMNAS_SALIDA else "string")))
+            for c in columnas
+        ])
+        self.escritor = pq.ParquetWriter(ruta, self.esquema)
+
+    def escribir(self, df):
+        import pyarrow as pa
+
+        columnas = {}
+        for campo in self.esquema:
+            if pa.types.is_string(campo.type):
+                columnas[campo.name] = df[campo.name].astype("string")
+            else:
+                columnas[campo.name] = pd.to_numeric(df[campo.name], errors="coerce")
+        tabla = pa.Table.from_pandas(pd.DataFrame(columnas), schema=self.esquema, preserve_index=False)
+        self.escritor.write_table(tabla)
+
+    def cerrar(self):
+        self.escritor.close()
+
+
+def abrir_escritor(ruta):
+    return EscritorParquet(ruta) if ruta.endswith(".parquet") else EscritorCSV(ruta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cotiza en bloque un archivo de leads (CSV o Parquet).")
+    parser.add_argument("entrada", help="archivo de leads (.csv o .parquet)")
+    parser.add_argument("-o", "--salida", required=True, help="archivo de propuestas (.csv o .parquet)")
+    parser.add_argument("--bloque", type=int, default=100_000, help="filas por bloque (por defecto 100000)")
+    parser.add_argument("--version-costos", help="versión de la curva de costos (por defecto la vigente)")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="calcular todas las filas sin la caché de cotizaciones (más rápido si casi no se repiten)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    filas = rechazadas = 0
+    escritor = abrir_escritor(args.salida)
+    try:
+        for bloque in leer_por_bloques(args.entrada, args.bloque):
+            salida = cotizar_bloque(bloque, args.version_costos, not args.sin_cache)
+            escritor.escribir(salida)
+            filas += len(salida)
+            rechazadas += int((salida["motivo_rechazo"] != "").sum())
+    finally:
+        escritor.cerrar()
+    segundos = time.perf_counter() - inicio
+
+    print(f"Filas procesadas: {filas:,} | Válidas: {filas - rechazadas:,} | Rechazadas: {rechazadas:,}",
+          file=sys.stderr)
+    print(f"Tiempo: {segundos:.2f} s | Rendimiento: {filas / max(segundos, 1e-9):,.0f} filas/s",
+          file=sys.stderr)
+    if not args.sin_cache:
+        metricas = cache_cotizaciones().metricas()
+        print(f"Caché: {metricas['aciertos']:,} aciertos | {metricas['fallos']:,} fallos | "
+              f"tasa {metricas['tasa_aciertos']:.1%}", file=sys.stderr)
+        if "aciertos_disco" in metricas:
+            print(f"Caché en disco: {metricas['aciertos_disco']:,} aciertos | {metricas['fallos_disco']:,} fallos",
+                  file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
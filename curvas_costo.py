@@ -0,0 +1,123 @@
+"""Curvas de costo de inversión versionadas.
+
+Las curvas viven en ``datos/curvas_costo.csv`` (o ``SOLARCOL_CURVAS_COSTO``).
+La vigente, con la que se cotiza por defecto, es ``VERSION_VIGENTE`` (``v10``
+o ``SOLARCOL_VERSION_COSTOS``); si el archivo no la tiene, la última del
+archivo. Las demás solo se usan al pedirlas. Hay dos tipos:
+
+- ``tramos``: escalones ``fijo + cop_por_kwp * kWp`` hasta cada límite de
+  kWp (vacío = sin límite), con ``limite`` ``<`` o ``<=``. Reproducen las
+  estructuras de precios de las versiones anteriores de la app (v1, v4, v7, v10).
+- ``lineal``: puntos (kWp, inversión) interpolados linealmente; más allá del
+  último punto se extrapola con la pendiente del último segmento. Es continua,
+  sin el salto de los escalones.
+
+La evaluación es vectorizada con ``searchsorted``/``interp``, de modo que
+cotizar millones de proyectos es una sola pasada por versión.
+"""
+import csv
+import os
+import threading
+
+import numpy as np
+
+RUTA_DEFECTO = os.environ.get(
+    "SOLARCOL_CURVAS_COSTO",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "curvas_costo.csv"))
+# v11 (lineal) es un borrador sin precios de referencia: se usa solo si se pide
+VERSION_VIGENTE = os.environ.get("SOLARCOL_VERSION_COSTOS", "v10")
+
+
+def _numero(texto, vacio=np.nan):
+    return float(texto) if texto else vacio
+
+
+class CurvaCosto:
+    def __init__(self, version, tipo, filas):
+        self.version = version
+        self.tipo = tipo
+        if tipo == "tramos":
+            self.limites = np.array([_numero(f["kwp"], np.inf) for f in filas])
+            self.fijo = np.array([_numero(f["fijo_cop"], 0.0) for f in filas])
+            self.cop_por_kwp = np.array([_numero(f["cop_por_kwp"], 0.0) for f in filas])
+            # "<=" deja el límite dentro del tramo; "<" lo pasa al siguiente.
+            self.lado = "left" if filas[0]["limite"] == "<=" else "right"
+        elif tipo == "lineal":
+            self.kwp = np.array([float(f["kwp"]) for f in filas])
+            self.inversion = np.array([float(f["inversion_cop"]) for f in filas])
+            self.pendiente_final = (self.inversion[-1] - self.inversion[-2]) / (self.kwp[-1] - self.kwp[-2])
+        else:
+            raise ValueError(f"Tipo de curva desconocido en {version}: {tipo}")
+
+    def segmento(self, kwp_instalado):
+        """Índice del tramo (o segmento lineal) en que cae cada kWp."""
+        kwp_instalado = np.asarray(kwp_instalado, dtype=float)
+        if self.tipo == "tramos":
+            return np.minimum(np.searchsorted(self.limites, kwp_instalado, side=self.lado), len(self.limites) - 1)
+        return np.clip(np.searchsorted(self.kwp, kwp_instalado, side="right") - 1, 0, len(self.kwp) - 2)
+
+    def etiquetas(self):
+        """Nombre legible de cada tramo, en el orden de ``segmento``."""
+        if self.tipo == "tramos":
+            bordes = [0.0, *self.limites[:-1]]
+        else:
+            bordes = list(self.kwp[:-1])
+        etiquetas = [f"{a:g}–{b:g} kWp" for a, b in zip(bordes[:-1], bordes[1:])]
+        return etiquetas + [f"> {bordes[-1]:g} kWp" if len(bordes) > 1 else "Tramo único"]
+
+    def __call__(self, kwp_instalado):
+        """Inversión total (COP) para uno o muchos kWp instalados."""
+        kwp_instalado = np.asarray(kwp_instalado, dtype=float)
+        if self.tipo == "tramos":
+            i = self.segmento(kwp_instalado)
+            return self.fijo[i] + (kwp_instalado * self.cop_por_kwp[i])
+        extra = np.maximum(kwp_instalado - self.kwp[-1], 0) * self.pendiente_final
+        return np.interp(kwp_instalado, self.kwp, self.inversion) + extra
+
+
+class CurvasCosto:
+    def __init__(self, ruta=RUTA_DEFECTO, vigente=VERSION_VIGENTE):
+        with open(ruta, encoding="utf-8") as archivo:
+            filas = list(csv.DictReader(archivo))
+        por_version = {}
+        for fila in filas:
+            por_version.setdefault(fila["version"], []).append(fila)
+        self.curvas = {v: CurvaCosto(v, f[0]["tipo"], f) for v, f in por_version.items()}
+        self.vigente = vigente if vigente in self.curvas else list(por_version)[-1]
+
+    def __getitem__(self, version):
+        if version not in self.curvas:
+            raise KeyError(f"Versión de curva de costos desconocida: {version}")
+        return self.curvas[version]
+
+    def inversion(self, kwp_instalado, version=None):
+        return self[version or self.vigente](kwp_instalado)
+
+    def inversion_por_version(self, kwp_instalado, versiones):
+        """Recotiza proyectos históricos, cada uno con la versión con que se emitió."""
+        kwp_instalado = np.asarray(kwp_instalado, dtype=float)
+        versiones = np.asarray(versiones).astype(str)
+        resultado = np.empty(kwp_instalado.shape)
+        unicas, grupo = np.unique(versiones, return_inverse=True)
+        grupo = grupo.reshape(versiones.shape)
+        for i, version in enumerate(unicas):
+            en_grupo = grupo == i
+            resultado[en_grupo] = self[version](kwp_instalado[en_grupo])
+        return resultado
+
+
+_curvas = None
+_candado = threading.Lock()
+
+
+def curvas():
+    """Curvas compartidas del proceso, leídas en la primera consulta."""
+    global _curvas
+    with _candado:
+        if _curvas is None:
+            _curvas = CurvasCosto()
+    return _curvas
+
+
+def version_vigente():
+    return curvas().vigente
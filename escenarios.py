@@ -0,0 +1,104 @@
+"""Escenarios comparables con recálculo incremental.
+
+Cada escenario tiene un ``Evaluador``: un grafo pequeño de nodos con sus
+dependencias declaradas. Al actualizar las entradas solo se recalculan los
+nodos con alguna dependencia cuyo *valor* cambió; si un nodo recalculado da el
+mismo resultado (p. ej. subir el consumo 5 kWh no agrega paneles) la
+propagación se corta ahí y el flujo de caja a 25 años no se vuelve a evaluar.
+"""
+import numpy as np
+
+from cache_cotizaciones import cotizar
+from finanzas import evaluar
+
+
+def _igual(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_igual(a[k], b[k]) for k in a)
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    return type(a) is type(b) and a == b
+
+
+class Evaluador:
+    """Evalúa ``nodos`` (nombre -> (dependencias, función)) en orden, recalculando solo lo necesario.
+
+    Las dependencias son nombres de entradas o de nodos anteriores del dict.
+    """
+
+    def __init__(self, nodos):
+        self.nodos = nodos
+        self.valores = {}
+        self.recalculados = []
+
+    def actualizar(self, **entradas):
+        cambiados = {k for k, v in entradas.items() if k not in self.valores or not _igual(self.valores[k], v)}
+        self.valores.update(entradas)
+        self.recalculados = []
+        for nombre, (dependencias, funcion) in self.nodos.items():
+            if nombre in self.valores and cambiados.isdisjoint(dependencias):
+                continue
+            valor = funcion(*(self.valores[d] for d in dependencias))
+            self.recalculados.append(nombre)
+            if nombre not in self.valores or not _igual(self.valores[nombre], valor):
+                cambiados.add(nombre)
+            self.valores[nombre] = valor
+        return self.valores
+
+
+def _propuesta(ciudad, hsp, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, num_paneles, equipo):
+    return cotizar(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, hsp=hsp,
+                   num_paneles=num_paneles, **dict(equipo))
+
+
+def _indicadores(inversion_total, gen_anual, tarifa_kwh, autoconsumo_directo, beneficio_anual_renta):
+    return evaluar(inversion_total, gen_anual, tarifa_kwh, autoconsumo_directo, beneficio_anual_renta)
+
+
+# Entradas: ciudad, hsp, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715,
+# num_paneles (None = dimensionado por consumo) y equipo (tupla de pares parámetro-valor).
+NODOS_ESCENARIO = {
+    "propuesta": (("ciudad", "hsp", "consumo_mes", "tarifa_kwh", "autoconsumo_directo", "aplica_ley_1715",
+                   "num_paneles", "equipo"), _propuesta),
+    "inversion_total": (("propuesta",), lambda p: p["inversion_total"]),
+    "gen_anual": (("propuesta",), lambda p: p["gen_anual"]),
+    "beneficio_anual_renta": (("propuesta",), lambda p: p["beneficio_anual_renta"]),
+    "indicadores": (("inversion_total", "gen_anual", "tarifa_kwh", "autoconsumo_directo", "beneficio_anual_renta"),
+                    _indicadores),
+}
+
+
+def evaluador_escenario():
+    return Evaluador(NODOS_ESCENARIO)
+
+
+# Columnas de la tabla editable de la app
+COLUMNA_NOMBRE = "Escenario"
+COLUMNA_TARIFA = "Tarifa (COP/kWh)"
+COLUMNA_AUTOCONSUMO = "Autoconsumo (%)"
+COLUMNA_LEY = "Ley 1715"
+COLUMNA_PANELES = "Paneles"
+
+
+def fila_escenario(nombre, tarifa_kwh=None, autoconsumo_directo=None, aplica_ley_1715=None, num_paneles=None):
+    """Fila de la tabla; lo que se deje en None queda vacío y sigue al proyecto en cada rerun."""
+    return {COLUMNA_NOMBRE: nombre,
+            COLUMNA_TARIFA: None if tarifa_kwh is None else float(tarifa_kwh),
+            COLUMNA_AUTOCONSUMO: None if autoconsumo_directo is None else round(float(autoconsumo_directo), 1),
+            COLUMNA_LEY: None if aplica_ley_1715 is None else bool(aplica_ley_1715),
+            COLUMNA_PANELES: num_paneles}
+
+
+def _celda(valor, defecto):
+    return defecto if valor is None or (isinstance(valor, float) and np.isnan(valor)) else valor
+
+
+def entradas_escenario(fila, tarifa_kwh, autoconsumo_directo, aplica_ley_1715):
+    """Tarifa, autoconsumo, ley y paneles de una fila; las celdas vacías toman el valor del proyecto."""
+    paneles = _celda(fila.get(COLUMNA_PANELES), None)
+    return {
+        "tarifa_kwh": float(_celda(fila.get(COLUMNA_TARIFA), tarifa_kwh)),
+        "autoconsumo_directo": float(_celda(fila.get(COLUMNA_AUTOCONSUMO), autoconsumo_directo)),
+        "aplica_ley_1715": bool(_celda(fila.get(COLUMNA_LEY), aplica_ley_1715)),
+        "num_paneles": None if paneles is None or paneles <= 0 else int(paneles),
+    }
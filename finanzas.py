@@ -0,0 +1,139 @@
+"""Modelo financiero multianual vectorizado.
+
+Proyecta el flujo de caja de N proyectos durante ``años`` años con
+degradación de los paneles, incremento de la tarifa, O&M, reemplazo del
+inversor y el beneficio de la Ley 1715, y calcula VPN, TIR, LCOE y payback
+simple y descontado. Todo se evalúa como matrices N × (años + 1).
+"""
+import numpy as np
+
+from motor import PARAMETROS
+
+SUPUESTOS = {
+    "años": 25,
+    "degradacion": 0.005,            # pérdida anual de producción
+    "incremento_tarifa": 0.06,       # alza anual de la tarifa
+    "tasa_descuento": 0.12,
+    "om_anual": 0.01,                # O&M como fracción de la inversión
+    "inflacion_om": 0.04,
+    "año_reemplazo_inversor": 12,
+    "costo_reemplazo_inversor": 0.10,  # fracción de la inversión
+}
+
+
+def _supuestos(sobrescritos):
+    desconocidos = set(sobrescritos) - set(SUPUESTOS)
+    if desconocidos:
+        raise TypeError(f"Supuestos desconocidos: {', '.join(sorted(desconocidos))}")
+    return {**SUPUESTOS, **sobrescritos}
+
+
+def _columna(valor):
+    return np.asarray(valor, dtype=float)[..., None]
+
+
+def flujos_caja(inversion_total, gen_anual, tarifa_kwh, autoconsumo_directo, beneficio_anual_renta,
+                factor_remuneracion_excedente=PARAMETROS["factor_remuneracion_excedente"],
+                años_ley_1715=PARAMETROS["años_ley_1715"], **supuestos):
+    """Flujos anuales (… × años+1); la columna 0 es la inversión inicial.
+
+    Devuelve también la energía producida cada año, que usa el LCOE.
+    """
+    s = _supuestos(supuestos)
+    t = np.arange(1, s["años"] + 1)
+    inversion = _columna(inversion_total)
+
+    energia = _columna(gen_anual) * (1 - _columna(s["degradacion"])) ** (t - 1)
+    tarifa = _columna(tarifa_kwh) * (1 + _columna(s["incremento_tarifa"])) ** (t - 1)
+    autoconsumo = _columna(autoconsumo_directo) / 100
+    valor_kwh = tarifa * (autoconsumo + (1 - autoconsumo) * _columna(factor_remuneracion_excedente))
+    ahorro = energia * valor_kwh
+    renta = np.where(t <= _columna(años_ley_1715), _columna(beneficio_anual_renta), 0)
+    costos = inversion * _columna(s["om_anual"]) * (1 + _columna(s["inflacion_om"])) ** (t - 1)
+    costos = costos + np.where(t == _columna(s["año_reemplazo_inversor"]),
+                               inversion * _columna(s["costo_reemplazo_inversor"]), 0)
+
+    operacion = ahorro + renta - costos
+    flujos = np.concatenate([-np.broadcast_to(inversion, operacion.shape[:-1] + (1,)), operacion], axis=-1)
+    return flujos, energia, costos
+
+
+def valor_presente(flujos, tasa):
+    """VPN de flujos (… × T+1) a una tasa (escalar o …)."""
+    t = np.arange(flujos.shape[-1])
+    return (flujos / (1 + _columna(tasa)) ** t).sum(axis=-1)
+
+
+def _vpn_horner(por_año, tasa):
+    """VPN por el método de Horner: evita potencias, que dominan el costo de la TIR.
+
+    ``por_año`` tiene los años en el primer eje (T+1 × …) para recorrer memoria contigua.
+    """
+    x = 1 / (1 + tasa)
+    vpn = por_año[-1]
+    for k in range(len(por_año) - 2, -1, -1):
+        vpn = vpn * x + por_año[k]
+    return vpn
+
+
+def tir(flujos, iteraciones=50):
+    """TIR por bisección vectorizada; NaN sin cambio de signo en [-99 %, 100 %] o con flujos no finitos."""
+    flujos = np.ascontiguousarray(np.moveaxis(flujos, -1, 0))
+    bajo = np.full(flujos.shape[1:], -0.99)
+    alto = np.full(flujos.shape[1:], 1.0)
+    vpn_bajo = _vpn_horner(flujos, bajo)
+    # sign(nan) != sign(nan) es cierto: sin la máscara un flujo NaN daría -99 %
+    con_raiz = (np.sign(vpn_bajo) != np.sign(_vpn_horner(flujos, alto))) & np.isfinite(flujos).all(axis=0)
+    for _ in range(iteraciones):
+        medio = (bajo + alto) / 2
+        vpn_medio = _vpn_horner(flujos, medio)
+        mismo_signo = np.sign(vpn_medio) == np.sign(vpn_bajo)
+        bajo = np.where(mismo_signo, medio, bajo)
+        vpn_bajo = np.where(mismo_signo, vpn_medio, vpn_bajo)
+        alto = np.where(mismo_signo, alto, medio)
+    return np.where(con_raiz, (bajo + alto) / 2, np.nan)
+
+
+def año_recuperacion(acumulado):
+    """Primer cruce por cero del flujo acumulado, interpolado dentro del año; NaN si no ocurre."""
+    positivo = acumulado >= 0
+    recupera = positivo.any(axis=-1)
+    indice = np.where(recupera, positivo.argmax(axis=-1), 1)
+    anterior = np.take_along_axis(acumulado, (indice - 1)[..., None], axis=-1)[..., 0]
+    actual = np.take_along_axis(acumulado, indice[..., None], axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraccion = -anterior / (actual - anterior)
+    return np.where(recupera & (indice > 0), indice - 1 + fraccion, np.where(recupera, 0.0, np.nan))
+
+
+def evaluar(inversion_total, gen_anual, tarifa_kwh, autoconsumo_directo, beneficio_anual_renta,
+            factor_remuneracion_excedente=PARAMETROS["factor_remuneracion_excedente"],
+            años_ley_1715=PARAMETROS["años_ley_1715"], calcular_tir=True, **supuestos):
+    """Indicadores financieros de N proyectos en una sola llamada.
+
+    Devuelve un dict con los flujos (… × años+1), el acumulado nominal y
+    descontado, y por proyecto: vpn, tir, lcoe (COP/kWh), payback y
+    payback_descontado (años).
+    """
+    s = _supuestos(supuestos)
+    flujos, energia, costos = flujos_caja(inversion_total, gen_anual, tarifa_kwh, autoconsumo_directo,
+                                          beneficio_anual_renta, factor_remuneracion_excedente,
+                                          años_ley_1715, **supuestos)
+    t = np.arange(flujos.shape[-1])
+    descuento = 1 / (1 + _columna(s["tasa_descuento"])) ** t
+    descontados = flujos * descuento
+    acumulado = np.cumsum(flujos, axis=-1)
+    acumulado_descontado = np.cumsum(descontados, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lcoe = (np.asarray(inversion_total, dtype=float) + (costos * descuento[..., 1:]).sum(axis=-1)) \
+            / (energia * descuento[..., 1:]).sum(axis=-1)
+    return {
+        "flujos": flujos,
+        "acumulado": acumulado,
+        "acumulado_descontado": acumulado_descontado,
+        "vpn": acumulado_descontado[..., -1],
+        "tir": tir(flujos) if calcular_tir else None,
+        "lcoe": lcoe,
+        "payback": año_recuperacion(acumulado),
+        "payback_descontado": año_recuperacion(acumulado_descontado),
+    }
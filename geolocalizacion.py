@@ -0,0 +1,141 @@
+"""Consulta de HSP por coordenadas sobre una malla regular.
+
+La malla cubre Colombia con celdas de 0.1° y se construye una sola vez por
+proceso a partir de los municipios del almacén de irradiancia (ponderación
+por inverso de la distancia). Cada celda guarda además el municipio más
+cercano a su centro, que sirve de índice espacial: ubicar un punto es
+aritmética de índices, sin búsquedas, y la interpolación bilineal de miles
+de puntos es una sola operación vectorizada.
+
+La malla es un rectángulo que también cubre parte de Venezuela, Panamá,
+Ecuador, Perú, Brasil y el mar; cada celda guarda si su centro cae dentro de
+un contorno simplificado de Colombia (``CONTORNO_COLOMBIA``, error de unos
+20 km en la frontera) y fuera de él no se interpola.
+"""
+import threading
+
+import numpy as np
+
+from irradiancia import almacen
+
+LAT_MIN, LAT_MAX = -4.3, 13.6
+LON_MIN, LON_MAX = -82.0, -66.8
+RESOLUCION = 0.1
+POTENCIA_IDW = 2
+
+# Contornos simplificados (lat, lon): territorio continental y archipiélago de San Andrés y Providencia
+CONTORNO_COLOMBIA = (
+    # Caribe, de Urabá a La Guajira
+    (8.72, -77.42), (8.45, -77.15), (8.0, -76.8), (9.5, -76.1), (10.5, -75.7), (11.15, -74.95), (11.4, -74.2),
+    (11.35, -73.3), (11.7, -72.9), (12.05, -72.2), (12.5, -71.7),
+    # Frontera con Venezuela
+    (11.85, -71.32), (11.35, -72.15), (10.95, -72.5), (10.45, -72.9), (9.3, -73.05), (9.05, -72.95),
+    (8.35, -72.38), (7.9, -72.45), (7.35, -72.45), (7.15, -71.5), (7.15, -70.7), (6.98, -70.1),
+    (6.1, -69.4), (6.3, -67.42), (5.0, -67.8), (4.05, -67.75), (3.0, -67.45), (2.2, -67.2), (1.2, -66.85),
+    # Frontera con Brasil
+    (1.75, -68.2), (1.7, -69.85), (1.05, -69.85), (0.6, -69.2), (-1.2, -69.45), (-2.9, -69.65),
+    (-4.23, -69.9),
+    # Frontera con Perú (trapecio amazónico y río Putumayo)
+    (-3.8, -70.72), (-2.25, -70.1), (-2.6, -71.2), (-2.5, -72.2), (-2.0, -73.2), (-1.2, -73.8),
+    (-0.8, -74.3), (-0.15, -75.2),
+    # Frontera con Ecuador
+    (0.15, -75.8), (0.35, -76.8), (0.3, -77.4), (0.85, -77.7), (1.2, -78.3), (1.45, -78.85),
+    # Pacífico y frontera con Panamá
+    (1.9, -78.95), (2.6, -78.0), (3.0, -77.65), (3.9, -77.4), (5.4, -77.55), (6.2, -77.5), (6.8, -77.75),
+    (7.2, -77.9), (7.9, -77.35), (8.3, -77.5),
+)
+CONTORNO_SAN_ANDRES = ((12.45, -81.8), (12.45, -81.3), (13.45, -81.3), (13.45, -81.8))
+
+
+def _distancias(lat, lon, coordenadas):
+    """Distancia equirectangular aproximada (km) de cada punto a cada municipio."""
+    lat_m, lon_m = coordenadas[:, 0], coordenadas[:, 1]
+    dlat = lat[:, None] - lat_m[None, :]
+    dlon = (lon[:, None] - lon_m[None, :]) * np.cos(np.radians((lat[:, None] + lat_m[None, :]) / 2))
+    return 111.2 * np.hypot(dlat, dlon)
+
+
+def _dentro_contorno(lat, lon, contorno):
+    """¿Está cada punto dentro del polígono? Rayo hacia +lon contra cada borde."""
+    a = np.asarray(contorno)
+    b = np.roll(a, -1, axis=0)
+    lat, lon = lat[:, None], lon[:, None]
+    cruza_lat = (a[:, 0] > lat) != (b[:, 0] > lat)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cruza = cruza_lat & (lon < a[:, 1] + (lat - a[:, 0]) * (b[:, 1] - a[:, 1]) / (b[:, 0] - a[:, 0]))
+    return np.count_nonzero(cruza, axis=1) % 2 == 1
+
+
+class MallaIrradiancia:
+    """Malla de HSP anual, índice de municipio más cercano y máscara del territorio."""
+
+    def __init__(self, coordenadas, hsp_municipios, bloque=4096):
+        self.lats = np.arange(LAT_MIN, LAT_MAX + RESOLUCION / 2, RESOLUCION)
+        self.lons = np.arange(LON_MIN, LON_MAX + RESOLUCION / 2, RESOLUCION)
+        lat_celdas, lon_celdas = (m.ravel() for m in np.meshgrid(self.lats, self.lons, indexing="ij"))
+        hsp = np.empty(lat_celdas.size)
+        cercano = np.empty(lat_celdas.size, dtype=np.int32)
+        colombia = np.empty(lat_celdas.size, dtype=bool)
+        for inicio in range(0, lat_celdas.size, bloque):
+            fin = inicio + bloque
+            lat, lon = lat_celdas[inicio:fin], lon_celdas[inicio:fin]
+            colombia[inicio:fin] = (_dentro_contorno(lat, lon, CONTORNO_COLOMBIA)
+                                    | _dentro_contorno(lat, lon, CONTORNO_SAN_ANDRES))
+            distancia = _distancias(lat, lon, coordenadas)
+            cercano[inicio:fin] = distancia.argmin(axis=1)
+            pesos = 1 / np.maximum(distancia, 1e-6) ** POTENCIA_IDW
+            hsp[inicio:fin] = (pesos @ hsp_municipios) / pesos.sum(axis=1)
+        forma = (self.lats.size, self.lons.size)
+        self.hsp = hsp.reshape(forma)
+        self.cercano = cercano.reshape(forma)
+        self.colombia = colombia.reshape(forma)
+
+    def _indices(self, lat, lon):
+        """Fila y columna fraccionarias en la malla y si el punto está en Colombia (celda más cercana)."""
+        fila = (np.asarray(lat, dtype=float) - LAT_MIN) / RESOLUCION
+        columna = (np.asarray(lon, dtype=float) - LON_MIN) / RESOLUCION
+        dentro = (fila >= 0) & (fila <= self.lats.size - 1) & (columna >= 0) & (columna <= self.lons.size - 1)
+        fila, columna = np.where(dentro, fila, 0), np.where(dentro, columna, 0)
+        dentro &= self.colombia[np.rint(fila).astype(int), np.rint(columna).astype(int)]
+        return fila, columna, dentro
+
+    def hsp_en(self, lat, lon):
+        """HSP anual por interpolación bilineal; NaN fuera de Colombia."""
+        fila, columna, dentro = self._indices(lat, lon)
+        f0 = np.minimum(np.floor(fila).astype(int), self.lats.size - 2)
+        c0 = np.minimum(np.floor(columna).astype(int), self.lons.size - 2)
+        df, dc = fila - f0, columna - c0
+        h = self.hsp
+        valor = (h[f0, c0] * (1 - df) * (1 - dc) + h[f0 + 1, c0] * df * (1 - dc)
+                 + h[f0, c0 + 1] * (1 - df) * dc + h[f0 + 1, c0 + 1] * df * dc)
+        return np.where(dentro, valor, np.nan)
+
+    def municipio_cercano(self, lat, lon):
+        """Fila del almacén del municipio más cercano (resolución de celda); -1 fuera de Colombia."""
+        fila, columna, dentro = self._indices(lat, lon)
+        return np.where(dentro, self.cercano[np.rint(fila).astype(int), np.rint(columna).astype(int)], -1)
+
+
+_malla = None
+_candado = threading.Lock()
+
+
+def malla():
+    """Malla compartida del proceso, construida en la primera consulta."""
+    global _malla
+    with _candado:
+        if _malla is None:
+            datos = almacen()
+            hsp_municipios = np.array([datos.hsp_anual(m) for m in datos.municipios])
+            _malla = MallaIrradiancia(datos.coordenadas, hsp_municipios)
+    return _malla
+
+
+def hsp_en(lat, lon):
+    return malla().hsp_en(lat, lon)
+
+
+def municipio_cercano(lat, lon):
+    """Nombre del municipio más cercano a un punto, o None fuera de Colombia."""
+    fila = malla().municipio_cercano(lat, lon).item()
+    return almacen().municipios[fila] if fila >= 0 else None
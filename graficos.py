@@ -0,0 +1,167 @@
+"""Figuras de Plotly de la app, memoizadas por las entradas que las definen.
+
+Cada rerun de Streamlit vuelve a pedir las figuras; si las entradas numéricas
+no cambiaron (p. ej. el usuario solo editó su nombre) se sirve la misma figura
+desde la caché del proceso.
+
+pandas y Plotly se importan dentro de cada figura: solo hacen falta cuando se
+muestran resultados, y sacarlos del arranque acelera el primer render de la app.
+"""
+from cache import memoizar
+from motor import PARAMETROS
+
+
+@memoizar(max_entradas=256)
+def figura_area(num_paneles, area_panel=PARAMETROS["area_panel"]):
+    """Treemap de la distribución de espacio (paneles vs pasillos)."""
+    import pandas as pd
+    import plotly.express as px
+
+    area_neta_paneles = num_paneles * area_panel
+    area_mantenimiento = area_neta_paneles * PARAMETROS["factor_mantenimiento"]
+    df_espacio = pd.DataFrame({
+        "Categoría": ["Paneles (Generación)", "Pasillos (Mantenimiento)"],
+        "Padre": ["Área Total", "Área Total"],
+        "Metros": [area_neta_paneles, area_mantenimiento]
+    })
+    fig_area = px.treemap(
+        df_espacio, path=["Padre", "Categoría"], values="Metros",
+        color="Categoría", color_discrete_map={"Paneles (Generación)": "#1f77b4", "Pasillos (Mantenimiento)": "#a6cee3"}
+    )
+    fig_area.update_traces(textinfo="label+value", texttemplate="%{label}<br>%{value:.1f} m²")
+    fig_area.update_layout(margin=dict(t=0, l=0, r=0, b=0), height=300)
+    return fig_area
+
+
+@memoizar(max_entradas=256)
+def figura_flujo(acumulado, acumulado_descontado):
+    """Barras del flujo de caja acumulado con la curva descontada superpuesta.
+
+    Recibe tuplas (hashables) con un valor por año, empezando en el año 0.
+    """
+    import plotly.graph_objects as go
+
+    años = list(range(len(acumulado)))
+    fig_p = go.Figure(data=[go.Bar(x=años, y=acumulado, name="Nominal",
+                                   marker_color=['#E74C3C' if v < 0 else '#2ECC71' for v in acumulado])])
+    fig_p.add_trace(go.Scatter(x=años, y=acumulado_descontado, name="Descontado", mode="lines+markers",
+                               line=dict(color="#34495E")))
+    fig_p.update_layout(xaxis_title="Año", yaxis_title="COP $", legend=dict(orientation="h"))
+    return fig_p
+
+
+@memoizar(max_entradas=256)
+def figura_histograma(bordes, conteos, titulo_x, color="#1f77b4", titulo_y="Escenarios"):
+    """Histograma ya agregado (bordes y conteos en tuplas), sin enviar las muestras al navegador."""
+    import plotly.graph_objects as go
+
+    centros = [(a + b) / 2 for a, b in zip(bordes[:-1], bordes[1:])]
+    fig = go.Figure(data=[go.Bar(x=centros, y=conteos, marker_color=color)])
+    fig.update_layout(xaxis_title=titulo_x, yaxis_title=titulo_y, bargap=0.02, height=280,
+                      margin=dict(t=10, l=0, r=0, b=0))
+    return fig
+
+
+@memoizar(max_entradas=256)
+def figura_escenarios(nombres, acumulados):
+    """Flujo de caja acumulado de varios escenarios superpuesto (una línea por escenario)."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for nombre, acumulado in zip(nombres, acumulados):
+        fig.add_trace(go.Scatter(x=list(range(len(acumulado))), y=acumulado, name=nombre, mode="lines+markers"))
+    fig.add_hline(y=0, line_color="#7F8C8D", line_dash="dot")
+    fig.update_layout(xaxis_title="Año", yaxis_title="COP $", legend=dict(orientation="h"))
+    return fig
+
+
+@memoizar(max_entradas=64)
+def figura_portafolio(ciudades, tramos, valores, titulo_y):
+    """Barras por ciudad apiladas por tramo de costo; ``valores`` es una tupla por tramo con un valor por ciudad."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Bar(x=ciudades, y=fila, name=tramo) for tramo, fila in zip(tramos, valores)])
+    fig.update_layout(barmode="stack", yaxis_title=titulo_y, legend=dict(orientation="h", title="Tramo"),
+                      height=380, margin=dict(t=10, l=0, r=0, b=0))
+    return fig
+
+
+@memoizar(max_entradas=64)
+def figura_mapa_calor(x, y, z, titulo_x, titulo_y, titulo_z, punto, ventana_x, ventana_y, escala="RdYlGn"):
+    """Mapa de calor de una malla ya calculada (``z``: una tupla por fila de ``y``).
+
+    ``punto`` marca el proyecto y las ventanas (mín, máx) fijan lo que se ve sin tocar la malla.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Heatmap(x=x, y=y, z=z, colorscale=escala, colorbar=dict(title=titulo_z),
+                                     hovertemplate=f"{titulo_x}: %{{x:,.0f}}<br>{titulo_y}: %{{y:,.2f}}"
+                                                   f"<br>{titulo_z}: %{{z:,.1f}}<extra></extra>")])
+    fig.add_trace(go.Scatter(x=[punto[0]], y=[punto[1]], mode="markers", name="Proyecto", showlegend=False,
+                             marker=dict(symbol="x", size=12, color="#34495E")))
+    fig.update_layout(xaxis=dict(title=titulo_x, range=ventana_x), yaxis=dict(title=titulo_y, range=ventana_y),
+                      height=420, margin=dict(t=10, l=0, r=0, b=0))
+    return fig
+
+
+@memoizar(max_entradas=64)
+def figura_tornado(parametros, base, bajo, alto, titulo_x):
+    """Tornado: barras horizontales desde el valor base, ordenadas por el rango de cada parámetro."""
+    import plotly.graph_objects as go
+
+    orden = sorted(range(len(parametros)), key=lambda i: abs(alto[i] - bajo[i]))
+    y = [parametros[i] for i in orden]
+    fig = go.Figure(data=[
+        go.Bar(y=y, x=[bajo[i] - base for i in orden], base=base, orientation="h", name="Parámetro −",
+               marker_color="#E74C3C"),
+        go.Bar(y=y, x=[alto[i] - base for i in orden], base=base, orientation="h", name="Parámetro +",
+               marker_color="#2ECC71"),
+    ])
+    fig.add_vline(x=base, line_color="#34495E")
+    fig.update_layout(barmode="overlay", xaxis_title=titulo_x, legend=dict(orientation="h"), height=420,
+                      margin=dict(t=10, l=0, r=0, b=0))
+    return fig
+
+
+@memoizar(max_entradas=64)
+def figura_techo(poligono, obstaculos, esquinas):
+    """Planta del techo con obstáculos y módulos; ``esquinas`` son 8 valores (4 esquinas x, y) por módulo.
+
+    Todos los módulos van en una sola traza (rectángulos separados por ``None``) para que
+    miles de módulos no sean miles de objetos en el navegador.
+    """
+    import plotly.graph_objects as go
+
+    def cerrado(puntos):
+        return [p[0] for p in puntos] + [puntos[0][0]], [p[1] for p in puntos] + [puntos[0][1]]
+
+    x, y = cerrado(poligono)
+    fig = go.Figure(data=[go.Scatter(x=x, y=y, mode="lines", name="Techo", line=dict(color="#34495E", width=2))])
+    for i, obstaculo in enumerate(obstaculos):
+        x, y = cerrado(obstaculo)
+        fig.add_trace(go.Scatter(x=x, y=y, mode="lines", fill="toself", fillcolor="#95A5A6", name="Obstáculo",
+                                 line=dict(color="#7F8C8D"), showlegend=i == 0))
+    x, y = [], []
+    for i in range(0, len(esquinas), 8):
+        modulo = esquinas[i:i + 8]
+        x += [modulo[0], modulo[2], modulo[4], modulo[6], modulo[0], None]
+        y += [modulo[1], modulo[3], modulo[5], modulo[7], modulo[1], None]
+    fig.add_trace(go.Scatter(x=x, y=y, mode="lines", fill="toself", fillcolor="#1f77b4", name="Módulos",
+                             line=dict(color="#0B3C5D", width=1), hoverinfo="skip"))
+    fig.update_layout(xaxis=dict(title="Este (m)"), yaxis=dict(title="Norte (m)", scaleanchor="x", scaleratio=1),
+                      legend=dict(orientation="h"), height=450, margin=dict(t=10, l=0, r=0, b=0))
+    return fig
+
+
+def metricas_cache():
+    """Aciertos/fallos de las cachés de figuras, por figura."""
+    return {
+        "figura_area": figura_area.cache.metricas(),
+        "figura_flujo": figura_flujo.cache.metricas(),
+        "figura_histograma": figura_histograma.cache.metricas(),
+        "figura_escenarios": figura_escenarios.cache.metricas(),
+        "figura_portafolio": figura_portafolio.cache.metricas(),
+        "figura_mapa_calor": figura_mapa_calor.cache.metricas(),
+        "figura_tornado": figura_tornado.cache.metricas(),
+        "figura_techo": figura_techo.cache.metricas(),
+    }
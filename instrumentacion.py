@@ -0,0 +1,150 @@
+"""Tiempos por fase de cada rerun de la app (opcional).
+
+Se activa con ``SOLARCOL_INSTRUMENTACION``:
+
+- ``1``: acumula tiempos por fase en el proceso (todas las sesiones) para el
+  panel de administración (``?admin=1`` en la URL de la app).
+- ``log``: además escribe una línea por rerun en el logger ``solarcol``.
+
+Con ``SOLARCOL_METRICAS_PUERTO=9108`` se sirve ``/metrics`` en formato de
+texto de Prometheus desde un hilo del mismo proceso, solo en ``127.0.0.1``
+salvo que ``SOLARCOL_METRICAS_HOST`` indique otra interfaz.
+
+Apagada, cada llamada es un ``if`` y nada más. Las fases se marcan en orden
+(``marcar`` cierra la fase que termina en ese punto); lo anidado (figuras,
+PDF) se mide con ``medir``. El script llama ``terminar()`` desde un
+``finally``, para que los reruns cortados por ``st.rerun()`` o por un error
+también cuenten.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+MODO = os.environ.get("SOLARCOL_INSTRUMENTACION", "").strip().lower()
+ACTIVA = MODO not in ("", "0", "false", "no")
+PUERTO_METRICAS = os.environ.get("SOLARCOL_METRICAS_PUERTO")
+HOST_METRICAS = os.environ.get("SOLARCOL_METRICAS_HOST", "127.0.0.1")
+MUESTRAS_POR_FASE = 5_000
+CUANTILES = (0.5, 0.9, 0.99)
+
+registro_log = logging.getLogger("solarcol")
+if MODO == "log" and not registro_log.handlers:
+    _manejador = logging.StreamHandler()
+    _manejador.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    registro_log.addHandler(_manejador)
+    registro_log.setLevel(logging.INFO)
+
+_muestras = {}
+_totales = {}
+_candado = threading.Lock()
+_servidor = None
+
+
+def registrar(fase, segundos):
+    """Agrega una duración a la fase (ventana de las últimas ``MUESTRAS_POR_FASE``)."""
+    with _candado:
+        _muestras.setdefault(fase, deque(maxlen=MUESTRAS_POR_FASE)).append(segundos)
+        cuenta, suma = _totales.get(fase, (0, 0.0))
+        _totales[fase] = (cuenta + 1, suma + segundos)
+
+
+def medir(fase, funcion, *args, **kwargs):
+    """Llama ``funcion`` y registra su duración en ``fase`` si la instrumentación está activa."""
+    if not ACTIVA:
+        return funcion(*args, **kwargs)
+    inicio = time.perf_counter()
+    try:
+        return funcion(*args, **kwargs)
+    finally:
+        registrar(fase, time.perf_counter() - inicio)
+
+
+class Rerun:
+    """Cronómetro de un rerun: ``marcar(fase)`` al final de cada fase y ``terminar()`` al final."""
+
+    def __init__(self):
+        if ACTIVA:
+            _iniciar_servidor()
+            self.inicio = self.ultimo = time.perf_counter()
+            self.fases = {}
+
+    def marcar(self, fase):
+        if ACTIVA:
+            ahora = time.perf_counter()
+            self.fases[fase] = ahora - self.ultimo
+            self.ultimo = ahora
+
+    def terminar(self):
+        if not ACTIVA:
+            return
+        self.fases["total"] = time.perf_counter() - self.inicio
+        for fase, segundos in self.fases.items():
+            registrar(fase, segundos)
+        if MODO == "log":
+            registro_log.info("rerun %s", " ".join(f"{f}={s * 1000:.1f}ms" for f, s in self.fases.items()))
+
+
+def percentiles():
+    """fase -> muestras, media y p50/p90/p99 en milisegundos."""
+    with _candado:
+        copia = {fase: np.fromiter(muestras, float) for fase, muestras in _muestras.items()}
+    resumen = {}
+    for fase, segundos in copia.items():
+        ms = segundos * 1000
+        resumen[fase] = {"muestras": len(ms), "media_ms": float(ms.mean())}
+        resumen[fase].update({f"p{round(q * 100)}_ms": float(v)
+                              for q, v in zip(CUANTILES, np.quantile(ms, CUANTILES))})
+    return resumen
+
+
+def prometheus():
+    """Las fases como un ``summary`` en formato de texto de Prometheus."""
+    with _candado:
+        copia = {fase: np.fromiter(muestras, float) for fase, muestras in _muestras.items()}
+        totales = dict(_totales)
+    lineas = ["# HELP solarcol_fase_segundos Duración de cada fase de un rerun de la app.",
+              "# TYPE solarcol_fase_segundos summary"]
+    for fase, segundos in copia.items():
+        for q, v in zip(CUANTILES, np.quantile(segundos, CUANTILES)):
+            lineas.append(f'solarcol_fase_segundos{{fase="{fase}",quantile="{q}"}} {v:.6f}')
+        cuenta, suma = totales[fase]
+        lineas.append(f'solarcol_fase_segundos_sum{{fase="{fase}"}} {suma:.6f}')
+        lineas.append(f'solarcol_fase_segundos_count{{fase="{fase}"}} {cuenta}')
+    return "\n".join(lineas) + "\n"
+
+
+class _Metricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        cuerpo = prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def _iniciar_servidor():
+    """Arranca una sola vez por proceso el endpoint ``/metrics`` si hay puerto configurado."""
+    global _servidor
+    if PUERTO_METRICAS is None or _servidor is not None:
+        return
+    with _candado:
+        if _servidor is None:
+            try:
+                _servidor = ThreadingHTTPServer((HOST_METRICAS, int(PUERTO_METRICAS)), _Metricas)
+            except OSError as e:
+                registro_log.warning("no se pudo abrir /metrics en el puerto %s: %s", PUERTO_METRICAS, e)
+                _servidor = False
+                return
+            threading.Thread(target=_servidor.serve_forever, name="solarcol-metricas", daemon=True).start()
@@ -0,0 +1,224 @@
+"""Almacén de irradiancia mensual y horaria por municipio.
+
+El almacén es un directorio con tres archivos:
+
+- ``indice.csv``: municipio, departamento, lat, lon y fila en las matrices.
+- ``mensual.npy``: HSP promedio diaria por mes, ``float64`` (n × 12).
+- ``horaria.npy``: irradiación horaria en kWh/m² (HSP por hora), ``float32``
+  (n × 8760). Para ~1.100 municipios son ~38 MB.
+
+Las matrices se abren con ``mmap_mode="r"`` la primera vez que se consultan,
+así que el arranque no las lee y los procesos comparten las páginas del
+sistema operativo en lugar de copiar la tabla completa.
+
+El almacén se construye fuera de línea y se despliega con la app; la app no
+escribe en el disco. Para cargar datos reales (IDEAM, NASA POWER, ...) por
+municipio:
+
+    python irradiancia.py construir municipios.csv
+
+donde el CSV tiene municipio, departamento, lat, lon y ene..dic (HSP diaria).
+Si el almacén no existe se usan en memoria las capitales de ``motor.hsp_data``
+con perfil mensual plano (~1 MB).
+"""
+import argparse
+import csv
+import os
+import sys
+import threading
+
+import numpy as np
+
+from motor import hsp_data
+
+RUTA_DEFECTO = os.environ.get(
+    "SOLARCOL_IRRADIANCIA", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "irradiancia"))
+
+MESES = ("ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sep", "oct", "nov", "dic")
+DIAS_MES = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+HORAS_AÑO = 8760
+
+# Coordenadas aproximadas de las capitales (lat, lon)
+COORDENADAS_CAPITALES = {
+    "Leticia": (-4.215, -69.941), "Medellín": (6.244, -75.581), "Arauca": (7.084, -70.759),
+    "Barranquilla": (10.964, -74.796), "Bogotá": (4.711, -74.072), "Bucaramanga": (7.119, -73.123),
+    "Cali": (3.452, -76.532), "Cartagena": (10.391, -75.479), "Florencia": (1.614, -75.606),
+    "Inírida": (3.865, -67.924), "Mocoa": (1.152, -76.647), "Neiva": (2.927, -75.282),
+    "Montería": (8.748, -75.881), "Pasto": (1.214, -77.281), "Pereira": (4.813, -75.696),
+    "Popayán": (2.444, -76.614), "Puerto Carreño": (6.189, -67.486), "Quibdó": (5.694, -76.661),
+    "Riohacha": (11.544, -72.907), "San Andrés": (12.584, -81.701), "San José del Guaviare": (2.572, -72.645),
+    "Santa Marta": (11.240, -74.199), "Sincelejo": (9.304, -75.397), "Mitú": (1.198, -70.173),
+    "Ibagué": (4.438, -75.232), "Tunja": (5.535, -73.368), "Villavicencio": (4.142, -73.627),
+    "Yopal": (5.337, -72.395), "Valledupar": (10.463, -73.253), "Manizales": (5.068, -75.517),
+    "Cúcuta": (7.893, -72.508),
+}
+# Nombres que apuntan al mismo municipio
+ALIAS = {"Puerto Inírida": "Inírida"}
+
+
+def forma_diaria():
+    """Fracción de la irradiación diaria en cada hora (suma 1).
+
+    Campana senoidal entre las 6:00 y las 18:00, razonable cerca del ecuador.
+    """
+    centro_hora = np.arange(24) + 0.5
+    forma = np.clip(np.sin(np.pi * (centro_hora - 6) / 12), 0, None)
+    return forma / forma.sum()
+
+
+def perfil_horario(mensual):
+    """Expande HSP mensuales (… × 12) a irradiación horaria (… × 8760)."""
+    mensual = np.asarray(mensual, dtype=float)
+    por_hora = np.repeat(mensual, DIAS_MES * 24, axis=-1)
+    return por_hora * np.tile(forma_diaria(), 365)
+
+
+def construir_almacen(ruta, municipios, mensual, bloque=256):
+    """Escribe un almacén nuevo en ``ruta``.
+
+    ``municipios`` es una lista de tuplas (municipio, departamento, lat, lon)
+    y ``mensual`` una matriz n × 12 de HSP diaria por mes. La matriz horaria se
+    escribe por bloques directamente al archivo, sin tenerla entera en memoria.
+    Cada archivo se escribe con un nombre temporal y se renombra al terminar,
+    ``horaria.npy`` al final: un lector que lo encuentra ve el almacén completo.
+    """
+    mensual = np.asarray(mensual, dtype=np.float64)
+    os.makedirs(ruta, exist_ok=True)
+    temporal = f".tmp-{os.getpid()}"
+    destino = os.path.join(ruta, "indice.csv")
+    with open(destino + temporal, "w", encoding="utf-8", newline="") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(["municipio", "departamento", "lat", "lon", "fila"])
+        for fila, (municipio, departamento, lat, lon) in enumerate(municipios):
+            escritor.writerow([municipio, departamento, lat, lon, fila])
+    os.replace(destino + temporal, destino)
+    destino = os.path.join(ruta, "mensual.npy")
+    with open(destino + temporal, "wb") as archivo:
+        np.save(archivo, mensual)
+    os.replace(destino + temporal, destino)
+    destino = os.path.join(ruta, "horaria.npy")
+    horaria = np.lib.format.open_memmap(destino + temporal, mode="w+",
+                                        dtype=np.float32, shape=(len(mensual), HORAS_AÑO))
+    for inicio in range(0, len(mensual), bloque):
+        horaria[inicio:inicio + bloque] = perfil_horario(mensual[inicio:inicio + bloque])
+    horaria.flush()
+    del horaria
+    os.replace(destino + temporal, destino)
+
+
+def datos_capitales():
+    """(municipios, mensual) de las capitales de ``hsp_data``, con perfil mensual plano."""
+    municipios = [(c, "", lat, lon) for c, (lat, lon) in COORDENADAS_CAPITALES.items()]
+    mensual = [[hsp_data[c]] * 12 for c in COORDENADAS_CAPITALES]
+    return municipios, mensual
+
+
+def construir_desde_capitales(ruta):
+    construir_almacen(ruta, *datos_capitales())
+
+
+def construir_desde_csv(ruta, ruta_csv):
+    municipios, mensual = [], []
+    with open(ruta_csv, encoding="utf-8") as archivo:
+        for fila in csv.DictReader(archivo):
+            municipios.append((fila["municipio"], fila.get("departamento", ""),
+                               float(fila["lat"]), float(fila["lon"])))
+            mensual.append([float(fila[mes]) for mes in MESES])
+    construir_almacen(ruta, municipios, mensual)
+
+
+class AlmacenIrradiancia:
+    """Acceso perezoso al almacén; nada se lee del disco hasta la primera consulta."""
+
+    def __init__(self, ruta=RUTA_DEFECTO):
+        self.ruta = ruta
+        self._candado = threading.Lock()
+        self._cargado = False
+
+    def _cargar(self):
+        with self._candado:
+            if self._cargado:
+                return
+            if os.path.exists(os.path.join(self.ruta, "horaria.npy")):
+                with open(os.path.join(self.ruta, "indice.csv"), encoding="utf-8") as archivo:
+                    filas = [(f["municipio"], f["departamento"], float(f["lat"]), float(f["lon"]))
+                             for f in csv.DictReader(archivo)]
+                self._mensual = np.load(os.path.join(self.ruta, "mensual.npy"), mmap_mode="r")
+                self._horaria = np.load(os.path.join(self.ruta, "horaria.npy"), mmap_mode="r")
+            else:
+                # Sin almacén desplegado: capitales en memoria, sin escribir en el disco
+                filas, mensual = datos_capitales()
+                self._mensual = np.asarray(mensual, dtype=np.float64)
+                self._horaria = perfil_horario(self._mensual).astype(np.float32)
+            self._municipios = [f[0] for f in filas]
+            self._departamentos = [f[1] for f in filas]
+            self._coordenadas = np.array([(f[2], f[3]) for f in filas])
+            self._filas = {m: i for i, m in enumerate(self._municipios)}
+            self._cargado = True
+
+    def _asegurar(self):
+        if not self._cargado:
+            self._cargar()
+
+    @property
+    def municipios(self):
+        self._asegurar()
+        return self._municipios
+
+    @property
+    def coordenadas(self):
+        """Matriz n × 2 de (lat, lon) en el orden de ``municipios``."""
+        self._asegurar()
+        return self._coordenadas
+
+    def fila(self, municipio):
+        self._asegurar()
+        municipio = ALIAS.get(municipio, municipio)
+        if municipio not in self._filas:
+            raise KeyError(f"Municipio sin datos de irradiancia: {municipio}")
+        return self._filas[municipio]
+
+    def mensual(self, municipio):
+        """HSP diaria promedio de cada mes (12 valores)."""
+        self._asegurar()
+        return np.asarray(self._mensual[self.fila(municipio)])
+
+    def horaria(self, municipio):
+        """Irradiación horaria del año típico (8760 valores, kWh/m²)."""
+        self._asegurar()
+        return self._horaria[self.fila(municipio)]
+
+    def hsp_anual(self, municipio):
+        """HSP diaria promedio del año, ponderada por días de cada mes."""
+        return float(self.mensual(municipio) @ DIAS_MES / 365)
+
+
+_almacen = None
+
+
+def almacen():
+    """Almacén compartido del proceso, en la ruta por defecto."""
+    global _almacen
+    if _almacen is None:
+        _almacen = AlmacenIrradiancia()
+    return _almacen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construye el almacén de irradiancia.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    construir = sub.add_parser("construir", help="crea el almacén desde un CSV mensual o las capitales")
+    construir.add_argument("csv", nargs="?", help="CSV con municipio, departamento, lat, lon, ene..dic")
+    construir.add_argument("--ruta", default=RUTA_DEFECTO, help="directorio del almacén")
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        construir_desde_csv(args.ruta, args.csv)
+    else:
+        construir_desde_capitales(args.ruta)
+    print(f"Almacén escrito en {args.ruta}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Análisis de riesgo Monte Carlo del payback y el VPN.
+
+Muestrea la radiación (HSP), el alza de la tarifa, el autoconsumo y el costo
+de inversión alrededor de los valores del proyecto y evalúa todas las
+muestras en una sola llamada vectorizada a ``finanzas.evaluar``.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cache import memoizar
+from finanzas import SUPUESTOS, evaluar
+from motor import PARAMETROS
+
+INCERTIDUMBRE = {
+    "hsp_desviacion": 0.07,               # desviación relativa de la HSP
+    "incremento_tarifa_desviacion": 0.02,  # desviación absoluta del alza anual
+    "autoconsumo_desviacion": 10,         # puntos porcentuales
+    "capex_minimo": 0.90,                 # multiplicador triangular de la inversión
+    "capex_moda": 1.00,
+    "capex_maximo": 1.25,
+}
+PERCENTILES = (10, 50, 90)
+
+
+def muestrear(rng, n, hsp, autoconsumo_directo, **incertidumbre):
+    """Muestras de las entradas inciertas (dict de arreglos de largo n)."""
+    u = {**INCERTIDUMBRE, **incertidumbre}
+    return {
+        "hsp": np.clip(rng.normal(hsp, hsp * u["hsp_desviacion"], n), 0, None),
+        "incremento_tarifa": rng.normal(SUPUESTOS["incremento_tarifa"], u["incremento_tarifa_desviacion"], n),
+        "autoconsumo_directo": np.clip(rng.normal(autoconsumo_directo, u["autoconsumo_desviacion"], n), 0, 100),
+        "factor_capex": rng.triangular(u["capex_minimo"], u["capex_moda"], u["capex_maximo"], n),
+    }
+
+
+def simular(kwp_instalado, hsp, inversion_total, tarifa_kwh, autoconsumo_directo, aplica_ley_1715,
+            n=100_000, semilla=None, bins=40, **incertidumbre):
+    """Distribución de payback y VPN de un proyecto ya dimensionado.
+
+    Devuelve percentiles P10/P50/P90, la probabilidad de no recuperar la
+    inversión en el horizonte y los histogramas (bordes, conteos).
+    """
+    rng = np.random.default_rng(semilla)
+    m = muestrear(rng, n, hsp, autoconsumo_directo, **incertidumbre)
+    inversion = inversion_total * m["factor_capex"]
+    gen_anual = kwp_instalado * m["hsp"] * PARAMETROS["eficiencia"] * 365
+    beneficio = np.where(aplica_ley_1715, (inversion * PARAMETROS["fraccion_deducible"] * PARAMETROS["tasa_renta"])
+                         / PARAMETROS["años_ley_1715"], 0)
+    r = evaluar(inversion, gen_anual, tarifa_kwh, m["autoconsumo_directo"], beneficio,
+                calcular_tir=False, incremento_tarifa=m["incremento_tarifa"])
+
+    payback = r["payback"]
+    recupera = ~np.isnan(payback)
+    resultado = {
+        "n": n,
+        "prob_sin_recuperar": float(1 - recupera.mean()),
+        "histograma_payback": np.histogram(payback[recupera], bins=bins) if recupera.any() else None,
+        "histograma_vpn": np.histogram(r["vpn"], bins=bins),
+    }
+    for p, valor in zip(PERCENTILES, np.percentile(r["vpn"], PERCENTILES)):
+        resultado[f"vpn_p{p}"] = float(valor)
+    # Las muestras que no recuperan cuentan como payback infinito.
+    for p, valor in zip(PERCENTILES, np.percentile(np.where(recupera, payback, np.inf), PERCENTILES,
+                                                     method="nearest")):
+        resultado[f"payback_p{p}"] = float(valor)
+    return resultado
+
+
+@memoizar(max_entradas=64)
+def simular_cacheado(kwp_instalado, hsp, inversion_total, tarifa_kwh, autoconsumo_directo, aplica_ley_1715):
+    """``simular`` con semilla fija, memoizado para los reruns de la app."""
+    return simular(kwp_instalado, hsp, inversion_total, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, semilla=0)
+
+
+def _simular_proyecto(argumentos):
+    proyecto, n, semilla = argumentos
+    resultado = simular(**proyecto, n=n, semilla=semilla)
+    resultado.pop("histograma_payback")
+    resultado.pop("histograma_vpn")
+    return resultado
+
+
+def simular_portafolio(proyectos, n=100_000, semilla=0, procesos=None):
+    """Percentiles por proyecto para una lista de dicts con los argumentos de ``simular``.
+
+    Con ``procesos`` > 1 los proyectos se reparten en un pool de procesos.
+    """
+    semillas = np.random.SeedSequence(semilla).spawn(len(proyectos))
+    tareas = [(proyecto, n, s) for proyecto, s in zip(proyectos, semillas)]
+    if procesos is None or procesos <= 1:
+        return [_simular_proyecto(t) for t in tareas]
+    with ProcessPoolExecutor(max_workers=min(procesos, os.cpu_count() or 1)) as pool:
+        return list(pool.map(_simular_proyecto, tareas, chunksize=max(1, len(tareas) // (4 * procesos))))
@@ -0,0 +1,174 @@
+"""Motor de cálculo de SolarCol Pro.
+
+Dimensionamiento y finanzas del sistema fotovoltaico sin dependencias de
+Streamlit. Todas las funciones aceptan escalares o arreglos y operan de forma
+vectorizada con NumPy, de modo que la app (un cliente) y los procesos por lote
+(miles de clientes) comparten exactamente la misma matemática.
+"""
+import numpy as np
+
+from curvas_costo import curvas
+
+# --- BASE DE DATOS HSP ---
+hsp_data = {
+    "Seleccionar": 0, "Leticia": 4.2, "Medellín": 4.2, "Arauca": 5.0, "Barranquilla": 5.5,
+    "Bogotá": 4.1, "Bucaramanga": 4.5, "Cali": 4.8, "Cartagena": 5.4, "Florencia": 3.8,
+    "Inírida": 4.5, "Mocoa": 3.5, "Neiva": 4.9, "Montería": 5.1, "Pasto": 4.2,
+    "Pereira": 4.0, "Popayán": 4.1, "Puerto Carreño": 5.8, "Quibdó": 3.2, "Riohacha": 6.1,
+    "San Andrés": 5.7, "San José del Guaviare": 4.2, "Santa Marta": 5.6, "Sincelejo": 5.0,
+    "Mitú": 4.0, "Ibagué": 4.6, "Tunja": 4.3, "Villavicencio": 4.1, "Yopal": 4.8,
+    "Valledupar": 5.6, "Manizales": 3.9, "Cúcuta": 5.2, "Puerto Inírida": 4.5
+}
+
+# --- PARÁMETROS DEL MODELO ---
+# Cualquier parámetro puede sobrescribirse por llamada (escalar o arreglo).
+PARAMETROS = {
+    "eficiencia": 0.80,
+    "potencia_panel": 550,                  # Wp por módulo
+    "area_panel": 2.6,                      # m² por módulo
+    "factor_mantenimiento": 0.15,           # pasillos sobre el área neta
+    "peso_panel": 28,                       # kg por módulo
+    "factor_seguridad_peso": 1.2,
+    "factor_remuneracion_excedente": 0.75,  # Ajustado un poco más alto para Colombia
+    "fraccion_deducible": 0.5,              # Ley 1715: 50% de la inversión
+    "tasa_renta": 0.35,
+    "años_ley_1715": 5,
+    "factor_co2": 0.126,                    # kg CO2 por kWh
+    "co2_por_arbol": 20,                    # kg CO2 por árbol al año
+}
+
+COLUMNAS = (
+    "hsp", "kwp_teorico", "num_paneles", "kwp_instalado", "inversion_total",
+    "area_neta_paneles", "area_mantenimiento", "area_total_estimada",
+    "peso_nominal", "peso_diseno_seguridad", "carga_distribuida",
+    "gen_anual", "ahorro_energia_anual", "beneficio_anual_renta",
+    "ahorro_total_anual", "payback", "co2_evitado_anual", "arboles_equivalentes",
+)
+
+
+def _parametros(sobrescritos):
+    desconocidos = set(sobrescritos) - set(PARAMETROS)
+    if desconocidos:
+        raise TypeError(f"Parámetros desconocidos: {', '.join(sorted(desconocidos))}")
+    return {**PARAMETROS, **sobrescritos}
+
+
+def hsp_ciudades(ciudad):
+    """Traduce nombres de ciudad a HSP; ciudades desconocidas quedan en 0."""
+    ciudad = np.asarray(ciudad).astype(str)
+    unicas, inverso = np.unique(ciudad, return_inverse=True)
+    valores = np.array([hsp_data.get(c, 0) for c in unicas], dtype=float)
+    return valores[inverso].reshape(ciudad.shape)
+
+
+def costo_inversion(kwp_instalado, version=None):
+    """Inversión total según la curva de costos (por defecto la vigente)."""
+    return curvas().inversion(kwp_instalado, version)
+
+
+def dimensionar(hsp, consumo_mes, num_paneles=None, **parametros):
+    """Potencia teórica, número de paneles y potencia instalada para cubrir el consumo.
+
+    Con ``num_paneles`` se fija el número de paneles en lugar de calcularlo.
+    """
+    p = _parametros(parametros)
+    hsp = np.asarray(hsp, dtype=float)
+    validos = hsp > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kwp_teorico = np.where(validos, (np.asarray(consumo_mes, dtype=float) / 30) / (hsp * p["eficiencia"]), np.nan)
+
+        potencia_panel = p["potencia_panel"]
+        paneles = np.ceil((kwp_teorico * 1000) / potencia_panel) if num_paneles is None else num_paneles
+        num_paneles = np.where(validos, paneles, 0).astype(np.int64)
+        kwp_instalado = np.where(validos, (num_paneles * potencia_panel) / 1000, np.nan)
+    return {"kwp_teorico": kwp_teorico, "num_paneles": num_paneles, "kwp_instalado": kwp_instalado}
+
+
+def calcular_lote(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, hsp=None,
+                  version_costos=None, num_paneles=None, **parametros):
+    """Calcula la propuesta completa para arreglos de clientes en una sola pasada.
+
+    Devuelve un dict columna -> ndarray con las llaves de ``COLUMNAS``. Las
+    filas con HSP no válida (p. ej. "Seleccionar") quedan con 0 paneles y NaN
+    en el resto de resultados. Si se pasa ``hsp`` se ignora ``ciudad``;
+    ``version_costos`` elige la curva de costos (por defecto la vigente) y
+    ``num_paneles`` fija el número de paneles en vez de dimensionarlo.
+    """
+    p = _parametros(parametros)
+    if hsp is None:
+        hsp = hsp_ciudades(ciudad)
+    hsp, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715 = np.broadcast_arrays(
+        np.asarray(hsp, dtype=float),
+        np.asarray(consumo_mes, dtype=float),
+        np.asarray(tarifa_kwh, dtype=float),
+        np.asarray(autoconsumo_directo, dtype=float),
+        np.asarray(aplica_ley_1715, dtype=bool),
+    )
+    validos = hsp > 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eficiencia = p["eficiencia"]
+        dimension = dimensionar(hsp, consumo_mes, num_paneles, **parametros)
+        kwp_teorico = dimension["kwp_teorico"]
+        num_paneles = dimension["num_paneles"]
+        kwp_instalado = dimension["kwp_instalado"]
+
+        inversion_total = costo_inversion(kwp_instalado, version_costos)
+
+        area_neta_paneles = np.where(validos, num_paneles * p["area_panel"], np.nan)
+        area_mantenimiento = area_neta_paneles * p["factor_mantenimiento"]
+        area_total_estimada = area_neta_paneles + area_mantenimiento
+
+        peso_nominal = np.where(validos, num_paneles * p["peso_panel"], np.nan)
+        peso_diseno_seguridad = peso_nominal * p["factor_seguridad_peso"]
+        carga_distribuida = peso_diseno_seguridad / area_neta_paneles
+
+        # Finanzas (Considerando esquema de medición neta casi 1 a 1)
+        gen_anual = kwp_instalado * hsp * eficiencia * 365
+
+        # El % de autoconsumo se ahorra 1 a 1; el excedente se castiga.
+        factor_remuneracion_excedente = p["factor_remuneracion_excedente"]
+        ahorro_energia_anual = (gen_anual * (autoconsumo_directo/100) * tarifa_kwh) + \
+                               (gen_anual * (1 - autoconsumo_directo/100) * tarifa_kwh * factor_remuneracion_excedente)
+
+        beneficio_anual_renta = np.where(
+            aplica_ley_1715,
+            (inversion_total * p["fraccion_deducible"] * p["tasa_renta"]) / p["años_ley_1715"],
+            0,
+        )
+        ahorro_total_anual = ahorro_energia_anual + beneficio_anual_renta
+        payback = inversion_total / ahorro_total_anual
+
+        co2_evitado_anual = gen_anual * p["factor_co2"]
+        arboles_equivalentes = co2_evitado_anual / p["co2_por_arbol"]
+
+    return {
+        "hsp": hsp, "kwp_teorico": kwp_teorico, "num_paneles": num_paneles,
+        "kwp_instalado": kwp_instalado, "inversion_total": inversion_total,
+        "area_neta_paneles": area_neta_paneles, "area_mantenimiento": area_mantenimiento,
+        "area_total_estimada": area_total_estimada, "peso_nominal": peso_nominal,
+        "peso_diseno_seguridad": peso_diseno_seguridad, "carga_distribuida": carga_distribuida,
+        "gen_anual": gen_anual, "ahorro_energia_anual": ahorro_energia_anual,
+        "beneficio_anual_renta": beneficio_anual_renta, "ahorro_total_anual": ahorro_total_anual,
+        "payback": payback, "co2_evitado_anual": co2_evitado_anual,
+        "arboles_equivalentes": arboles_equivalentes,
+    }
+
+
+def calcular_lote_df(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, hsp=None,
+                     version_costos=None, num_paneles=None, **parametros):
+    """Igual que ``calcular_lote`` pero devuelve un ``pandas.DataFrame``."""
+    import pandas as pd
+
+    return pd.DataFrame(calcular_lote(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715,
+                                      hsp=hsp, version_costos=version_costos, num_paneles=num_paneles,
+                                      **parametros))
+
+
+def calcular(ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, hsp=None,
+             version_costos=None, num_paneles=None, **parametros):
+    """Propuesta de un solo cliente como dict de escalares de Python."""
+    lote = calcular_lote([ciudad], [consumo_mes], [tarifa_kwh], [autoconsumo_directo],
+                         [aplica_ley_1715], hsp=None if hsp is None else [hsp], version_costos=version_costos,
+                         num_paneles=None if num_paneles is None else [num_paneles], **parametros)
+    return {columna: valores[0].item() for columna, valores in lote.items()}
@@ -0,0 +1,104 @@
+"""Búsqueda del tamaño óptimo del sistema.
+
+En lugar de cubrir siempre el 100 % del consumo, evalúa en lote todos los
+números de paneles entre 1 y ``factor_maximo`` veces el diseño base (para uno
+o varios modelos de panel) y devuelve los diseños que maximizan el VPN y
+minimizan el payback y el LCOE. Con más paneles crece el excedente, que se
+paga con descuento, así que el autoconsumo de cada candidato sale de la
+simulación horaria (con sumas acumuladas sobre las horas ordenadas, sin una
+matriz de candidatos × 8760). ``optimizar_cliente`` memoiza el resultado para
+los reruns de la app.
+"""
+import numpy as np
+
+from cache import memoizar
+from finanzas import evaluar
+from irradiancia import almacen
+from motor import PARAMETROS, costo_inversion, dimensionar
+from simulacion import perfil_carga
+
+CRITERIOS = {"vpn": np.nanargmax, "payback": np.nanargmin, "lcoe": np.nanargmin}
+
+
+def candidatos(hsp, consumo_mes, potencias=(PARAMETROS["potencia_panel"],), factor_maximo=2.0):
+    """Arreglos (potencia_panel, num_paneles) de todos los diseños a evaluar."""
+    potencia_panel, num_paneles = [], []
+    for potencia in potencias:
+        base = dimensionar(hsp, consumo_mes, potencia_panel=potencia)["num_paneles"].item()
+        n = np.arange(1, max(1, int(np.ceil(base * factor_maximo))) + 1)
+        potencia_panel.append(np.full(n.size, potencia))
+        num_paneles.append(n)
+    return np.concatenate(potencia_panel), np.concatenate(num_paneles)
+
+
+def evaluar_candidatos(potencia_panel, num_paneles, hsp, consumo_mes, tarifa_kwh, aplica_ley_1715,
+                       irradiancia_horaria=None, tipo_carga="Residencial", autoconsumo_directo=95):
+    """VPN, payback y LCOE de cada diseño candidato en una pasada.
+
+    Con ``irradiancia_horaria`` (8760 valores) el autoconsumo de cada
+    candidato se simula hora a hora; sin ella se usa ``autoconsumo_directo``
+    limitado a lo que el consumo del cliente puede absorber.
+    """
+    p = PARAMETROS
+    kwp_instalado = num_paneles * potencia_panel / 1000
+    inversion_total = costo_inversion(kwp_instalado)
+    gen_anual = kwp_instalado * hsp * p["eficiencia"] * 365
+
+    if irradiancia_horaria is not None:
+        # La generación es lineal en kWp: con g la de 1 kWp y r = carga / g en cada hora,
+        # min(kWp · g, carga) = g · min(kWp, r). Con las horas ordenadas por r una sola vez, el
+        # autoconsumo de cada candidato sale de sumas acumuladas, sin una matriz candidatos × 8760.
+        escala = hsp * 365 / np.sum(irradiancia_horaria)
+        unitaria = np.asarray(irradiancia_horaria, dtype=float) * escala * p["eficiencia"]
+        carga = perfil_carga(consumo_mes, tipo_carga)
+        sol = unitaria > 0
+        razon = carga[sol] / unitaria[sol]
+        orden = np.argsort(razon)
+        razon = razon[orden]
+        carga_cubierta = np.concatenate([[0], np.cumsum(carga[sol][orden])])      # horas con r <= kWp
+        generacion_restante = np.sum(unitaria) - np.concatenate([[0], np.cumsum(unitaria[sol][orden])])
+        k = np.searchsorted(razon, kwp_instalado, side="right")
+        autoconsumo_kwh = carga_cubierta[k] + kwp_instalado * generacion_restante[k]
+        autoconsumo = 100 * autoconsumo_kwh / gen_anual
+    else:
+        consumo_anual = consumo_mes / 30 * 365
+        autoconsumo = np.minimum(autoconsumo_directo, 100 * consumo_anual / gen_anual)
+
+    beneficio = np.where(aplica_ley_1715, (inversion_total * p["fraccion_deducible"] * p["tasa_renta"])
+                         / p["años_ley_1715"], 0)
+    r = evaluar(inversion_total, gen_anual, tarifa_kwh, autoconsumo, beneficio, calcular_tir=False)
+    return {
+        "potencia_panel": potencia_panel, "num_paneles": num_paneles, "kwp_instalado": kwp_instalado,
+        "inversion_total": inversion_total, "gen_anual": gen_anual, "autoconsumo": autoconsumo,
+        "vpn": r["vpn"], "payback": r["payback"], "lcoe": r["lcoe"],
+    }
+
+
+def optimizar(hsp, consumo_mes, tarifa_kwh, aplica_ley_1715, irradiancia_horaria=None,
+              tipo_carga="Residencial", autoconsumo_directo=95,
+              potencias=(PARAMETROS["potencia_panel"],), factor_maximo=2.0):
+    """Diseños óptimos por criterio: {"vpn": {...}, "payback": {...}, "lcoe": {...}}.
+
+    Cada diseño es un dict de escalares con las columnas de ``evaluar_candidatos``.
+    Un criterio es None si ningún candidato tiene valor (p. ej. el payback cuando
+    ningún tamaño recupera la inversión en el horizonte).
+    """
+    potencia_panel, num_paneles = candidatos(hsp, consumo_mes, potencias, factor_maximo)
+    tabla = evaluar_candidatos(potencia_panel, num_paneles, hsp, consumo_mes, tarifa_kwh, aplica_ley_1715,
+                               irradiancia_horaria, tipo_carga, autoconsumo_directo)
+    optimos = {}
+    for criterio, elegir in CRITERIOS.items():
+        if np.isnan(tabla[criterio]).all():
+            optimos[criterio] = None
+            continue
+        optimos[criterio] = {columna: valores[elegir(tabla[criterio])].item() for columna, valores in tabla.items()}
+    return optimos
+
+
+@memoizar(max_entradas=64)
+def optimizar_cliente(municipio, hsp, consumo_mes, tarifa_kwh, aplica_ley_1715, tipo_carga, autoconsumo_directo,
+                      potencias):
+    """``optimizar`` con la irradiancia horaria de ``municipio`` (None = sin simulación), memoizado para la app."""
+    irradiancia_horaria = None if municipio is None else almacen().horaria(municipio)
+    return optimizar(hsp, consumo_mes, tarifa_kwh, aplica_ley_1715, irradiancia_horaria, tipo_carga,
+                     autoconsumo_directo, potencias)
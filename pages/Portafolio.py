@@ -0,0 +1,105 @@
+import json
+
+import streamlit as st
+
+from curvas_costo import curvas, version_vigente
+from graficos import figura_histograma, figura_portafolio
+from portafolio import CIUDADES, evaluar_archivo
+
+st.set_page_config(page_title="SolarCol Pro · Portafolio", layout="wide", page_icon="☀️")
+
+st.title("🏙️ Portafolio de Sitios")
+st.caption("Sube un CSV o Parquet con una fila por techo (ciudad, consumo_mes, tarifa_kwh y, opcionales, "
+           "autoconsumo_directo y aplica_ley_1715). Se cotizan todos los sitios y se muestran solo agregados "
+           "por ciudad y tramo de la curva de costos.")
+
+c_archivo, c_version = st.columns([3, 1])
+with c_archivo:
+    archivo = st.file_uploader("Archivo de sitios", type=["csv", "parquet"])
+with c_version:
+    versiones = list(curvas().curvas)
+    version_costos = st.selectbox("Curva de costos", versiones, index=versiones.index(version_vigente()))
+
+if archivo is None:
+    st.info("📂 Sube un archivo de sitios para ver el portafolio.")
+    st.stop()
+
+# El resumen se guarda en la sesión: los reruns (cambiar de pestaña, de métrica) no vuelven a cotizar
+llave = (archivo.file_id, version_costos)
+if st.session_state.get("portafolio_llave") != llave:
+    with st.spinner("Cotizando sitios..."):
+        try:
+            portafolio = evaluar_archivo(archivo, version_costos, parquet=archivo.name.endswith(".parquet"))
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
+            st.stop()
+    st.session_state.portafolio_llave = llave
+    st.session_state.portafolio = portafolio
+    st.session_state.portafolio_resumen = portafolio.resumen()
+portafolio = st.session_state.portafolio
+resumen = st.session_state.portafolio_resumen
+total = resumen["total"]
+
+if not total["sitios"]:
+    st.warning(f"⚠️ Ningún sitio válido ({resumen['rechazados']:,} filas rechazadas).")
+    st.stop()
+
+m1, m2, m3, m4, m5 = st.columns(5)
+m1.metric("Sitios", f"{total['sitios']:,}", delta=f"{resumen['rechazados']:,} rechazados", delta_color="off")
+m2.metric("Capacidad", f"{total['kwp_instalado'] / 1000:,.1f} MWp")
+m3.metric("Inversión", f"${total['inversion_total'] / 1e9:,.1f} mil M")
+m4.metric("Generación", f"{total['gen_anual'] / 1e6:,.1f} GWh/año")
+m5.metric("CO2 Evitado", f"{total['co2_evitado_anual'] / 1000:,.0f} t/año")
+
+st.divider()
+METRICAS = {
+    "Capacidad (MWp)": ("kwp_instalado", 1e-3),
+    "Inversión (mil M COP)": ("inversion_total", 1e-9),
+    "Generación (GWh/año)": ("gen_anual", 1e-6),
+    "CO2 evitado (t/año)": ("co2_evitado_anual", 1e-3),
+    "Sitios": (None, 1),
+}
+metrica = st.radio("Métrica por ciudad", list(METRICAS), horizontal=True)
+columna, escala = METRICAS[metrica]
+
+# Matriz ciudad × tramo ya agregada: unas pocas decenas de barras sin importar cuántos sitios haya
+con_sitios = portafolio.sitios.sum(axis=1) > 0
+matriz = portafolio.sitios if columna is None else portafolio.sumas[columna]
+st.plotly_chart(figura_portafolio(
+    tuple(c for c, activa in zip(CIUDADES, con_sitios) if activa), tuple(portafolio.tramos),
+    tuple(tuple((matriz[con_sitios, j] * escala).round(3).tolist()) for j in range(len(portafolio.tramos))),
+    metrica), use_container_width=True)
+
+c_tabla, c_payback = st.columns([3, 2])
+with c_tabla:
+    st.subheader("📋 Resumen por Ciudad")
+    st.dataframe([
+        {
+            "Ciudad": f["ciudad"],
+            "Sitios": f["sitios"],
+            "MWp": round(f["kwp_instalado"] / 1000, 2),
+            "Inversión (mil M COP)": round(f["inversion_total"] / 1e9, 2),
+            "GWh/año": round(f["gen_anual"] / 1e6, 2),
+            "t CO2/año": round(f["co2_evitado_anual"] / 1000),
+            "Payback agregado (años)": round(f["payback_agregado"], 1),
+        }
+        for f in resumen["por_ciudad"]
+    ], hide_index=True, use_container_width=True)
+    st.subheader("🧱 Por Tramo de Costo")
+    st.dataframe([
+        {"Tramo": f["tramo"], "Sitios": f["sitios"], "MWp": round(f["kwp_instalado"] / 1000, 2),
+         "Inversión (mil M COP)": round(f["inversion_total"] / 1e9, 2),
+         "Payback agregado (años)": round(f["payback_agregado"], 1)}
+        for f in resumen["por_tramo"]
+    ], hide_index=True, use_container_width=True)
+with c_payback:
+    st.subheader("⏳ Distribución del Payback")
+    bordes = resumen["payback"]["bordes"]
+    st.plotly_chart(figura_histograma(tuple(bordes + [bordes[-1] + 1]), tuple(resumen["payback"]["conteos"]),
+                                      "Años (la última barra agrupa 30 o más)", "#F39C12", "Sitios"),
+                    use_container_width=True)
+    st.caption(f"Curva de costos {resumen['version_costos']}. El payback agregado es inversión total "
+               "sobre ahorro total del grupo.")
+
+st.download_button("📥 Descargar resumen (JSON)", data=json.dumps(resumen, ensure_ascii=False),
+                   file_name="portafolio.json", mime="application/json")
@@ -0,0 +1,156 @@
+"""Generación masiva de propuestas en PDF.
+
+Cotiza un archivo de leads con ``cotizar_leads`` y reparte el renderizado de
+los PDF entre un pool de procesos. La salida puede ser un directorio (un PDF
+por cliente) o un único ZIP (``-`` escribe el ZIP a stdout).
+
+Reanudación: en modo directorio se omiten los PDF que ya existen; en modo ZIP
+se omiten las entradas presentes en el archivo, que se cierra de forma
+ordenada ante Ctrl+C o SIGTERM.
+
+Uso:
+    python pdf_lote.py leads.csv --directorio propuestas/ --procesos 8
+    python pdf_lote.py leads.parquet --zip propuestas.zip
+"""
+import argparse
+import os
+import re
+import signal
+import sys
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from cotizar_leads import cotizar_bloque, leer_por_bloques
+from pdf_propuesta import a_latin1, datos_propuesta, generar_pdf
+
+
+def nombre_archivo(indice, nombre_cliente):
+    """Nombre estable por fila para poder reanudar una corrida interrumpida."""
+    limpio = unicodedata.normalize("NFKD", str(nombre_cliente)).encode("ascii", "ignore").decode()
+    limpio = re.sub(r"[^\w-]+", "_", limpio).strip("_")[:60]
+    return f"Propuesta_{indice:07d}_{limpio}.pdf"
+
+
+def tareas(ruta, tamaño_bloque, omitir, conteo):
+    """Genera (nombre_archivo, datos) para cada lead válido que no esté en ``omitir``.
+
+    Los leads omitidos por estar ya generados se suman en ``conteo["omitidos"]``.
+    """
+    indice = 0
+    for bloque in leer_por_bloques(ruta, tamaño_bloque):
+        cotizado = cotizar_bloque(bloque)
+        for fila in cotizado.itertuples(index=False):
+            indice += 1
+            if fila.motivo_rechazo:
+                continue
+            nombre = nombre_archivo(indice, fila.nombre)
+            if nombre in omitir:
+                conteo["omitidos"] += 1
+                continue
+            # Los nombres con caracteres fuera de latin-1 se transliteran en vez de perder el PDF
+            yield nombre, datos_propuesta(a_latin1(fila.nombre), fila.ciudad, fila.kwp_instalado,
+                                          fila.inversion_total, fila.payback, payback_simple=True)
+
+
+def _agrupar(iterable, tamaño):
+    grupo = []
+    for elemento in iterable:
+        grupo.append(elemento)
+        if len(grupo) == tamaño:
+            yield grupo
+            grupo = []
+    if grupo:
+        yield grupo
+
+
+def _renderizar(grupo, directorio=None):
+    """Trabajo de cada proceso: renderiza un grupo de propuestas.
+
+    Con ``directorio`` escribe los archivos (vía temporal + rename, para que
+    un PDF a medias nunca cuente como terminado) y devuelve solo los nombres.
+    """
+    resultados, fallidos = [], 0
+    for nombre, datos in grupo:
+        try:
+            contenido = generar_pdf(datos)
+        except UnicodeEncodeError:
+            fallidos += 1
+            continue
+        if directorio is None:
+            resultados.append((nombre, contenido))
+        else:
+            destino = os.path.join(directorio, nombre)
+            with open(destino + ".tmp", "wb") as archivo:
+                archivo.write(contenido)
+            os.replace(destino + ".tmp", destino)
+            resultados.append((nombre, None))
+    return resultados, fallidos
+
+
+def _terminar_con_interrupcion(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _recoger(futuro, archivo_zip, generados, fallidos):
+    resultados, fallos = futuro.result()
+    if archivo_zip is not None:
+        for nombre, contenido in resultados:
+            archivo_zip.writestr(nombre, contenido)
+    return generados + len(resultados), fallidos + fallos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera propuestas PDF en lote a partir de un archivo de leads.")
+    parser.add_argument("entrada", help="archivo de leads (.csv o .parquet)")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--directorio", help="directorio de salida, un PDF por cliente")
+    destino.add_argument("--zip", help="archivo ZIP de salida ('-' para stdout)")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="procesos de renderizado")
+    parser.add_argument("--grupo", type=int, default=200, help="PDF por tarea enviada a cada proceso")
+    parser.add_argument("--bloque", type=int, default=100_000, help="filas leídas por bloque")
+    args = parser.parse_args(argv)
+
+    signal.signal(signal.SIGTERM, _terminar_con_interrupcion)
+    archivo_zip, omitir, directorio = None, set(), args.directorio
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+        omitir = {n for n in os.listdir(directorio) if n.endswith(".pdf")}
+    elif args.zip == "-":
+        archivo_zip = zipfile.ZipFile(sys.stdout.buffer, "w", zipfile.ZIP_STORED)
+    else:
+        modo = "a" if os.path.exists(args.zip) else "w"
+        archivo_zip = zipfile.ZipFile(args.zip, modo, zipfile.ZIP_STORED)
+        omitir = set(archivo_zip.namelist())
+
+    inicio = time.perf_counter()
+    generados = fallidos = 0
+    conteo = {"omitidos": 0}
+    grupos = _agrupar(tareas(args.entrada, args.bloque, omitir, conteo), args.grupo)
+    try:
+        with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+            # Se mantienen pocas tareas en vuelo para no cargar todo el archivo en memoria.
+            pendientes = []
+            for grupo in grupos:
+                pendientes.append(pool.submit(_renderizar, grupo, directorio))
+                if len(pendientes) >= 2 * args.procesos:
+                    generados, fallidos = _recoger(pendientes.pop(0), archivo_zip, generados, fallidos)
+            while pendientes:
+                generados, fallidos = _recoger(pendientes.pop(0), archivo_zip, generados, fallidos)
+    except KeyboardInterrupt:
+        print("Interrumpido: vuelva a ejecutar el mismo comando para reanudar.", file=sys.stderr)
+    finally:
+        if archivo_zip is not None:
+            archivo_zip.close()
+    segundos = time.perf_counter() - inicio
+
+    print(f"PDF generados: {generados:,} | Omitidos (ya existían): {conteo['omitidos']:,} | Fallidos: {fallidos:,}",
+          file=sys.stderr)
+    print(f"Tiempo: {segundos:.2f} s | Rendimiento: {generados / max(segundos, 1e-9):,.0f} docs/s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Generación del PDF de la propuesta técnica-económica."""
+import hashlib
+import json
+import math
+import unicodedata
+
+from cache import CacheLRU
+from finanzas import SUPUESTOS
+
+# PDF ya renderizados, por hash del contenido de la propuesta (máx. 64 MB por proceso)
+_cache_pdf = CacheLRU(max_entradas=4096, max_peso=64 * 1024 * 1024, peso=len)
+
+
+def texto_payback(años, unidad="años"):
+    """Payback legible; si no hay recuperación (NaN o infinito) dice que supera el horizonte."""
+    texto = f"{años:.1f}" if math.isfinite(años) else f"> {SUPUESTOS['años']}"
+    return f"{texto} {unidad}" if unidad else texto
+
+
+def datos_propuesta(nombre_cliente, ciudad, kwp_instalado, inversion_total, payback, payback_simple=False):
+    """Campos que se imprimen en el PDF, con el mismo formato que la app.
+
+    ``payback`` es el del flujo de caja (``finanzas``) que muestra la app; con
+    ``payback_simple`` es inversión / ahorro del primer año y se rotula así.
+    """
+    return {
+        "Cliente": nombre_cliente,
+        "Ciudad": ciudad,
+        "Capacidad": f"{kwp_instalado:.2f} kWp",
+        "Inversión": f"${inversion_total:,.0f} COP",
+        "Payback simple" if payback_simple else "Payback": texto_payback(payback)
+    }
+
+
+def a_latin1(texto):
+    """Texto que las fuentes base de FPDF pueden imprimir: lo que no está en latin-1 se translitera (ő → o)."""
+    texto = str(texto)
+    try:
+        texto.encode("latin-1")
+        return texto
+    except UnicodeEncodeError:
+        pass
+    caracteres = []
+    for c in texto:
+        if ord(c) > 0xFF:
+            c = unicodedata.normalize("NFKD", c).encode("latin-1", "ignore").decode("latin-1") or "?"
+        caracteres.append(c)
+    return "".join(caracteres)
+
+
+def generar_pdf(datos):
+    from fpdf import FPDF  # solo al generar el primer PDF, no al arrancar la app
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(200, 10, txt="Propuesta Técnica-Económica SolarCol Pro", ln=True, align='C')
+    pdf.ln(10)
+    pdf.set_font("Arial", size=12)
+    for clave, valor in datos.items():
+        pdf.cell(200, 10, txt=f"{clave}: {valor}", ln=True)
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def huella_propuesta(datos):
+    """Hash del contenido de la propuesta; el orden de los campos cuenta."""
+    serializado = json.dumps(list(datos.items()), ensure_ascii=False, default=str)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+def generar_pdf_cacheado(datos):
+    """Como ``generar_pdf`` pero reutiliza los bytes de propuestas idénticas."""
+    huella = huella_propuesta(datos)
+    contenido = _cache_pdf.obtener(huella)
+    if contenido is None:
+        contenido = generar_pdf(datos)
+        _cache_pdf.guardar(huella, contenido)
+    return contenido
+
+
+def metricas_cache():
+    return {**_cache_pdf.metricas(), "bytes": _cache_pdf.peso_total}
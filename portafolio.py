@@ -0,0 +1,163 @@
+"""Modo portafolio: evalúa de una vez todos los sitios de una ciudad o del pipeline de un instalador.
+
+Los sitios se leen por bloques (CSV o Parquet, como en ``cotizar_leads``), se
+cotizan con ``calcular_lote`` y de cada bloque solo se guardan sumas por
+ciudad y tramo de la curva de costos (``np.bincount`` sobre una llave entera)
+y un histograma de payback con bordes fijos. La memoria no depende del número
+de sitios y los tableros dibujan unas decenas de barras, no una por sitio.
+
+Uso:
+    python portafolio.py sitios.parquet
+    python portafolio.py sitios.csv --version-costos v10 -o resumen.json
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from cotizar_leads import ALIAS, AUTOCONSUMO_DEFECTO, leer_por_bloques
+from curvas_costo import curvas, version_vigente
+from motor import calcular_lote, hsp_data
+
+CIUDADES = tuple(sorted(c for c, hsp in hsp_data.items() if hsp > 0))
+_HSP = np.array([hsp_data[c] for c in CIUDADES])
+COLUMNAS_ENTRADA = ("ciudad", "consumo_mes", "tarifa_kwh")
+SUMAS = ("kwp_instalado", "inversion_total", "gen_anual", "ahorro_total_anual", "co2_evitado_anual")
+# Payback en años; el último grupo reúne todo lo que pasa de 30
+BORDES_PAYBACK = np.arange(0, 31, 1.0)
+
+
+def indices_ciudad(ciudad):
+    """Posición de cada ciudad en ``CIUDADES`` (-1 si no tiene HSP conocida)."""
+    import pandas as pd
+
+    if not isinstance(ciudad, pd.Series):
+        ciudad = np.asarray(ciudad, dtype=object).ravel()
+    codigos, unicas = pd.factorize(ciudad)
+    posicion = {c: i for i, c in enumerate(CIUDADES)}
+    return np.array([posicion.get(c, -1) for c in unicas] + [-1], dtype=np.int64)[codigos]
+
+
+class Portafolio:
+    """Acumulador de sitios por ciudad y tramo de costo; ``agregar`` se llama una vez por bloque."""
+
+    def __init__(self, version_costos=None):
+        self.version_costos = version_costos or version_vigente()
+        self.curva = curvas()[self.version_costos]
+        self.tramos = self.curva.etiquetas()
+        self.forma = (len(CIUDADES), len(self.tramos))
+        self.sitios = np.zeros(self.forma, dtype=np.int64)
+        self.sumas = {c: np.zeros(self.forma) for c in SUMAS}
+        self.conteo_payback = np.zeros(len(BORDES_PAYBACK), dtype=np.int64)
+        self.rechazados = 0
+
+    def agregar(self, ciudad, consumo_mes, tarifa_kwh, autoconsumo_directo=AUTOCONSUMO_DEFECTO,
+                aplica_ley_1715=False):
+        """Cotiza un bloque de sitios y suma sus resultados; las filas inválidas solo se cuentan."""
+        indice, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715 = np.broadcast_arrays(
+            indices_ciudad(ciudad),
+            np.asarray(consumo_mes, dtype=float),
+            np.asarray(tarifa_kwh, dtype=float),
+            np.asarray(autoconsumo_directo, dtype=float),
+            np.asarray(aplica_ley_1715, dtype=bool),
+        )
+        validos = (indice >= 0) & (consumo_mes > 0) & (tarifa_kwh > 0)
+        self.rechazados += int(validos.size - np.count_nonzero(validos))
+        indice = indice[validos]
+
+        r = calcular_lote(None, consumo_mes[validos], tarifa_kwh[validos], autoconsumo_directo[validos],
+                          aplica_ley_1715[validos], hsp=_HSP[indice], version_costos=self.version_costos)
+        llave = indice * self.forma[1] + self.curva.segmento(r["kwp_instalado"])
+        n = self.sitios.size
+        self.sitios += np.bincount(llave, minlength=n).reshape(self.forma)
+        for columna in SUMAS:
+            self.sumas[columna] += np.bincount(llave, weights=r[columna], minlength=n).reshape(self.forma)
+        grupo_payback = np.clip(np.searchsorted(BORDES_PAYBACK, r["payback"], side="right") - 1,
+                                0, len(BORDES_PAYBACK) - 1)
+        self.conteo_payback += np.bincount(grupo_payback, minlength=len(BORDES_PAYBACK))
+
+    def agregar_df(self, df):
+        """Igual que ``agregar`` para un DataFrame de sitios (acepta los alias de ``cotizar_leads``)."""
+        import pandas as pd
+
+        df = df.rename(columns=ALIAS)
+        faltantes = [c for c in COLUMNAS_ENTRADA if c not in df.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+        if "autoconsumo_directo" in df.columns:
+            autoconsumo = pd.to_numeric(df["autoconsumo_directo"], errors="coerce").fillna(AUTOCONSUMO_DEFECTO)
+        else:
+            autoconsumo = AUTOCONSUMO_DEFECTO
+        if "aplica_ley_1715" in df.columns:
+            ley_1715 = df["aplica_ley_1715"].astype(str).str.strip().str.lower().isin(("1", "true", "si", "sí"))
+        else:
+            ley_1715 = False
+        self.agregar(df["ciudad"],
+                     pd.to_numeric(df["consumo_mes"], errors="coerce").to_numpy(dtype=float),
+                     pd.to_numeric(df["tarifa_kwh"], errors="coerce").to_numpy(dtype=float),
+                     np.asarray(autoconsumo, dtype=float), np.asarray(ley_1715, dtype=bool))
+
+    def resumen(self):
+        """Totales, tablas por ciudad, por tramo y por ciudad×tramo, e histograma de payback (JSON serializable)."""
+        def fila(sitios, sumas):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                payback = sumas["inversion_total"] / sumas["ahorro_total_anual"]
+            return {"sitios": int(sitios), **{c: float(v) for c, v in sumas.items()},
+                    "payback_agregado": float(payback) if sitios else None}
+
+        def sumas(seleccion):
+            return {c: v[seleccion].sum() for c, v in self.sumas.items()}
+
+        por_ciudad = self.sitios.sum(axis=1)
+        por_tramo = self.sitios.sum(axis=0)
+        return {
+            "version_costos": self.version_costos,
+            "rechazados": self.rechazados,
+            "total": fila(self.sitios.sum(), sumas(...)),
+            "por_ciudad": [{"ciudad": CIUDADES[i], **fila(por_ciudad[i], sumas(i))}
+                           for i in np.flatnonzero(por_ciudad)],
+            "por_tramo": [{"tramo": self.tramos[j], **fila(por_tramo[j], sumas((slice(None), j)))}
+                          for j in np.flatnonzero(por_tramo)],
+            "por_ciudad_tramo": [{"ciudad": CIUDADES[i], "tramo": self.tramos[j],
+                                  **fila(self.sitios[i, j], sumas((i, j)))} for i, j in zip(*np.nonzero(self.sitios))],
+            # El último conteo reúne los sitios con payback de 30 años o más
+            "payback": {"bordes": BORDES_PAYBACK.tolist(), "conteos": self.conteo_payback.tolist()},
+        }
+
+
+def evaluar_archivo(ruta, version_costos=None, tamaño_bloque=500_000, parquet=None):
+    """Portafolio de un archivo de sitios leído por bloques (``ruta`` puede ser un archivo abierto)."""
+    portafolio = Portafolio(version_costos)
+    for bloque in leer_por_bloques(ruta, tamaño_bloque, parquet):
+        portafolio.agregar_df(bloque)
+    return portafolio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumen agregado de un portafolio de sitios (CSV o Parquet).")
+    parser.add_argument("entrada", help="archivo de sitios (.csv o .parquet) con ciudad, consumo_mes y tarifa_kwh")
+    parser.add_argument("-o", "--salida", help="archivo JSON del resumen (por defecto stdout)")
+    parser.add_argument("--bloque", type=int, default=500_000, help="filas por bloque (por defecto 500000)")
+    parser.add_argument("--version-costos", help="versión de la curva de costos (por defecto la vigente)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    resumen = evaluar_archivo(args.entrada, args.version_costos, args.bloque).resumen()
+    segundos = time.perf_counter() - inicio
+    filas = resumen["total"]["sitios"] + resumen["rechazados"]
+
+    informe = json.dumps(resumen, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(informe + "\n")
+    else:
+        print(informe)
+    print(f"Sitios: {resumen['total']['sitios']:,} | Rechazados: {resumen['rechazados']:,} | "
+          f"Tiempo: {segundos:.2f} s ({filas / max(segundos, 1e-9):,.0f} filas/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
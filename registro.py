@@ -0,0 +1,209 @@
+"""Registro persistente de proyectos en SQLite.
+
+Cada registro guarda los datos de contacto y la propuesta calculada. Las
+escrituras no bloquean la app: ``guardar`` solo encola la fila y un hilo
+escritor las inserta por lotes (``executemany`` en una transacción). Las
+lecturas usan una conexión por hilo, y la base está en modo WAL para que
+leer no espere al escritor. Hay índices por correo, teléfono y ciudad.
+
+La base vive en ``datos/proyectos.db`` (o ``SOLARCOL_REGISTRO``).
+
+``repreciar`` recotiza los proyectos registrados con la curva de costos con
+que se emitieron y con otra versión (por defecto la vigente).
+
+Uso:
+    python registro.py buscar --correo ana@correo.com
+    python registro.py buscar --ciudad Bogotá --limite 50
+    python registro.py repreciar --ciudad Bogotá --version v11
+    python registro.py contar
+"""
+import argparse
+import atexit
+import contextlib
+import csv
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from curvas_costo import curvas
+
+RUTA_DEFECTO = os.environ.get(
+    "SOLARCOL_REGISTRO",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "proyectos.db"))
+
+COLUMNAS = (
+    "creado", "nombre", "correo", "telefono", "ciudad", "hsp", "consumo_mes", "tarifa_kwh",
+    "autoconsumo_directo", "aplica_ley_1715", "modulo", "num_paneles", "kwp_instalado",
+    "inversion_total", "gen_anual", "ahorro_total_anual", "payback", "version_costos",
+)
+FILTROS = ("correo", "telefono", "ciudad")
+COLUMNAS_REPRECIO = (
+    "id", "creado", "ciudad", "kwp_instalado", "version_costos", "inversion_total", "inversion_emision",
+    "version_comparada", "inversion_comparada", "diferencia",
+)
+TAMAÑO_LOTE = 1000
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS proyectos (
+    id INTEGER PRIMARY KEY,
+    {", ".join(COLUMNAS)}
+);
+{"".join(f"CREATE INDEX IF NOT EXISTS idx_proyectos_{c} ON proyectos ({c});" for c in FILTROS)}
+"""
+_INSERTAR = f"INSERT INTO proyectos ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})"
+_FIN = object()
+
+
+def _conectar(ruta):
+    conexion = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    conexion.row_factory = sqlite3.Row
+    return conexion
+
+
+class Registro:
+    def __init__(self, ruta=RUTA_DEFECTO, tamaño_lote=TAMAÑO_LOTE):
+        self.ruta = ruta
+        self.tamaño_lote = tamaño_lote
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        # ``with conexion`` solo confirma la transacción; ``closing`` además cierra la conexión
+        with contextlib.closing(_conectar(ruta)) as conexion:
+            conexion.executescript(_ESQUEMA)
+        self.cola = queue.Queue()
+        self.lectores = threading.local()
+        self.escritor = threading.Thread(target=self._escribir, name="registro-escritor", daemon=True)
+        self.escritor.start()
+
+    def guardar(self, proyecto):
+        """Encola un proyecto (dict con las claves de ``COLUMNAS``); no espera la escritura."""
+        fila = dict(proyecto)
+        fila.setdefault("creado", datetime.now().isoformat(timespec="seconds"))
+        self.cola.put(tuple(fila.get(c) for c in COLUMNAS))
+
+    def _escribir(self):
+        conexion = _conectar(self.ruta)
+        activo = True
+        while activo:
+            lote = [self.cola.get()]
+            while len(lote) < self.tamaño_lote:
+                try:
+                    lote.append(self.cola.get_nowait())
+                except queue.Empty:
+                    break
+            filas = [f for f in lote if f is not _FIN]
+            activo = len(filas) == len(lote)
+            try:
+                if filas:
+                    with conexion:
+                        conexion.executemany(_INSERTAR, filas)
+            except sqlite3.Error as e:  # un lote fallido no debe detener el escritor
+                print(f"registro: no se guardaron {len(filas)} proyectos: {e}", file=sys.stderr)
+            for _ in lote:
+                self.cola.task_done()
+        conexion.close()
+
+    def vaciar(self):
+        """Espera a que todo lo encolado quede escrito."""
+        self.cola.join()
+
+    def cerrar(self):
+        if self.escritor.is_alive():
+            self.cola.put(_FIN)
+            self.escritor.join()
+
+    def _lector(self):
+        if not hasattr(self.lectores, "conexion"):
+            self.lectores.conexion = _conectar(self.ruta)
+        return self.lectores.conexion
+
+    def buscar(self, limite=100, **filtros):
+        """Proyectos más recientes que coinciden con ``correo``, ``telefono`` y/o ``ciudad``."""
+        desconocidos = set(filtros) - set(FILTROS)
+        if desconocidos:
+            raise TypeError(f"Filtros desconocidos: {', '.join(sorted(desconocidos))}")
+        filtros = {c: v for c, v in filtros.items() if v is not None}
+        donde = " AND ".join(f"{c} = ?" for c in filtros) or "1"
+        filas = self._lector().execute(
+            f"SELECT * FROM proyectos WHERE {donde} ORDER BY id DESC LIMIT ?", (*filtros.values(), limite))
+        return [dict(f) for f in filas]
+
+    def contar(self):
+        return self._lector().execute("SELECT COUNT(*) FROM proyectos").fetchone()[0]
+
+
+def repreciar(filas, version=None):
+    """Inversión de proyectos registrados con la versión con que se emitieron y con ``version``.
+
+    ``inversion_emision`` reproduce la inversión registrada; ``diferencia`` es cuánto
+    cambia con la versión comparada (por defecto la vigente). Se omiten las filas
+    cuya versión no está en el archivo de curvas.
+    """
+    tabla = curvas()
+    version = version or tabla.vigente
+    filas = [f for f in filas if f["version_costos"] in tabla.curvas]
+    kwp = [f["kwp_instalado"] for f in filas]
+    emision = tabla.inversion_por_version(kwp, [f["version_costos"] for f in filas])
+    comparada = tabla.inversion(kwp, version)
+    return [
+        {**{c: f[c] for c in COLUMNAS_REPRECIO[:6]}, "inversion_emision": round(e), "version_comparada": version,
+         "inversion_comparada": round(c), "diferencia": round(c - e)}
+        for f, e, c in zip(filas, emision.tolist(), comparada.tolist())
+    ]
+
+
+_registro = None
+_candado = threading.Lock()
+
+
+def registro():
+    """Registro compartido del proceso; se vacía al salir."""
+    global _registro
+    with _candado:
+        if _registro is None:
+            _registro = Registro()
+            atexit.register(_registro.cerrar)
+    return _registro
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta el registro de proyectos.")
+    parser.add_argument("--base", default=RUTA_DEFECTO, help="archivo SQLite del registro")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    buscar = sub.add_parser("buscar", help="proyectos por correo, teléfono o ciudad (CSV a stdout)")
+    for filtro in FILTROS:
+        buscar.add_argument(f"--{filtro}")
+    buscar.add_argument("--limite", type=int, default=100)
+    recotizar = sub.add_parser("repreciar", help="inversión con la curva de emisión y con otra versión (CSV a stdout)")
+    for filtro in FILTROS:
+        recotizar.add_argument(f"--{filtro}")
+    recotizar.add_argument("--limite", type=int, default=100)
+    recotizar.add_argument("--version", help="versión de costos a comparar (por defecto la vigente)")
+    sub.add_parser("contar", help="total de proyectos registrados")
+    args = parser.parse_args(argv)
+    if args.comando == "repreciar" and args.version and args.version not in curvas().curvas:
+        parser.error(f"versión de curva de costos desconocida: {args.version} "
+                     f"(disponibles: {', '.join(curvas().curvas)})")
+
+    consulta = Registro(args.base)
+    try:
+        if args.comando == "contar":
+            print(consulta.contar())
+        else:
+            filas = consulta.buscar(args.limite, **{f: getattr(args, f) for f in FILTROS})
+            columnas = ("id",) + COLUMNAS
+            if args.comando == "repreciar":
+                filas, columnas = repreciar(filas, args.version), COLUMNAS_REPRECIO
+            escritor = csv.DictWriter(sys.stdout, fieldnames=columnas)
+            escritor.writeheader()
+            escritor.writerows(filas)
+    finally:
+        consulta.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
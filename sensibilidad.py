@@ -0,0 +1,114 @@
+"""Mapas de sensibilidad del payback y el VPN sobre una malla de dos variables.
+
+Hay dos mallas:
+
+- tarifa × consumo: cada punto redimensiona el sistema con ``motor`` (el
+  consumo cambia el número de paneles).
+- HSP × costo por kWp: el mismo sistema con otra radiación y otro precio.
+
+Toda la malla (200 × 200 por defecto) se evalúa en una sola llamada
+vectorizada a ``finanzas.evaluar`` con los ejes como arreglos que se
+difunden (``[:, None]`` y ``[None, :]``). Cada malla cubre ±``RANGO`` del
+valor del proyecto y se memoiza: cambiar la ventana que se muestra o volver a
+la pestaña no recalcula nada.
+
+``tornado`` mueve uno a uno los parámetros del modelo (``motor.PARAMETROS``)
+que influyen en algún indicador y evalúa todas las perturbaciones juntas, con
+los parámetros como arreglos.
+"""
+import numpy as np
+
+from cache import memoizar
+from finanzas import SUPUESTOS, evaluar
+from motor import PARAMETROS, calcular_lote
+
+PUNTOS = 200
+RANGO = 0.5  # la malla va de (1 - RANGO) a (1 + RANGO) veces el valor del proyecto
+
+# Área y peso no cambian payback, VPN ni CO2 evitado; los árboles no se grafican
+PARAMETROS_TORNADO = tuple(nombre for nombre in PARAMETROS if nombre not in (
+    "area_panel", "factor_mantenimiento", "peso_panel", "factor_seguridad_peso", "co2_por_arbol"))
+# finanzas aplica el beneficio con ``año <= años_ley_1715``: solo tiene sentido en años enteros
+PARAMETROS_ENTEROS = ("años_ley_1715",)
+
+
+def _eje(centro, puntos, rango):
+    return np.linspace(centro * (1 - rango), centro * (1 + rango), puntos)
+
+
+def _resultado(x, y, indicadores):
+    # Sin recuperación en el horizonte el payback se muestra como el último año
+    payback = np.where(np.isnan(indicadores["payback"]), SUPUESTOS["años"], indicadores["payback"])
+    return {
+        "x": tuple(x.tolist()),
+        "y": tuple(y.tolist()),
+        "payback": tuple(map(tuple, payback.round(2).tolist())),
+        "vpn": tuple(map(tuple, indicadores["vpn"].round(0).tolist())),
+    }
+
+
+@memoizar(max_entradas=32)
+def malla_tarifa_consumo(hsp, tarifa_kwh, consumo_mes, autoconsumo_directo, aplica_ley_1715,
+                         potencia_panel=PARAMETROS["potencia_panel"], puntos=PUNTOS, rango=RANGO):
+    """Payback y VPN con la tarifa en las columnas (x) y el consumo en las filas (y)."""
+    tarifas = _eje(tarifa_kwh, puntos, rango)
+    consumos = _eje(consumo_mes, puntos, rango)
+    p = calcular_lote(None, consumos[:, None], tarifas[None, :], autoconsumo_directo, aplica_ley_1715, hsp=hsp,
+                      potencia_panel=potencia_panel)
+    indicadores = evaluar(p["inversion_total"], p["gen_anual"], tarifas[None, :], autoconsumo_directo,
+                          p["beneficio_anual_renta"], calcular_tir=False)
+    return _resultado(tarifas, consumos, indicadores)
+
+
+@memoizar(max_entradas=32)
+def malla_hsp_costo(kwp_instalado, hsp, costo_kwp, tarifa_kwh, autoconsumo_directo, aplica_ley_1715,
+                    puntos=PUNTOS, rango=RANGO):
+    """Payback y VPN con el costo por kWp en las columnas (x) y la HSP en las filas (y)."""
+    costos = _eje(costo_kwp, puntos, rango)
+    hsps = _eje(hsp, puntos, rango)
+    inversion = kwp_instalado * costos[None, :]
+    gen_anual = kwp_instalado * hsps[:, None] * PARAMETROS["eficiencia"] * 365
+    beneficio = np.where(aplica_ley_1715, (inversion * PARAMETROS["fraccion_deducible"] * PARAMETROS["tasa_renta"])
+                         / PARAMETROS["años_ley_1715"], 0)
+    inversion, gen_anual, beneficio = np.broadcast_arrays(inversion, gen_anual, beneficio)
+    indicadores = evaluar(inversion, gen_anual, tarifa_kwh, autoconsumo_directo, beneficio, calcular_tir=False)
+    return _resultado(costos, hsps, indicadores)
+
+
+@memoizar(max_entradas=32)
+def tornado(hsp, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, variacion=0.1,
+            potencia_panel=PARAMETROS["potencia_panel"]):
+    """Payback, VPN y CO2 al mover cada parámetro de ``PARAMETROS_TORNADO`` ±``variacion``.
+
+    El payback y el VPN son los del flujo de caja (``finanzas.evaluar``), como en la app.
+    Los de ``PARAMETROS_ENTEROS`` se mueven en años enteros (al menos uno).
+    El caso base y las 2 × N perturbaciones son una sola llamada a ``calcular_lote``:
+    cada parámetro se pasa como un arreglo de 2N + 1 valores, igual al base salvo en
+    sus dos filas (fila 2i + 1 baja el parámetro i, fila 2i + 2 lo sube).
+    """
+    nombres = PARAMETROS_TORNADO
+    base = {**PARAMETROS, "potencia_panel": potencia_panel}
+    n = len(nombres)
+    parametros = {}
+    for j, nombre in enumerate(nombres):
+        valores = np.full(2 * n + 1, float(base[nombre]))
+        if nombre in PARAMETROS_ENTEROS:
+            paso = max(1, round(base[nombre] * variacion))
+            valores[2 * j + 1], valores[2 * j + 2] = max(1, base[nombre] - paso), base[nombre] + paso
+        else:
+            valores[2 * j + 1], valores[2 * j + 2] = base[nombre] * (1 - variacion), base[nombre] * (1 + variacion)
+        parametros[nombre] = valores
+
+    p = calcular_lote(None, consumo_mes, tarifa_kwh, autoconsumo_directo, aplica_ley_1715, hsp=hsp, **parametros)
+    indicadores = evaluar(p["inversion_total"], p["gen_anual"], tarifa_kwh, autoconsumo_directo,
+                          p["beneficio_anual_renta"], parametros["factor_remuneracion_excedente"],
+                          parametros["años_ley_1715"], calcular_tir=False)
+    # El payback del flujo de caja, como en la app; sin recuperación se muestra como el último año
+    payback = np.where(np.isnan(indicadores["payback"]), SUPUESTOS["años"], indicadores["payback"])
+    resultado = {"variacion": variacion, "parametros": nombres}
+    for indicador, valores in (("payback", payback), ("vpn", indicadores["vpn"]),
+                               ("co2_evitado_anual", p["co2_evitado_anual"])):
+        valores = np.broadcast_to(valores, (2 * n + 1,))
+        resultado[indicador] = {"base": float(valores[0]), "bajo": tuple(valores[1::2].tolist()),
+                                "alto": tuple(valores[2::2].tolist())}
+    return resultado
@@ -0,0 +1,76 @@
+"""Simulación horaria (8760 h) de producción y autoconsumo.
+
+Cruza hora a hora el perfil de generación con el perfil de carga del cliente
+para obtener la energía autoconsumida, exportada e importada. Todas las
+funciones operan sobre el último eje, así que una matriz n × 8760 simula n
+escenarios en la misma llamada.
+"""
+import numpy as np
+
+from irradiancia import HORAS_AÑO, almacen
+from motor import PARAMETROS
+
+# Forma diaria de la demanda (peso relativo por hora, 0:00 a 23:00)
+FORMAS_CARGA = {
+    "Residencial": [2.0, 1.8, 1.7, 1.7, 1.8, 2.4, 3.6, 4.2, 3.6, 3.2, 3.2, 3.6,
+                    4.0, 3.6, 3.2, 3.2, 3.6, 4.6, 6.2, 6.8, 6.4, 5.2, 3.8, 2.6],
+    "Comercial": [1.0, 1.0, 1.0, 1.0, 1.0, 1.2, 2.0, 4.0, 6.0, 6.6, 6.8, 6.8,
+                  6.4, 6.6, 6.8, 6.6, 6.0, 4.6, 3.0, 2.0, 1.4, 1.2, 1.0, 1.0],
+    "Industrial 24h": [4.0, 4.0, 4.0, 4.0, 4.0, 4.2, 4.6, 5.0, 5.2, 5.2, 5.2, 5.2,
+                       5.0, 5.2, 5.2, 5.2, 5.0, 4.8, 4.6, 4.4, 4.2, 4.2, 4.0, 4.0],
+}
+
+
+def perfil_carga(consumo_mes, tipo="Residencial"):
+    """Demanda horaria del año (… × 8760, kWh) para un consumo mensual.
+
+    Se usa el mismo mes de 30 días que el dimensionamiento, de modo que la
+    demanda diaria es ``consumo_mes / 30``.
+    """
+    forma = np.asarray(FORMAS_CARGA[tipo], dtype=float)
+    forma_año = np.tile(forma / forma.sum(), 365)
+    return (np.asarray(consumo_mes, dtype=float)[..., None] / 30) * forma_año
+
+
+def perfil_generacion(kwp_instalado, irradiancia_horaria, eficiencia=PARAMETROS["eficiencia"]):
+    """Producción horaria (kWh) de un sistema dada la irradiación horaria (kWh/m²)."""
+    return np.asarray(kwp_instalado, dtype=float)[..., None] * np.asarray(irradiancia_horaria) * eficiencia
+
+
+def simular(generacion, carga):
+    """Balance horario entre generación y carga.
+
+    Devuelve totales anuales (kWh) y fracciones sobre el último eje:
+    ``porcentaje_autoconsumo`` es la parte de la generación consumida en sitio
+    y ``porcentaje_autosuficiencia`` la parte de la carga cubierta por el sistema.
+    """
+    generacion = np.asarray(generacion, dtype=float)
+    carga = np.asarray(carga, dtype=float)
+    if generacion.shape[-1] != HORAS_AÑO or carga.shape[-1] != HORAS_AÑO:
+        raise ValueError(f"Los perfiles deben tener {HORAS_AÑO} horas en el último eje")
+    autoconsumo = np.minimum(generacion, carga).sum(axis=-1)
+    gen_anual = generacion.sum(axis=-1)
+    carga_anual = carga.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "gen_anual": gen_anual,
+            "carga_anual": carga_anual,
+            "autoconsumo_kwh": autoconsumo,
+            "exportado_kwh": gen_anual - autoconsumo,
+            "importado_kwh": carga_anual - autoconsumo,
+            "porcentaje_autoconsumo": np.where(gen_anual > 0, 100 * autoconsumo / gen_anual, 0.0),
+            "porcentaje_autosuficiencia": np.where(carga_anual > 0, 100 * autoconsumo / carga_anual, 0.0),
+        }
+
+
+def simular_cliente(ciudad, kwp_instalado, consumo_mes, tipo="Residencial", hsp=None):
+    """Simulación anual de un cliente con el perfil horario de su municipio.
+
+    Si se da ``hsp`` (p. ej. interpolada en unas coordenadas), el perfil del
+    municipio se escala para que su promedio diario coincida con ella.
+    """
+    irradiancia_horaria = almacen().horaria(ciudad)
+    if hsp is not None:
+        irradiancia_horaria = irradiancia_horaria * (hsp / almacen().hsp_anual(ciudad))
+    generacion = perfil_generacion(kwp_instalado, irradiancia_horaria)
+    return {clave: valor.item() for clave, valor in simular(generacion, perfil_carga(consumo_mes, tipo)).items()}
@@ -0,0 +1,249 @@
+"""Distribución de módulos sobre la geometría real del techo.
+
+Recibe el polígono del techo en planta (metros, x = este, y = norte) y los
+obstáculos (tanques, claraboyas, ductos: polígonos), y acomoda módulos en filas
+este-oeste con orientación vertical u horizontal. Con inclinación, el paso
+entre filas deja libre la sombra de la fila anterior al mediodía del solsticio
+menos favorable para la latitud. El retiro perimetral y el margen alrededor de
+los obstáculos se aplican inflando el rectángulo de cada módulo.
+
+Las colisiones usan un índice espacial de rejilla uniforme sobre los bordes
+del techo y de los obstáculos. Cada posición candidata solo se prueba contra
+los bordes de las celdas que toca, y todos los pares (posición, borde) se
+evalúan de una vez con NumPy. Se prueban varios desfases de la malla de filas
+y ambas orientaciones en el mismo lote, y se queda la que más módulos acomoda.
+
+Uso:
+    from techo import distribuir
+    d = distribuir([(0, 0), (20, 0), (20, 12), (0, 12)], obstaculos=[[(8, 5), (10, 5), (10, 7), (8, 7)]])
+    d["num_paneles"]
+"""
+import numpy as np
+
+from cache import memoizar
+from motor import PARAMETROS
+
+RELACION_ASPECTO = 2.0      # largo / ancho de un módulo típico (2.28 × 1.13 m para 2.6 m²)
+SEPARACION_MODULOS = 0.02   # m entre módulos de una fila (grapas)
+PASILLO_MINIMO = 0.4        # m libres entre filas para mantenimiento
+RETIRO = 0.6                # m al borde del techo
+MARGEN_OBSTACULOS = 0.3     # m alrededor de cada obstáculo
+DESFASES = 4                # desfases probados por eje dentro de un paso de la malla
+DECLINACION_MAXIMA = 23.44  # grados
+TOLERANCIA = 1e-6           # m
+
+
+def dimensiones_modulo(area_panel=PARAMETROS["area_panel"], relacion=RELACION_ASPECTO):
+    """(largo, ancho) en metros de un módulo a partir de su área."""
+    largo = np.sqrt(area_panel * relacion)
+    return float(largo), float(area_panel / largo)
+
+
+def paso_filas(largo_inclinado, inclinacion, latitud, pasillo=PASILLO_MINIMO):
+    """Fondo en planta de una fila más el espacio libre hasta la siguiente.
+
+    El espacio libre es la sombra de la fila al mediodía del solsticio en que
+    el sol está más bajo para la latitud, y nunca menos que ``pasillo``.
+    """
+    inclinacion = np.radians(inclinacion)
+    altura_sol = np.radians(90 - abs(latitud) - DECLINACION_MAXIMA)
+    sombra = largo_inclinado * np.sin(inclinacion) / np.tan(altura_sol)
+    return float(largo_inclinado * np.cos(inclinacion)), float(max(sombra, pasillo))
+
+
+def _rotar(puntos, grados):
+    angulo = np.radians(grados)
+    c, s = np.cos(angulo), np.sin(angulo)
+    return puntos @ np.array([[c, s], [-s, c]])
+
+
+def _bordes(poligono):
+    """Segmentos (a, b) de un polígono cerrado."""
+    return poligono, np.roll(poligono, -1, axis=0)
+
+
+class IndiceRejilla:
+    """Índice espacial de segmentos en una rejilla uniforme (formato CSR: celda -> segmentos)."""
+
+    def __init__(self, a, b, celda):
+        self.a, self.b, self.celda = a, b, celda
+        minimo = np.minimum(a, b).min(axis=0)
+        maximo = np.maximum(a, b).max(axis=0)
+        self.origen = minimo
+        self.forma = np.floor((maximo - minimo) / celda).astype(int) + 1
+
+        i0, i1 = self._celdas(np.minimum(a, b), np.maximum(a, b))
+        segmento, celda_id = self._expandir(i0, i1)
+        orden = np.argsort(celda_id, kind="stable")
+        self.segmentos = segmento[orden]
+        self.punteros = np.searchsorted(celda_id[orden], np.arange(self.forma.prod() + 1))
+
+    def _celdas(self, minimo, maximo):
+        i0 = np.clip(np.floor((minimo - self.origen) / self.celda).astype(int), 0, self.forma - 1)
+        i1 = np.clip(np.floor((maximo - self.origen) / self.celda).astype(int), 0, self.forma - 1)
+        return i0, i1
+
+    def _expandir(self, i0, i1):
+        """Pares (elemento, celda) para cada elemento con su rango de celdas [i0, i1]."""
+        nx = i1[:, 0] - i0[:, 0] + 1
+        conteos = nx * (i1[:, 1] - i0[:, 1] + 1)
+        elemento = np.repeat(np.arange(len(i0)), conteos)
+        local = np.arange(conteos.sum()) - np.repeat(np.cumsum(conteos) - conteos, conteos)
+        cx = i0[elemento, 0] + local % nx[elemento]
+        cy = i0[elemento, 1] + local // nx[elemento]
+        return elemento, cy * self.forma[0] + cx
+
+    def candidatos(self, minimo, maximo):
+        """Pares (rectángulo, segmento) que comparten al menos una celda; puede haber repetidos."""
+        rectangulo, celda = self._expandir(*self._celdas(minimo, maximo))
+        inicio = self.punteros[celda]
+        conteos = self.punteros[celda + 1] - inicio
+        rectangulo = np.repeat(rectangulo, conteos)
+        local = np.arange(conteos.sum()) - np.repeat(np.cumsum(conteos) - conteos, conteos)
+        segmento = self.segmentos[np.repeat(inicio, conteos) + local]
+        return rectangulo, segmento
+
+
+def _cruza_rectangulo(a, b, minimo, maximo):
+    """¿El segmento a-b toca el rectángulo alineado [minimo, maximo]? (ejes separadores)."""
+    solapa = (np.maximum(a, b) >= minimo).all(axis=1) & (np.minimum(a, b) <= maximo).all(axis=1)
+    d = b - a
+    lados = [d[:, 0] * (y - a[:, 1]) - d[:, 1] * (x - a[:, 0])
+             for x in (minimo[:, 0], maximo[:, 0]) for y in (minimo[:, 1], maximo[:, 1])]
+    lados = np.stack(lados, axis=1)
+    return solapa & (lados.min(axis=1) <= 0) & (lados.max(axis=1) >= 0)
+
+
+def _dentro(puntos, a, b, inicios, conteos, poligono):
+    """Para pares (punto, polígono), ¿está el punto dentro? Rayo hacia +x contra los bordes de su polígono.
+
+    ``a`` y ``b`` son los bordes de todos los polígonos concatenados; ``inicios`` y
+    ``conteos`` ubican los bordes de cada uno.
+    """
+    par = np.repeat(np.arange(len(puntos)), conteos[poligono])
+    borde = np.repeat(inicios[poligono], conteos[poligono]) + np.arange(par.size) \
+        - np.repeat(np.cumsum(conteos[poligono]) - conteos[poligono], conteos[poligono])
+    px, py = puntos[par, 0], puntos[par, 1]
+    ax, ay, bx, by = a[borde, 0], a[borde, 1], b[borde, 0], b[borde, 1]
+    cruza_y = (ay > py) != (by > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cruza = cruza_y & (px < ax + (py - ay) * (bx - ax) / (by - ay))
+    return np.bincount(par, weights=cruza, minlength=len(puntos)) % 2 == 1
+
+
+def distribuir(poligono, obstaculos=(), area_panel=PARAMETROS["area_panel"], orientacion="auto", inclinacion=10,
+               latitud=4.6, azimut=0, retiro=RETIRO, margen_obstaculos=MARGEN_OBSTACULOS, pasillo=PASILLO_MINIMO):
+    """Máximo número de módulos que caben en el techo y dónde van.
+
+    ``orientacion`` es "vertical" (lado largo en la pendiente), "horizontal" o
+    "auto" (la que acomode más). ``azimut`` gira las filas (grados, antihorario)
+    respecto al eje este-oeste. Devuelve un dict con el conteo, la orientación
+    elegida, las esquinas de cada módulo (N × 4 × 2, en las coordenadas de
+    entrada) y las medidas usadas.
+    """
+    poligono = _rotar(np.asarray(poligono, dtype=float), -azimut)
+    obstaculos = [_rotar(np.asarray(o, dtype=float), -azimut) for o in obstaculos]
+    largo, ancho = dimensiones_modulo(area_panel)
+    orientaciones = ("vertical", "horizontal") if orientacion == "auto" else (orientacion,)
+
+    # Bordes de todos los polígonos, con el margen que exige cada uno
+    poligonos = [poligono, *obstaculos]
+    a = np.concatenate([_bordes(p)[0] for p in poligonos])
+    b = np.concatenate([_bordes(p)[1] for p in poligonos])
+    margen = np.concatenate([np.full(len(poligono), retiro)] + [np.full(len(o), margen_obstaculos)
+                                                                for o in obstaculos])
+    inicios = np.cumsum([0] + [len(p) for p in poligonos[:-1]])
+
+    # Malla de posiciones candidatas: orientación × desfase x × desfase y × fila × columna.
+    # El desfase 0 arranca pegado al retiro, que es el mejor acomodo en techos rectangulares.
+    candidatos, medidas = [], {}
+    minimo, maximo = poligono.min(axis=0), poligono.max(axis=0)
+    for o, nombre in enumerate(orientaciones):
+        largo_inclinado, frente = (largo, ancho) if nombre == "vertical" else (ancho, largo)
+        fondo, libre = paso_filas(largo_inclinado, inclinacion, latitud, pasillo)
+        paso = np.array([frente + SEPARACION_MODULOS, fondo + libre])
+        medidas[nombre] = {"frente": frente, "fondo": fondo, "paso_filas": float(paso[1])}
+        desfases = (np.arange(DESFASES) / DESFASES)[:, None] * paso
+        columnas = np.arange(int((maximo[0] - minimo[0]) // paso[0]) + 1)
+        filas = np.arange(int((maximo[1] - minimo[1]) // paso[1]) + 1)
+        dx, dy, fila, columna = np.meshgrid(desfases[:, 0], desfases[:, 1], filas, columnas, indexing="ij")
+        grupo = o * DESFASES ** 2 + np.arange(DESFASES ** 2).repeat(filas.size * columnas.size)
+        esquina = np.stack([minimo[0] + retiro + dx.ravel() + columna.ravel() * paso[0],
+                            minimo[1] + retiro + dy.ravel() + fila.ravel() * paso[1]], axis=1)
+        candidatos.append((grupo, esquina, esquina + [frente, fondo], fila.ravel()))
+    grupo, inf, sup, fila = (np.concatenate(c) for c in zip(*candidatos))
+
+    # Solo lo que queda dentro del techo (descontando el retiro) sigue a la prueba de bordes
+    dentro = (inf >= minimo + retiro - TOLERANCIA).all(axis=1) & (sup <= maximo - retiro + TOLERANCIA).all(axis=1)
+    grupo, inf, sup, fila = grupo[dentro], inf[dentro], sup[dentro], fila[dentro]
+
+    indice = IndiceRejilla(a, b, celda=max(largo, 1.0))
+    holgura = max(retiro, margen_obstaculos)
+    r, s = indice.candidatos(inf - holgura, sup + holgura)
+    # Quedar justo a la distancia del retiro o del margen no es chocar
+    holgura_borde = margen[s, None] - TOLERANCIA
+    choca = _cruza_rectangulo(a[s], b[s], inf[r] - holgura_borde, sup[r] + holgura_borde)
+    libre = np.ones(len(inf), dtype=bool)
+    libre[r[choca]] = False
+
+    # Sin bordes cerca, el módulo está entero dentro o fuera de cada polígono: basta con su centro.
+    # Dentro del techo; y fuera de los obstáculos cuya caja (en el índice) contiene el centro.
+    conteos_bordes = np.array([len(p) for p in poligonos])
+    centros = (inf[libre] + sup[libre]) / 2
+    dentro_techo = _dentro(centros, a, b, inicios, conteos_bordes, np.zeros(len(centros), dtype=int))
+    if obstaculos:
+        cajas = IndiceRejilla(np.array([o.min(axis=0) for o in obstaculos]),
+                              np.array([o.max(axis=0) for o in obstaculos]), celda=max(largo, 1.0))
+        punto, obstaculo = cajas.candidatos(centros, centros)
+        en_obstaculo = _dentro(centros[punto], a, b, inicios, conteos_bordes, obstaculo + 1)
+        dentro_techo[punto[en_obstaculo]] = False
+    libre[libre] = dentro_techo
+
+    conteos = np.bincount(grupo[libre], minlength=len(orientaciones) * DESFASES ** 2)
+    mejor = int(conteos.argmax())
+    elegidos = libre & (grupo == mejor)
+    nombre = orientaciones[mejor // DESFASES ** 2]
+    esquinas = np.stack([inf[elegidos], np.stack([sup[elegidos, 0], inf[elegidos, 1]], axis=1),
+                         sup[elegidos], np.stack([inf[elegidos, 0], sup[elegidos, 1]], axis=1)], axis=1)
+    area_techo = 0.5 * abs(np.dot(poligono[:, 0], np.roll(poligono[:, 1], -1))
+                           - np.dot(poligono[:, 1], np.roll(poligono[:, 0], -1)))
+    return {
+        "num_paneles": int(conteos[mejor]),
+        "orientacion": nombre,
+        "filas": int(np.unique(fila[elegidos]).size),
+        **medidas[nombre],
+        "largo_panel": largo,
+        "ancho_panel": ancho,
+        "area_techo": float(area_techo),
+        "ocupacion": float(conteos[mejor] * area_panel / area_techo) if area_techo else 0.0,
+        "posiciones_probadas": int(dentro.size),
+        "esquinas": _rotar(esquinas.reshape(-1, 2), azimut).reshape(-1, 4, 2),
+    }
+
+
+def leer_vertices(texto):
+    """Vértices "x, y" (uno por línea, en metros) -> tupla de pares; ValueError si no forman un polígono."""
+    vertices = []
+    for numero, linea in enumerate(texto.strip().splitlines(), start=1):
+        if not linea.strip():
+            continue
+        partes = linea.replace(";", ",").split(",")
+        try:
+            x, y = (float(v) for v in partes)
+        except ValueError:
+            raise ValueError(f"Línea {numero}: se esperaba 'x, y' y llegó '{linea.strip()}'") from None
+        vertices.append((x, y))
+    if len(vertices) < 3:
+        raise ValueError("El techo necesita al menos 3 vértices.")
+    return tuple(vertices)
+
+
+def rectangulo(x, y, ancho, largo):
+    """Obstáculo rectangular con esquina inferior izquierda en (x, y)."""
+    return ((x, y), (x + ancho, y), (x + ancho, y + largo), (x, y + largo))
+
+
+@memoizar(max_entradas=64)
+def distribuir_cacheado(poligono, obstaculos, area_panel, orientacion, inclinacion, latitud, azimut, retiro):
+    """``distribuir`` con entradas en tuplas, memoizado para los reruns de la app."""
+    return distribuir(poligono, obstaculos, area_panel, orientacion, inclinacion, latitud, azimut, retiro)
@@ -0,0 +1,43 @@
+"""Reglas de validación del registro de proyectos.
+
+Las mismas reglas se usan en el formulario de la app (un registro) y en los
+procesos por lote (columnas de un DataFrame).
+"""
+import re
+
+PATRON_CORREO = r'^[\w\.-]+@[\w\.-]+\.\w+$'
+PATRON_TELEFONO = r'^\d{10}$'
+
+
+def es_correo_valido(email):
+    return re.match(PATRON_CORREO, email)
+
+
+def es_telefono_valido(telefono):
+    return re.match(PATRON_TELEFONO, telefono)
+
+
+def es_registro_valido(nombre, correo, telefono, ciudad):
+    return bool(nombre) and bool(es_correo_valido(correo)) and bool(es_telefono_valido(telefono)) \
+        and ciudad != "Seleccionar"
+
+
+def motivos_rechazo(df, ciudades):
+    """Motivo de rechazo por fila ("" si la fila es válida).
+
+    ``df`` debe tener las columnas nombre, correo, telefono y ciudad;
+    ``ciudades`` es el conjunto de ciudades con HSP conocida.
+    """
+    import numpy as np
+
+    texto = {c: df[c].fillna("").astype(str).str.strip() for c in ("nombre", "correo", "telefono", "ciudad")}
+    reglas = [
+        ("nombre vacío", texto["nombre"] == ""),
+        ("correo inválido", ~texto["correo"].str.match(PATRON_CORREO)),
+        ("teléfono inválido", ~texto["telefono"].str.match(PATRON_TELEFONO)),
+        ("ciudad inválida", (texto["ciudad"] == "Seleccionar") | ~texto["ciudad"].isin(ciudades)),
+    ]
+    motivo = np.full(len(df), "", dtype=object)
+    for etiqueta, falla in reversed(reglas):
+        motivo = np.where(falla.to_numpy(), etiqueta, motivo)
+    return motivo